@@ -0,0 +1,320 @@
+"""
+Asynchronous variants of chemistry functions, for asyncio applications such
+as web services.
+
+The calls are not executed in the event loop: concurrent calls are merged
+into micro-batches, executed on a shared pool of worker processes (or
+threads, see the executors module). The number of calls in flight is
+bounded, so that the callers wait (instead of growing an unbounded queue)
+when the workers cannot keep up.
+
+    canonical = await canonicalize_any_async("C(C)O")
+"""
+
+import asyncio
+import logging
+import os
+import pickle
+from concurrent.futures import BrokenExecutor, Executor
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Union
+
+from attr import define, field
+
+from .executors import ProcessExecutor, ThreadExecutor
+from .miscellaneous import canonicalize_any
+from .reaction_equation import ReactionEquation
+from .reaction_smiles import parse_any_reaction_smiles
+from .tokenization import tokenize_smiles
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+# Functions that can be called asynchronously, by name (for the worker processes)
+_OPERATIONS: Dict[str, Callable[..., Any]] = {
+    "canonicalize_any": canonicalize_any,
+    "tokenize_smiles": tokenize_smiles,
+    "parse_any_reaction_smiles": parse_any_reaction_smiles,
+}
+
+# Backends of the executors usable from asyncio code
+ASYNC_BACKENDS = ("thread", "process")
+
+# Operation name and its keyword arguments; calls with the same key are batched
+_BatchKey = Tuple[str, Tuple[Tuple[str, Any], ...]]
+
+# Result of a call, or the exception it raised
+_Outcome = Tuple[Any, Optional[Exception]]
+
+
+def _run_batch(
+    state: None, batch: Tuple[str, Dict[str, Any], List[str]]
+) -> List[_Outcome]:
+    """Execute a batch in a worker."""
+    operation, kwargs, inputs = batch
+    function = _OPERATIONS[operation]
+    outcomes: List[_Outcome] = []
+    for item in inputs:
+        try:
+            outcomes.append((function(item, **kwargs), None))
+        except Exception as e:
+            outcomes.append((None, _picklable_exception(e)))
+    return outcomes
+
+
+def _picklable_exception(exception: Exception) -> Exception:
+    """The exception, or a RuntimeError with its message if it cannot be
+    sent back from a worker process (which would fail the whole batch)."""
+    try:
+        pickle.loads(pickle.dumps(exception))
+    except Exception:
+        return RuntimeError(f"{type(exception).__name__}: {exception}")
+    return exception
+
+
+@define
+class _PendingBatch:
+    """Calls waiting for their batch to be sent to the executor."""
+
+    inputs: List[str] = field(factory=list)
+    futures: List["asyncio.Future[Any]"] = field(factory=list)
+    timer: Optional[asyncio.TimerHandle] = None
+
+
+class AsyncBatcher:
+    """
+    Execute chemistry functions for asyncio code, in micro-batches on a pool
+    of worker processes or threads.
+
+    A batch is sent to the executor when it reaches ``max_batch_size`` calls,
+    or ``max_delay`` seconds after its first call. At most ``max_pending``
+    calls are in flight; further calls wait until earlier ones are done.
+
+    The results and exceptions are the same as for the synchronous functions.
+    """
+
+    def __init__(
+        self,
+        backend: str = "process",
+        n_jobs: Optional[int] = None,
+        max_batch_size: int = 256,
+        max_delay: float = 0.002,
+        max_pending: int = 10000,
+    ):
+        """
+        Args:
+            backend: "process" or "thread", see the executors module. The
+                pool of workers is created on first use, and shut down by
+                ``close()``. A new pool replaces it if a worker process dies.
+            n_jobs: number of workers. Defaults to the number of CPUs.
+            max_batch_size: maximal number of calls in one batch.
+            max_delay: maximal number of seconds a call waits for other calls
+                to join its batch.
+            max_pending: maximal number of calls in flight.
+
+        Raises:
+            ValueError: for unknown backends.
+        """
+        if backend not in ASYNC_BACKENDS:
+            raise ValueError(
+                f'Invalid backend: "{backend}". Available backends: '
+                f'{", ".join(ASYNC_BACKENDS)}.'
+            )
+        if n_jobs is None:
+            n_jobs = os.cpu_count() or 1
+        self.executor: Union[ThreadExecutor, ProcessExecutor] = (
+            ThreadExecutor(n_jobs) if backend == "thread" else ProcessExecutor(n_jobs)
+        )
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.max_pending = max_pending
+        self._pool: Optional[Executor] = None
+
+        # Statistics, f.i. for the average batch size
+        self.submitted_calls = 0
+        self.submitted_batches = 0
+
+        # State tied to the event loop, see _bind_to_running_loop()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._pending: Dict[_BatchKey, _PendingBatch] = {}
+        self._tasks: Set["asyncio.Task[None]"] = set()
+
+    async def canonicalize_any(
+        self,
+        any_smiles: str,
+        check_valence: bool = True,
+        sort_molecules: bool = False,
+        fallback_value: Optional[str] = None,
+    ) -> str:
+        """Asynchronous variant of ``canonicalize_any``."""
+        result: str = await self._call(
+            "canonicalize_any",
+            any_smiles,
+            check_valence=check_valence,
+            sort_molecules=sort_molecules,
+            fallback_value=fallback_value,
+        )
+        return result
+
+    async def tokenize_smiles(
+        self, smiles: str, fallback_value: Optional[str] = None
+    ) -> str:
+        """Asynchronous variant of ``tokenize_smiles``."""
+        result: str = await self._call(
+            "tokenize_smiles", smiles, fallback_value=fallback_value
+        )
+        return result
+
+    async def parse_any_reaction_smiles(self, smiles: str) -> ReactionEquation:
+        """Asynchronous variant of ``parse_any_reaction_smiles``."""
+        result: ReactionEquation = await self._call("parse_any_reaction_smiles", smiles)
+        return result
+
+    async def close(self) -> None:
+        """Wait for the calls in flight, and shut down the pool of workers."""
+        for key in list(self._pending):
+            self._flush(key)
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._pool is not None:
+            pool, self._pool = self._pool, None
+            await self._shutdown_pool(pool)
+
+    async def __aenter__(self) -> "AsyncBatcher":
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        await self.close()
+
+    async def _call(self, operation: str, item: str, **kwargs: Any) -> Any:
+        loop, semaphore = self._bind_to_running_loop()
+        # Backpressure: released when the batch is done, see _execute()
+        await semaphore.acquire()
+
+        future: "asyncio.Future[Any]" = loop.create_future()
+        key: _BatchKey = (operation, tuple(sorted(kwargs.items())))
+        batch = self._pending.setdefault(key, _PendingBatch())
+        batch.inputs.append(item)
+        batch.futures.append(future)
+        if len(batch.inputs) >= self.max_batch_size:
+            self._flush(key)
+        elif batch.timer is None:
+            batch.timer = loop.call_later(self.max_delay, self._flush, key)
+
+        return await future
+
+    def _flush(self, key: _BatchKey) -> None:
+        batch = self._pending.pop(key, None)
+        if batch is None:
+            return
+        if batch.timer is not None:
+            batch.timer.cancel()
+        self.submitted_calls += len(batch.inputs)
+        self.submitted_batches += 1
+
+        task = asyncio.ensure_future(self._execute(key, batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _execute(self, key: _BatchKey, batch: _PendingBatch) -> None:
+        operation, kwargs = key
+        pool = self._get_pool()
+        try:
+            outcomes = await asyncio.wrap_future(
+                self.executor.submit(
+                    pool,
+                    _run_batch,
+                    (operation, dict(kwargs), batch.inputs),
+                )
+            )
+        except asyncio.CancelledError:
+            for future in batch.futures:
+                future.cancel()
+            raise
+        except Exception as e:
+            # F.i. a worker process was killed
+            logger.error(f"Error when executing a batch of {operation}: {e}")
+            for future in batch.futures:
+                if not future.done():
+                    future.set_exception(e)
+            if isinstance(e, BrokenExecutor) and self._pool is pool:
+                # The next batches get a new pool
+                self._pool = None
+                await self._shutdown_pool(pool)
+        else:
+            for future, (result, exception) in zip(batch.futures, outcomes):
+                # The caller may have been cancelled in the meantime
+                if future.done():
+                    continue
+                if exception is None:
+                    future.set_result(result)
+                else:
+                    future.set_exception(exception)
+        finally:
+            assert self._semaphore is not None
+            for _ in batch.futures:
+                self._semaphore.release()
+
+    def _bind_to_running_loop(
+        self,
+    ) -> Tuple[asyncio.AbstractEventLoop, asyncio.Semaphore]:
+        # The semaphore and the timers belong to one event loop; start over
+        # if used from another one (f.i. for successive calls to asyncio.run).
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._semaphore is None:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_pending)
+            self._pending = {}
+            self._tasks = set()
+        return loop, self._semaphore
+
+    def _get_pool(self) -> Executor:
+        if self._pool is None:
+            self._pool = self.executor.create_pool()
+        return self._pool
+
+    async def _shutdown_pool(self, pool: Executor) -> None:
+        # Waiting for the workers would block the event loop
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, pool.shutdown)
+
+
+# Batcher shared by the module-level functions
+_default_batcher: Optional[AsyncBatcher] = None
+
+
+def get_default_batcher() -> AsyncBatcher:
+    """Batcher used by the module-level functions, created on first use."""
+    global _default_batcher
+    if _default_batcher is None:
+        _default_batcher = AsyncBatcher()
+    return _default_batcher
+
+
+async def canonicalize_any_async(
+    any_smiles: str,
+    check_valence: bool = True,
+    sort_molecules: bool = False,
+    fallback_value: Optional[str] = None,
+) -> str:
+    """Asynchronous variant of ``canonicalize_any``, see AsyncBatcher."""
+    return await get_default_batcher().canonicalize_any(
+        any_smiles,
+        check_valence=check_valence,
+        sort_molecules=sort_molecules,
+        fallback_value=fallback_value,
+    )
+
+
+async def tokenize_smiles_async(
+    smiles: str, fallback_value: Optional[str] = None
+) -> str:
+    """Asynchronous variant of ``tokenize_smiles``, see AsyncBatcher."""
+    return await get_default_batcher().tokenize_smiles(
+        smiles, fallback_value=fallback_value
+    )
+
+
+async def parse_any_reaction_smiles_async(smiles: str) -> ReactionEquation:
+    """Asynchronous variant of ``parse_any_reaction_smiles``, see AsyncBatcher."""
+    return await get_default_batcher().parse_any_reaction_smiles(smiles)
@@ -0,0 +1,89 @@
+"""
+Canonicalization of large numbers of SMILES strings, possibly in parallel.
+"""
+
+from typing import Iterable, Iterator, Optional
+
+from .batch_processing import BatchProcessor, ProcessingFailure
+from .miscellaneous import canonicalize_any
+
+# Failures are reported as for any batch processing
+CanonicalizationFailure = ProcessingFailure
+
+
+class BatchCanonicalizer(BatchProcessor):
+    """
+    Canonicalize SMILES strings (molecules, sets of molecules, or reactions)
+    one per line, in chunks that are distributed over several processes.
+
+    The output is identical for any number of processes: the lines are
+    returned in the original order, and without invalid placeholder, the
+    exception of the first invalid SMILES is raised after returning all
+    the lines before it.
+    """
+
+    progress_verb = "Canonicalized"
+
+    def __init__(
+        self,
+        check_valence: bool = True,
+        sort_molecules: bool = False,
+        invalid_placeholder: Optional[str] = None,
+        n_jobs: int = 1,
+        chunk_size: int = 1000,
+        progress_interval: float = 10.0,
+        timeout: Optional[float] = None,
+        backend: str = "process",
+        shared_memory: bool = False,
+    ):
+        """
+        Args:
+            check_valence: if False, will not do any valence check.
+            sort_molecules: whether to sort the compounds after canonicalization.
+            invalid_placeholder: output for the invalid SMILES. By default,
+                the exception is raised.
+            n_jobs: number of workers. With 1, everything is done in the
+                current process.
+            chunk_size: number of lines sent to a worker process at once.
+            progress_interval: minimal number of seconds between progress
+                messages.
+            timeout: maximal number of seconds for one line, see
+                BatchProcessor. By default, no limit.
+            backend: "process" or "thread", see the executors module.
+            shared_memory: whether the worker processes send the results
+                through shared memory, see BatchProcessor.
+        """
+        super().__init__(
+            init_kwargs=dict(
+                check_valence=check_valence, sort_molecules=sort_molecules
+            ),
+            invalid_placeholder=invalid_placeholder,
+            n_jobs=n_jobs,
+            chunk_size=chunk_size,
+            progress_interval=progress_interval,
+            timeout=timeout,
+            backend=backend,
+            shared_memory=shared_memory,
+        )
+        self.check_valence = check_valence
+        self.sort_molecules = sort_molecules
+
+    def process(self, record: str) -> str:
+        return self.canonicalize(record)
+
+    def canonicalize(self, smiles: str) -> str:
+        """Canonicalize one SMILES string, raising an exception if invalid."""
+        return canonicalize_any(
+            smiles, check_valence=self.check_valence, sort_molecules=self.sort_molecules
+        )
+
+    def canonicalize_lines(self, lines: Iterable[str]) -> Iterator[str]:
+        """
+        Canonicalize SMILES strings, one per line (without line break).
+
+        Raises:
+            Exception: for the first invalid SMILES, if there is no invalid
+                placeholder. The same exception as for the sequential
+                canonicalization.
+        """
+        return self.process_lines(lines)
@@ -0,0 +1,428 @@
+"""
+Processing of large numbers of records (one per line), possibly in parallel.
+"""
+
+import codecs
+import json
+import logging
+import os
+import sys
+from abc import ABC, abstractmethod
+from collections import deque
+from contextlib import ExitStack
+from functools import partial
+from pathlib import Path
+from time import perf_counter
+from typing import (
+    Any,
+    BinaryIO,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    TextIO,
+    Tuple,
+    Type,
+    Union,
+)
+
+import attr
+from attr import define
+from rxn.utilities.containers import chunker
+
+from .executors import ProcessExecutor, SerialExecutor, create_executor
+from .profiling import initialize_worker_profiling, is_profiling_enabled
+from .watchdog_pool import ABORT_CRASH, ABORT_TIMEOUT, AbortedItem, WatchdogPool
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+@define
+class ProcessingFailure:
+    """
+    Record that could not be processed.
+
+    Attributes:
+        line_number: line number of the record (1-based).
+        input: the record.
+        error_type: class name of the exception.
+        message: message of the exception.
+    """
+
+    line_number: int
+    input: str
+    error_type: str
+    message: str
+
+    def to_json(self) -> str:
+        return json.dumps(attr.asdict(self))
+
+
+@define
+class _ChunkResult:
+    """Processed records for a chunk of lines, and the failures.
+
+    The results may be SharedStrings, valid until the next chunk is requested."""
+
+    results: Sequence[str]
+    failures: List[ProcessingFailure]
+
+
+class BatchProcessor(ABC):
+    """
+    Base class for processing records one per line, in chunks that are
+    distributed over several processes.
+
+    The output is identical for any number of processes: the lines are
+    returned in the original order, and without invalid placeholder, the
+    exception of the first invalid record is raised after returning all
+    the lines before it.
+
+    With a timeout, the records are processed on worker processes that are
+    restarted when a record exceeds the time budget or crashes them (see
+    WatchdogPool); such records are handled as invalid ones.
+
+    The results of the worker processes can be sent back through shared
+    memory instead of being pickled (see the shared_memory_transport module).
+
+    Subclasses implement ``process``, and give the arguments to instantiate
+    the same processor in the workers as ``init_kwargs``.
+    """
+
+    # Verb for the progress messages
+    progress_verb = "Processed"
+
+    def __init__(
+        self,
+        init_kwargs: Dict[str, Any],
+        invalid_placeholder: Optional[str] = None,
+        n_jobs: int = 1,
+        chunk_size: int = 1000,
+        progress_interval: float = 10.0,
+        timeout: Optional[float] = None,
+        backend: str = "process",
+        shared_memory: bool = False,
+    ):
+        """
+        Args:
+            init_kwargs: arguments of the subclass for instantiating the same
+                processor in the workers.
+            invalid_placeholder: output for the invalid records. By default,
+                the exception is raised.
+            n_jobs: number of workers. With 1, everything is done in the
+                current process (unless there is a timeout).
+            chunk_size: number of lines sent to a worker process at once.
+            progress_interval: minimal number of seconds between progress
+                messages.
+            timeout: maximal number of seconds for processing one record.
+                By default, no limit.
+            backend: "process" or "thread", see the executors module.
+                Irrelevant with a timeout, which requires processes.
+            shared_memory: whether the worker processes send the results
+                through shared memory instead of pickling them. Requires
+                Python 3.8 or later, and results without line breaks.
+                Irrelevant without worker processes, or with a timeout.
+        """
+        if shared_memory and sys.version_info < (3, 8):
+            raise ValueError("Transport through shared memory requires Python 3.8.")
+        self._init_kwargs = dict(init_kwargs, invalid_placeholder=invalid_placeholder)
+        self.invalid_placeholder = invalid_placeholder
+        self.n_jobs = n_jobs
+        self.chunk_size = chunk_size
+        self.progress_interval = progress_interval
+        self.timeout = timeout
+        self.backend = backend
+        self.shared_memory = shared_memory
+
+        self.total_lines = 0
+        self.failed_lines = 0
+        # Where to send the failures, f.i. for writing them to a file
+        self.failure_sink: Optional[Callable[[ProcessingFailure], None]] = None
+
+    @abstractmethod
+    def process(self, record: str) -> str:
+        """Process one record, raising an exception if invalid."""
+
+    def process_lines(self, lines: Iterable[str]) -> Iterator[str]:
+        """
+        Process records, one per line (without line break).
+
+        Raises:
+            Exception: for the first invalid record, if there is no invalid
+                placeholder. The same exception as for the sequential
+                processing.
+        """
+        for results in self._iterate_results(lines):
+            yield from results
+
+    def process_stream(
+        self,
+        input_stream: TextIO,
+        output_stream: TextIO,
+        errors_file: Optional[Union[Path, str]] = None,
+    ) -> None:
+        """
+        Process the lines of a text stream (f.i. stdin) and write the results
+        to another one.
+
+        With shared memory, the results are written as bytes from the shared
+        memory blocks to UTF-8 streams, without decoding them.
+
+        Args:
+            input_stream: where to read the records from.
+            output_stream: where to write the results.
+            errors_file: where to write the failures (JSONL).
+        """
+        records = (line.strip() for line in input_stream)
+        binary_stream = (
+            _utf8_binary_stream(output_stream) if self.shared_memory else None
+        )
+        if binary_stream is not None:
+            # What was written before must come first
+            output_stream.flush()
+
+        with ExitStack() as stack:
+            if errors_file is not None:
+                f_errors = stack.enter_context(open(errors_file, "wt"))
+
+                def write_failure(failure: ProcessingFailure) -> None:
+                    f_errors.write(f"{failure.to_json()}\n")
+
+                self.failure_sink = write_failure
+
+            for results in self._iterate_results(records):
+                if binary_stream is None:
+                    output_stream.write("".join(f"{result}\n" for result in results))
+                else:
+                    _write_utf8_lines(binary_stream, results)
+
+    def _iterate_results(self, lines: Iterable[str]) -> Iterator[Sequence[str]]:
+        """Results of process_lines, by chunk (see _ChunkResult)."""
+        start_time = perf_counter()
+        last_progress = start_time
+        line_number = self.total_lines
+
+        for chunk_result in self._iterate_chunk_results(lines):
+            results = chunk_result.results
+            for failure in chunk_result.failures:
+                self.failed_lines += 1
+                if self.failure_sink is not None:
+                    self.failure_sink(failure)
+                if self.invalid_placeholder is None:
+                    n_valid = failure.line_number - line_number - 1
+                    self.total_lines += n_valid + 1
+                    yield results[:n_valid]
+                    self._raise_failure(failure)
+
+            line_number += len(results)
+            self.total_lines += len(results)
+            yield results
+
+            now = perf_counter()
+            if now - last_progress >= self.progress_interval:
+                last_progress = now
+                self._log_progress(now - start_time)
+
+        self._log_progress(perf_counter() - start_time, finished=True)
+
+    def _process_chunk(self, chunk: Tuple[int, List[str]]) -> _ChunkResult:
+        first_line_number, lines = chunk
+        results: List[str] = []
+        failures: List[ProcessingFailure] = []
+        for line_number, record in enumerate(lines, first_line_number):
+            try:
+                results.append(self.process(record))
+            except Exception as e:
+                failures.append(
+                    ProcessingFailure(
+                        line_number=line_number,
+                        input=record,
+                        error_type=type(e).__name__,
+                        message=str(e),
+                    )
+                )
+                if self.invalid_placeholder is None:
+                    # Fatal error, the rest of the chunk is not needed
+                    break
+                results.append(self.invalid_placeholder)
+        return _ChunkResult(results=results, failures=failures)
+
+    def _iterate_chunk_results(self, lines: Iterable[str]) -> Iterator[_ChunkResult]:
+        chunks = _enumerate_chunks(
+            lines, self.chunk_size, first_line_number=self.total_lines + 1
+        )
+
+        if self.timeout is not None:
+            yield from self._iterate_chunk_results_with_timeout(chunks, self.timeout)
+            return
+
+        executor = create_executor(self.backend, self.n_jobs)
+        if isinstance(executor, SerialExecutor):
+            # With this processor, instead of another instance
+            yield from (self._process_chunk(chunk) for chunk in chunks)
+            return
+
+        processor_class = type(self)
+        initializer = partial(processor_class, **self._init_kwargs)
+        if self.shared_memory and isinstance(executor, ProcessExecutor):
+            yield from _iterate_chunk_results_through_shared_memory(
+                executor, chunks, initializer
+            )
+            return
+
+        yield from executor.imap(
+            processor_class._process_chunk, chunks, initializer=initializer
+        )
+
+    def _iterate_chunk_results_with_timeout(
+        self, chunks: Iterable[Tuple[int, List[str]]], timeout: float
+    ) -> Iterator[_ChunkResult]:
+        pool = WatchdogPool(
+            _process_record_in_worker,
+            timeout=timeout,
+            n_jobs=self.n_jobs,
+            initializer=_initialize_worker_processor,
+            initargs=(type(self), self._init_kwargs, is_profiling_enabled()),
+        )
+        # Chunks sent to the pool, for matching them with the outcomes
+        submitted: Deque[List[Tuple[int, str]]] = deque()
+
+        def numbered_chunks() -> Iterator[List[Tuple[int, str]]]:
+            for first_line_number, lines in chunks:
+                submitted.append(list(enumerate(lines, first_line_number)))
+                yield submitted[-1]
+
+        for outcomes in pool.imap_chunks(numbered_chunks()):
+            numbered_chunk = submitted.popleft()
+            results: List[str] = []
+            failures: List[ProcessingFailure] = []
+            for (line_number, record), outcome in zip(numbered_chunk, outcomes):
+                if isinstance(outcome, AbortedItem):
+                    outcome = self._aborted_result(line_number, record, outcome)
+                results.extend(outcome.results)
+                failures.extend(outcome.failures)
+                if outcome.failures and self.invalid_placeholder is None:
+                    break
+            yield _ChunkResult(results=results, failures=failures)
+
+    def _aborted_result(
+        self, line_number: int, record: str, aborted: AbortedItem
+    ) -> _ChunkResult:
+        if aborted.reason == ABORT_TIMEOUT:
+            message = f"Processing took more than {self.timeout} seconds."
+        else:
+            message = "The worker process crashed."
+        failure = ProcessingFailure(
+            line_number=line_number,
+            input=record,
+            error_type=aborted.reason,
+            message=message,
+        )
+        results = [] if self.invalid_placeholder is None else [self.invalid_placeholder]
+        return _ChunkResult(results=results, failures=[failure])
+
+    def _raise_failure(self, failure: ProcessingFailure) -> None:
+        # Process again in this process, to raise the original exception
+        # (except if it may take forever or crash)
+        if failure.error_type not in (ABORT_TIMEOUT, ABORT_CRASH):
+            self.process(failure.input)
+        raise RuntimeError(
+            f"Cannot process line {failure.line_number}: {failure.message}"
+        )
+
+    def _log_progress(self, seconds: float, finished: bool = False) -> None:
+        rate = self.total_lines / seconds if seconds > 0 else 0.0
+        failure_rate = self.failed_lines / self.total_lines if self.total_lines else 0.0
+        status = "finished" if finished else "in progress"
+        logger.info(
+            f"{self.progress_verb} {self.total_lines} lines ({status}, "
+            f"{rate:.0f} lines/s), {self.failed_lines} failures ({failure_rate:.2%})."
+        )
+
+
+def _enumerate_chunks(
+    lines: Iterable[str], chunk_size: int, first_line_number: int
+) -> Iterator[Tuple[int, List[str]]]:
+    """Chunks of lines, with the line number of their first element."""
+    line_number = first_line_number
+    for chunk in chunker(lines, chunk_size=chunk_size):
+        yield line_number, chunk
+        line_number += len(chunk)
+
+
+def _process_chunk_to_shared_memory(
+    processor: BatchProcessor, chunk: Tuple[int, List[str]]
+) -> Tuple[Any, List[ProcessingFailure]]:
+    """Process a chunk in a worker process, and write the results to shared
+    memory. Returns the SharedStringsHandle, and the failures."""
+    from .shared_memory_transport import share_strings
+
+    chunk_result = processor._process_chunk(chunk)
+    return share_strings(chunk_result.results), chunk_result.failures
+
+
+def _iterate_chunk_results_through_shared_memory(
+    executor: ProcessExecutor,
+    chunks: Iterable[Tuple[int, List[str]]],
+    initializer: Callable[[], BatchProcessor],
+) -> Iterator[_ChunkResult]:
+    # Not imported at the top: multiprocessing.shared_memory requires Python 3.8
+    from .shared_memory_transport import SharedStrings, share_resource_tracker
+
+    share_resource_tracker(executor)
+    for handle, failures in executor.imap(
+        _process_chunk_to_shared_memory, chunks, initializer=initializer
+    ):
+        with SharedStrings(handle) as shared:
+            yield _ChunkResult(results=shared, failures=failures)
+
+
+def _utf8_binary_stream(stream: TextIO) -> Optional[BinaryIO]:
+    """Binary stream below a text stream, if the text can be written to it
+    as UTF-8 bytes directly (same encoding, no translation of line breaks)."""
+    buffer: Optional[BinaryIO] = getattr(stream, "buffer", None)
+    encoding: Optional[str] = getattr(stream, "encoding", None)
+    if buffer is None or encoding is None or os.linesep != "\n":
+        return None
+    try:
+        if codecs.lookup(encoding).name != "utf-8":
+            return None
+    except LookupError:
+        return None
+    return buffer
+
+
+def _write_utf8_lines(stream: BinaryIO, strings: Sequence[str]) -> None:
+    # Not imported at the top: multiprocessing.shared_memory requires Python 3.8
+    if sys.version_info >= (3, 8):
+        from .shared_memory_transport import SharedStrings
+
+        if isinstance(strings, SharedStrings):
+            with strings.lines() as lines:
+                stream.write(lines)
+            return
+    stream.write("".join(f"{string}\n" for string in strings).encode("utf-8"))
+
+
+# Processor instantiated in every worker process of the WatchdogPool
+_worker_processor: Optional[BatchProcessor] = None
+
+
+def _initialize_worker_processor(
+    processor_class: Type[BatchProcessor], init_kwargs: Dict[str, Any], profile: bool
+) -> None:
+    global _worker_processor
+    initialize_worker_profiling(profile)
+    _worker_processor = processor_class(**init_kwargs)
+
+
+def _process_record_in_worker(numbered_record: Tuple[int, str]) -> _ChunkResult:
+    if _worker_processor is None:
+        raise RuntimeError("The worker processor was not initialized.")
+    line_number, record = numbered_record
+    return _worker_processor._process_chunk((line_number, [record]))
@@ -0,0 +1,20 @@
+from .runner import (
+    BenchmarkResult,
+    load_results,
+    run_benchmark,
+    run_iterator_benchmark,
+    save_results,
+)
+from .suite import BENCHMARKS, BenchmarkCorpus, build_corpus, run_suite
+
+__all__ = [
+    "BENCHMARKS",
+    "BenchmarkCorpus",
+    "BenchmarkResult",
+    "build_corpus",
+    "load_results",
+    "run_benchmark",
+    "run_iterator_benchmark",
+    "run_suite",
+    "save_results",
+]
@@ -0,0 +1,325 @@
+"""
+Seeded generators of synthetic corpora for the benchmarks.
+
+The generated compounds are built from templates that are valid SMILES by
+construction; the reactions are not chemically meaningful, but have the
+shape of typical USPTO / Reaxys records: a few decorated reactants, common
+reagents and solvents (including salts given as fragments), and one product.
+"""
+
+import random
+from pathlib import Path
+from typing import Dict, Iterator, List, Union
+
+from ..conversion import mol_to_mdl, smiles_to_mol
+from ..extended_reaction_smiles import to_extended_reaction_smiles
+from ..reaction_equation import ReactionEquation
+
+# Scaffolds with one attachment point, "{X}", and ring closure labels,
+# "{R}" and "{S}" (replaced by digits depending on the nesting depth)
+_SCAFFOLDS = [
+    "c{R}ccc({X})cc{R}",
+    "c{R}ccc({X})nc{R}",
+    "c{R}cc({X})ccc{R}F",
+    "c{R}ccc{S}c(c{R})cc({X})[nH]{S}",
+    "C{R}CCN({X})CC{R}",
+    "C{R}COCCN{R}{X}",
+    "NC(=O){X}",
+    "CC(C)({X})C",
+    "C(C(=O)O){X}",
+    "CC(=O)N({X})C",
+    "C{R}CC{R}{X}",
+    "c{R}csc({X})n{R}",
+]
+
+# Substituents, usable at any attachment point
+_SUBSTITUENTS = [
+    "C",
+    "CC",
+    "O",
+    "N",
+    "F",
+    "Cl",
+    "Br",
+    "OC",
+    "C#N",
+    "C(=O)O",
+    "C(=O)OC",
+    "C(F)(F)F",
+    "[N+](=O)[O-]",
+    "S(=O)(=O)C",
+    "N(C)C",
+    "[C@@H](C)O",
+    "/C=C/C",
+]
+
+# Common reagents, solvents and catalysts, with the salts as multiple fragments
+_AGENTS = [
+    "O",
+    "CO",
+    "CCO",
+    "ClCCl",
+    "C1CCOC1",
+    "CN(C)C=O",
+    "CS(C)=O",
+    "CC#N",
+    "CCOC(C)=O",
+    "c1ccccc1",
+    "CCN(CC)CC",
+    "[Na+].[OH-]",
+    "[K+].[K+].O=C([O-])[O-]",
+    "[Na+].[Cl-]",
+    "Cl",
+    "[H-].[Na+]",
+    "[Li]CCCC",
+    "[Pd]",
+    "[Pd].c1ccc(P(c2ccccc2)c2ccccc2)cc1",
+    "O=S(=O)(O)O",
+]
+
+_SYMBOLS = ["H2O", "MeOH", "EtOH", "DCM", "THF", "DMF", "DMSO", "MeCN", "EtOAc"]
+
+
+def _rng(seed: Union[int, random.Random]) -> random.Random:
+    if isinstance(seed, random.Random):
+        return seed
+    return random.Random(seed)
+
+
+def generate_compound_smiles(
+    seed: Union[int, random.Random], max_depth: int = 3
+) -> str:
+    """
+    Generate the SMILES of a (valid) compound, by decorating scaffolds recursively.
+
+    Args:
+        seed: random seed, or random number generator to use.
+        max_depth: maximal number of nested scaffolds.
+    """
+    rng = _rng(seed)
+    depth = rng.randint(1, max_depth)
+
+    smiles = rng.choice(_SUBSTITUENTS)
+    for level in range(depth):
+        smiles = (
+            rng.choice(_SCAFFOLDS)
+            .replace("{X}", smiles)
+            .replace("{R}", str(2 * level + 1))
+            .replace("{S}", str(2 * level + 2))
+        )
+    return smiles
+
+
+def generate_reaction(
+    seed: Union[int, random.Random],
+    max_reactants: int = 3,
+    max_agents: int = 4,
+    max_products: int = 1,
+) -> ReactionEquation:
+    """
+    Generate a USPTO-like reaction equation.
+
+    Args:
+        seed: random seed, or random number generator to use.
+        max_reactants: maximal number of reactants.
+        max_agents: maximal number of agents (reagents, solvents, catalysts).
+        max_products: maximal number of products.
+    """
+    rng = _rng(seed)
+    n_reactants = rng.randint(1, max_reactants)
+    n_agents = rng.randint(0, max_agents)
+    n_products = rng.randint(1, max_products)
+    return ReactionEquation(
+        reactants=[generate_compound_smiles(rng) for _ in range(n_reactants)],
+        agents=rng.sample(_AGENTS, n_agents),
+        products=[generate_compound_smiles(rng) for _ in range(n_products)],
+    )
+
+
+def generate_reaction_smiles(
+    n: int, seed: int = 42, fragment_bond: str = "~"
+) -> List[str]:
+    """
+    Generate USPTO-like reaction SMILES, with the fragments of the salts
+    joined by the fragment bond.
+
+    Args:
+        n: number of reactions to generate.
+        seed: random seed.
+        fragment_bond: fragment bond.
+    """
+    rng = random.Random(seed)
+    return [generate_reaction(rng).to_string(fragment_bond) for _ in range(n)]
+
+
+def generate_extended_reaction_smiles(n: int, seed: int = 42) -> List[str]:
+    """
+    Generate extended reaction SMILES, with the fragment information
+    (such as ``|f:3.4|``) for the salts.
+
+    Args:
+        n: number of reactions to generate.
+        seed: random seed.
+    """
+    rng = random.Random(seed)
+    return [to_extended_reaction_smiles(generate_reaction(rng)) for _ in range(n)]
+
+
+def generate_compounds(n: int, seed: int = 42) -> List[str]:
+    """
+    Generate compound SMILES.
+
+    Args:
+        n: number of compounds to generate.
+        seed: random seed.
+    """
+    rng = random.Random(seed)
+    return [generate_compound_smiles(rng) for _ in range(n)]
+
+
+def generate_rdf_file(
+    path: Union[Path, str],
+    n_reactions: int,
+    seed: int = 42,
+    n_properties: int = 10,
+    first_rireg: int = 1,
+) -> None:
+    """
+    Generate an RDF file in the format of the Reaxys / Thieme exports.
+
+    Every reaction contains its reactant and product MolBlocks, as well as
+    metadata: IDs, yield, temperature, solvents and catalysts (with their
+    MolBlocks and symbols), and additional properties.
+
+    Args:
+        path: where to write the RDF file.
+        n_reactions: number of reactions to generate.
+        seed: random seed.
+        n_properties: number of additional (variation-level) properties for
+            every reaction.
+        first_rireg: RIREG of the first reaction; the following ones are
+            incremented, with gaps.
+    """
+    rng = random.Random(seed)
+    with open(path, "wt", encoding="latin-1") as f:
+        f.write("$RDFILE 1\n")
+        f.write("$DATM 01-JAN-2024 00:00:00\n")
+        rireg = first_rireg
+        for _ in range(n_reactions):
+            for line in _iterate_rdf_record_lines(rng, rireg, n_properties):
+                f.write(line)
+                f.write("\n")
+            rireg += rng.randint(1, 3)
+
+
+def _iterate_rdf_record_lines(
+    rng: random.Random, rireg: int, n_properties: int
+) -> Iterator[str]:
+    reaction = generate_reaction(rng, max_agents=0)
+
+    yield f"$RFMT $RIREG {rireg}"
+    yield "$RXN"
+    yield ""
+    yield f"      SYNTH  {rng.randint(0, 10**10 - 1):010d}         0"
+    yield ""
+    yield f"{len(reaction.reactants):3d}{len(reaction.products):3d}"
+    for smiles in reaction.reactants + reaction.products:
+        yield "$MOL"
+        yield _molblock(smiles, rng)
+
+    yield from _datum("RXN:ID", f"RX{rireg:016d}")
+    yield from _datum("RXN:REACTANT(1):MOL_ID", str(rng.randint(1, 10**6)))
+    yield from _datum("RXN:PRODUCT(1):MOL_ID", str(rng.randint(1, 10**6)))
+
+    prefix = "RXN:VARIATION(1):"
+    yield from _datum(prefix + "PRODUCT(1):YIELD", str(rng.randint(1, 99)))
+    yield from _datum(prefix + "STEP(1):CONDITIONS(1):TEMP", str(rng.randint(-78, 150)))
+
+    n_solvents = rng.randint(0, 2)
+    for index, solvent in enumerate(rng.sample(_AGENTS[:10], n_solvents), 1):
+        compound_prefix = f"{prefix}STEP(1):SOLVENT({index}):MOL(1):"
+        yield from _datum(
+            compound_prefix + "MOLSTRUCTURE", "$MFMT\n" + _molblock(solvent, rng)
+        )
+        yield from _datum(compound_prefix + "SYMBOL(1):SYMBOL", rng.choice(_SYMBOLS))
+
+    if rng.random() < 0.5:
+        catalyst = rng.choice(_AGENTS[10:])
+        compound_prefix = f"{prefix}STEP(1):CATALYST(1):MOL(1):"
+        yield from _datum(
+            compound_prefix + "MOLSTRUCTURE", "$MFMT\n" + _molblock(catalyst, rng)
+        )
+        yield from _datum(compound_prefix + "MOL_CAPTION", "catalyst")
+
+    for index in range(1, n_properties + 1):
+        value = "comment line\n" * rng.randint(0, 2) + f"value {rng.random():.6f}"
+        yield from _datum(f"{prefix}PROPERTY({index}):TEXT", value)
+
+
+def generate_reaction_metadata(
+    n: int, seed: int = 42, max_variations: int = 5
+) -> List[Dict[str, str]]:
+    """
+    Generate the metadata of RDF reactions, with the size and key structure
+    of the Reaxys exports: a few hundred keys per reaction, nested in
+    variations, steps, conditions, compounds and citations.
+
+    The MolBlocks are replaced by placeholders, as this is meant for
+    benchmarking the parsing of the properties.
+
+    Args:
+        n: number of reactions.
+        seed: random seed.
+        max_variations: maximal number of variations per reaction.
+    """
+    rng = random.Random(seed)
+    return [_reaction_metadata(rng, max_variations) for _ in range(n)]
+
+
+def _reaction_metadata(rng: random.Random, max_variations: int) -> Dict[str, str]:
+    meta = {"RXN:ID": f"RX{rng.randint(1, 10**9):016d}"}
+    for index in range(1, rng.randint(1, 3) + 1):
+        meta[f"RXN:REACTANT({index}):MOL_ID"] = str(rng.randint(1, 10**6))
+    meta["RXN:PRODUCT(1):MOL_ID"] = str(rng.randint(1, 10**6))
+
+    for variation in range(1, rng.randint(1, max_variations) + 1):
+        prefix = f"RXN:VARIATION({variation}):"
+        meta[prefix + "VARIATION_ID"] = str(variation)
+        meta[prefix + "PRODUCT(1):YIELD"] = str(rng.randint(1, 99))
+        meta[prefix + "PRODUCT(1):YIELD_TYPE"] = "isolated"
+
+        for step in range(1, rng.randint(1, 3) + 1):
+            step_prefix = f"{prefix}STEP({step}):"
+            meta[step_prefix + "STAGES"] = str(rng.randint(1, 3))
+            for condition in range(1, rng.randint(1, 4) + 1):
+                condition_prefix = f"{step_prefix}CONDITIONS({condition}):"
+                meta[condition_prefix + "TEMP"] = str(rng.randint(-78, 150))
+                meta[condition_prefix + "TIME"] = str(rng.randint(1, 48))
+                meta[condition_prefix + "PRESSURE"] = str(rng.randint(700, 800))
+                meta[condition_prefix + "ATMOSPHERE"] = "inert"
+            for category in ("SOLVENT", "CATALYST", "REAGENT"):
+                for index in range(1, rng.randint(0, 3) + 1):
+                    compound_prefix = f"{step_prefix}{category}({index}):MOL(1):"
+                    meta[compound_prefix + "MOLSTRUCTURE"] = "$MFMT"
+                    meta[compound_prefix + "SYMBOL(1):SYMBOL"] = rng.choice(_SYMBOLS)
+                    meta[compound_prefix + "MOL_CAPTION"] = category.lower()
+
+        for citation in range(1, rng.randint(1, 3) + 1):
+            citation_prefix = f"{prefix}CITATION({citation}):"
+            for field in ("AUTHOR", "TITLE", "JOURNAL", "YEAR", "VOLUME", "PAGES"):
+                meta[citation_prefix + field] = f"{field.lower()} {rng.random():.6f}"
+    return meta
+
+
+def _datum(dtype: str, value: str) -> Iterator[str]:
+    yield f"$DTYPE {dtype}"
+    yield f"$DATUM {value}"
+
+
+def _molblock(smiles: str, rng: random.Random) -> str:
+    """MolBlock for a SMILES, with a header line containing a (random) timestamp,
+    as in the vendor files; the trailing newline is removed."""
+    mol_lines = mol_to_mdl(smiles_to_mol(smiles)).rstrip("\n").split("\n")
+    # Header line: user initials, program name, date and time, dimensional code
+    mol_lines[1] = f"  -SYNTH- {rng.randint(0, 10**10 - 1):010d}2D"
+    return "\n".join(mol_lines)
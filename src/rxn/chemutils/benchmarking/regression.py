@@ -0,0 +1,275 @@
+"""
+Regression gate for the throughput of the main entry points of the package.
+
+The entry points are timed on a fixed, seeded synthetic workload, several
+times, and the best throughput of the repetitions is compared to the one
+stored in a baseline file.
+"""
+
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+from attr import define
+from rxn.utilities.files import PathLike, dump_list_to_file, load_list_from_file
+
+from ..miscellaneous import canonicalize_file
+from ..rdf import convert_rdf_to_smiles
+from ..reaction_combiner import ReactionCombiner
+from ..reaction_smiles import parse_any_reaction_smiles
+from ..tokenization import tokenize_file
+from .generators import generate_rdf_file, generate_reaction_smiles
+from .runner import (
+    BenchmarkResult,
+    environment_metadata,
+    save_results,
+    summarize_latencies,
+)
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+@define
+class RegressionWorkload:
+    """
+    Files on which the entry points are timed.
+
+    Attributes:
+        directory: directory containing the files.
+        size: number of reactions.
+        seed: seed used for the generation.
+    """
+
+    directory: Path
+    size: int
+    seed: int
+
+    @property
+    def smiles_file(self) -> Path:
+        return self.directory / "reactions.smi"
+
+    @property
+    def precursors_file(self) -> Path:
+        return self.directory / "precursors.smi"
+
+    @property
+    def products_file(self) -> Path:
+        return self.directory / "products.smi"
+
+    @property
+    def rdf_file(self) -> Path:
+        return self.directory / "reactions.rdf"
+
+    def output_file(self, name: str) -> Path:
+        return self.directory / f"{name}.out"
+
+    def to_dict(self) -> Dict[str, int]:
+        return {"size": self.size, "seed": self.seed}
+
+
+def build_regression_workload(
+    directory: Path, size: int = 2000, seed: int = 42
+) -> RegressionWorkload:
+    """
+    Generate the files for the regression workload.
+
+    Args:
+        directory: where to write the files.
+        size: number of reactions.
+        seed: random seed.
+    """
+    workload = RegressionWorkload(directory=directory, size=size, seed=seed)
+
+    reaction_smiles = generate_reaction_smiles(size, seed=seed)
+    dump_list_to_file(reaction_smiles, workload.smiles_file)
+
+    reactions = [parse_any_reaction_smiles(smiles) for smiles in reaction_smiles]
+    dump_list_to_file(
+        (".".join(r.reactants + r.agents) for r in reactions), workload.precursors_file
+    )
+    dump_list_to_file((".".join(r.products) for r in reactions), workload.products_file)
+
+    generate_rdf_file(workload.rdf_file, n_reactions=size, seed=seed)
+    return workload
+
+
+def _run_canonicalize_file(workload: RegressionWorkload) -> None:
+    canonicalize_file(workload.smiles_file, workload.output_file("canonicalize_file"))
+
+
+def _run_tokenize_file(workload: RegressionWorkload) -> None:
+    tokenize_file(workload.smiles_file, workload.output_file("tokenize_file"))
+
+
+def _run_rdf_to_smiles(workload: RegressionWorkload) -> None:
+    convert_rdf_to_smiles(workload.rdf_file, workload.output_file("rdf_to_smiles"))
+
+
+def _run_reaction_combiner(workload: RegressionWorkload) -> None:
+    combiner = ReactionCombiner(standardize=True)
+    precursors = load_list_from_file(workload.precursors_file)
+    products = load_list_from_file(workload.products_file)
+    dump_list_to_file(
+        combiner.combine(precursors, products),
+        workload.output_file("reaction_combiner"),
+    )
+
+
+ENTRY_POINTS: Dict[str, Callable[[RegressionWorkload], None]] = {
+    "canonicalize_file": _run_canonicalize_file,
+    "tokenize_file": _run_tokenize_file,
+    "rdf_to_smiles": _run_rdf_to_smiles,
+    "reaction_combiner": _run_reaction_combiner,
+}
+
+
+def measure_entry_points(
+    workload: RegressionWorkload, repeats: int = 5
+) -> List[BenchmarkResult]:
+    """
+    Time the entry points on the workload.
+
+    Each entry point is run ``repeats`` times; the reported throughput is
+    the best one, which is the least sensitive to noise from other processes.
+    The latencies are the per-item times of the individual repetitions.
+
+    Args:
+        workload: workload to run the entry points on.
+        repeats: number of repetitions.
+    """
+    if repeats < 1:
+        raise ValueError(f"At least one repetition needed, got {repeats}.")
+
+    results = []
+    for name, entry_point in ENTRY_POINTS.items():
+        run_seconds = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            entry_point(workload)
+            run_seconds.append(time.perf_counter() - start)
+
+        best_seconds = min(run_seconds)
+        throughputs = [workload.size / seconds for seconds in run_seconds]
+        logger.info(
+            f"{name}: {workload.size / best_seconds:.1f} items/s "
+            f"(best of {repeats})."
+        )
+        results.append(
+            BenchmarkResult(
+                name=name,
+                n_items=workload.size,
+                total_seconds=best_seconds,
+                throughput=workload.size / best_seconds,
+                latencies=summarize_latencies(
+                    [seconds / workload.size for seconds in run_seconds]
+                ),
+                metadata={"repeats": repeats, "throughputs": throughputs},
+            )
+        )
+    return results
+
+
+@define
+class RegressionCheck:
+    """
+    Comparison of the throughput of an entry point to the baseline.
+
+    Attributes:
+        name: name of the entry point.
+        baseline_throughput: throughput in the baseline (items/s).
+        current_throughput: current throughput (items/s).
+        tolerance: allowed relative decrease of the throughput.
+    """
+
+    name: str
+    baseline_throughput: float
+    current_throughput: float
+    tolerance: float
+
+    @property
+    def relative_change(self) -> float:
+        return self.current_throughput / self.baseline_throughput - 1.0
+
+    @property
+    def passed(self) -> bool:
+        return self.relative_change >= -self.tolerance
+
+    def __str__(self) -> str:
+        status = "OK" if self.passed else "REGRESSION"
+        return (
+            f"{self.name:<20}{self.baseline_throughput:>12.1f}"
+            f"{self.current_throughput:>12.1f}{self.relative_change:>+10.1%}  {status}"
+        )
+
+
+def compare_to_baseline(
+    current: List[BenchmarkResult],
+    baseline: List[BenchmarkResult],
+    tolerance: float,
+) -> List[RegressionCheck]:
+    """
+    Compare the throughputs to the baseline ones.
+
+    Entry points missing in the baseline are ignored.
+
+    Args:
+        current: current results.
+        baseline: baseline results.
+        tolerance: allowed relative decrease of the throughput, f.i. 0.1 for 10%.
+    """
+    baseline_throughputs = {result.name: result.throughput for result in baseline}
+    checks = []
+    for result in current:
+        if result.name not in baseline_throughputs:
+            logger.warning(f'No baseline for "{result.name}", skipping it.')
+            continue
+        checks.append(
+            RegressionCheck(
+                name=result.name,
+                baseline_throughput=baseline_throughputs[result.name],
+                current_throughput=result.throughput,
+                tolerance=tolerance,
+            )
+        )
+    return checks
+
+
+def save_baseline(
+    results: List[BenchmarkResult], workload: RegressionWorkload, path: PathLike
+) -> None:
+    """Save the results as a baseline, together with the workload definition."""
+    metadata = environment_metadata()
+    metadata["workload"] = workload.to_dict()
+    save_results(results, path, metadata=metadata)
+
+
+def load_baseline(path: PathLike) -> Tuple[List[BenchmarkResult], Dict[str, int]]:
+    """
+    Load a baseline saved with ``save_baseline``.
+
+    Returns:
+        Tuple: the baseline results, and the workload definition (size and seed).
+    """
+    with open(path, "rt") as f:
+        content = json.load(f)
+    results = [BenchmarkResult.from_dict(d) for d in content["results"]]
+    return results, content["metadata"].get("workload", {})
+
+
+def check_same_workload(
+    baseline_workload: Dict[str, int], workload: RegressionWorkload
+) -> None:
+    """
+    Make sure that the baseline was measured on the same workload.
+
+    Raises:
+        ValueError: if the size or seed differ.
+    """
+    if baseline_workload != workload.to_dict():
+        raise ValueError(
+            f"The baseline was measured on a different workload "
+            f"({baseline_workload}) than the current one ({workload.to_dict()})."
+        )
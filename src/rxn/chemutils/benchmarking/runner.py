@@ -0,0 +1,254 @@
+"""
+Measurement of the throughput, latency and memory usage of callables.
+"""
+
+import json
+import platform
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, TypeVar
+
+from attr import asdict, define, field
+from rxn.utilities.files import PathLike
+
+T = TypeVar("T")
+
+# Percentiles reported for the per-item latencies
+LATENCY_PERCENTILES = (50, 90, 99)
+
+
+@define
+class BenchmarkResult:
+    """
+    Result of one benchmark.
+
+    Attributes:
+        name: name of the benchmark.
+        n_items: number of items processed.
+        total_seconds: total time for processing the items.
+        throughput: number of items processed per second.
+        latencies: per-item latency percentiles, in seconds ("p50", "p90",
+            "p99", "max").
+        peak_memory_bytes: peak memory allocated by Python (as traced by
+            tracemalloc) when processing the items; the allocations in C++
+            extensions such as RDKit are not included. None if not measured.
+        metadata: additional information about the benchmark.
+    """
+
+    name: str
+    n_items: int
+    total_seconds: float
+    throughput: float
+    latencies: Dict[str, float]
+    peak_memory_bytes: Optional[int] = None
+    metadata: Dict[str, Any] = field(factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, result_dict: Dict[str, Any]) -> "BenchmarkResult":
+        return cls(**result_dict)
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """
+    Percentile of already sorted values (nearest-rank method).
+
+    Args:
+        sorted_values: values, sorted in increasing order.
+        q: percentile to compute, between 0 and 100.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = int(round(q / 100 * (len(sorted_values) - 1)))
+    return sorted_values[rank]
+
+
+def summarize_latencies(latencies: List[float]) -> Dict[str, float]:
+    """Compute the latency percentiles reported in the benchmark results."""
+    sorted_latencies = sorted(latencies)
+    summary = {f"p{q}": percentile(sorted_latencies, q) for q in LATENCY_PERCENTILES}
+    summary["max"] = sorted_latencies[-1] if sorted_latencies else 0.0
+    return summary
+
+
+def run_benchmark(
+    name: str,
+    fn: Callable[[T], Any],
+    items: Sequence[T],
+    measure_memory: bool = True,
+    metadata: Optional[Dict[str, Any]] = None,
+) -> BenchmarkResult:
+    """
+    Benchmark a function by calling it on every item.
+
+    The timing and the memory measurement are done in separate passes, as
+    tracing the memory allocations slows the execution down considerably.
+
+    Args:
+        name: name of the benchmark.
+        fn: function to benchmark.
+        items: items to call the function on.
+        measure_memory: whether to measure the peak memory.
+        metadata: additional information to store in the result.
+    """
+    latencies = []
+    perf_counter = time.perf_counter
+    start = perf_counter()
+    for item in items:
+        item_start = perf_counter()
+        fn(item)
+        latencies.append(perf_counter() - item_start)
+    total_seconds = perf_counter() - start
+
+    peak_memory = None
+    if measure_memory:
+        peak_memory = _peak_memory(lambda: [fn(item) for item in items])
+
+    return _to_result(name, latencies, total_seconds, peak_memory, metadata)
+
+
+def run_iterator_benchmark(
+    name: str,
+    make_iterable: Callable[[], Iterable[Any]],
+    measure_memory: bool = True,
+    metadata: Optional[Dict[str, Any]] = None,
+) -> BenchmarkResult:
+    """
+    Benchmark the consumption of an iterable, such as a file parser.
+
+    The latency of an item is the time between two consecutive items.
+
+    Args:
+        name: name of the benchmark.
+        make_iterable: function creating the iterable to consume; it is
+            called once per measurement pass.
+        measure_memory: whether to measure the peak memory.
+        metadata: additional information to store in the result.
+    """
+    latencies = []
+    perf_counter = time.perf_counter
+    start = perf_counter()
+    item_start = start
+    for _ in make_iterable():
+        now = perf_counter()
+        latencies.append(now - item_start)
+        item_start = now
+    total_seconds = perf_counter() - start
+
+    peak_memory = None
+    if measure_memory:
+        peak_memory = _peak_memory(lambda: [_ for _ in make_iterable()])
+
+    return _to_result(name, latencies, total_seconds, peak_memory, metadata)
+
+
+def _peak_memory(fn: Callable[[], Any]) -> int:
+    """Peak memory traced by tracemalloc during the execution of a function.
+
+    The results of the function are kept until the end, as the user of
+    a benchmarked function would typically keep them too."""
+    already_tracing = tracemalloc.is_tracing()
+    if not already_tracing:
+        tracemalloc.start()
+    if hasattr(tracemalloc, "reset_peak"):
+        # Python >= 3.9; before that, the peak is only fresh if not already tracing
+        tracemalloc.reset_peak()
+    baseline, _ = tracemalloc.get_traced_memory()
+    try:
+        _ = fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        if not already_tracing:
+            tracemalloc.stop()
+    return max(peak - baseline, 0)
+
+
+def _to_result(
+    name: str,
+    latencies: List[float],
+    total_seconds: float,
+    peak_memory: Optional[int],
+    metadata: Optional[Dict[str, Any]],
+) -> BenchmarkResult:
+    n_items = len(latencies)
+    return BenchmarkResult(
+        name=name,
+        n_items=n_items,
+        total_seconds=total_seconds,
+        throughput=n_items / total_seconds if total_seconds > 0 else 0.0,
+        latencies=summarize_latencies(latencies),
+        peak_memory_bytes=peak_memory,
+        metadata=dict(metadata) if metadata is not None else {},
+    )
+
+
+def environment_metadata() -> Dict[str, Any]:
+    """Information about the environment, to store along with the results."""
+    from rdkit import rdBase
+
+    from .. import __version__
+
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "rdkit": rdBase.rdkitVersion,
+        "rxn-chem-utils": __version__,
+    }
+
+
+def save_results(
+    results: Iterable[BenchmarkResult],
+    path: PathLike,
+    metadata: Optional[Dict[str, Any]] = None,
+) -> None:
+    """
+    Save benchmark results to a JSON file.
+
+    Args:
+        results: benchmark results to save.
+        path: where to save the results.
+        metadata: information about the run; by default, information about
+            the environment.
+    """
+    if metadata is None:
+        metadata = environment_metadata()
+    content = {
+        "metadata": metadata,
+        "results": [result.to_dict() for result in results],
+    }
+    with open(path, "wt") as f:
+        json.dump(content, f, indent=2)
+
+
+def load_results(path: PathLike) -> List[BenchmarkResult]:
+    """Load benchmark results saved with ``save_results``."""
+    with open(path, "rt") as f:
+        content = json.load(f)
+    return [BenchmarkResult.from_dict(d) for d in content["results"]]
+
+
+def format_results(results: Iterable[BenchmarkResult]) -> str:
+    """Format benchmark results as a table."""
+    header = (
+        f"{'benchmark':<32}{'items':>8}{'items/s':>12}{'p50 (ms)':>10}"
+        f"{'p90 (ms)':>10}{'p99 (ms)':>10}{'peak (MB)':>11}"
+    )
+    lines = [header, "-" * len(header)]
+    for r in results:
+        memory = (
+            f"{r.peak_memory_bytes / 1e6:>11.2f}"
+            if r.peak_memory_bytes is not None
+            else f"{'-':>11}"
+        )
+        lines.append(
+            f"{r.name:<32}{r.n_items:>8}{r.throughput:>12.1f}"
+            f"{r.latencies['p50'] * 1e3:>10.3f}{r.latencies['p90'] * 1e3:>10.3f}"
+            f"{r.latencies['p99'] * 1e3:>10.3f}{memory}"
+        )
+    return "\n".join(lines)
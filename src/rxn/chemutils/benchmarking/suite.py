@@ -0,0 +1,284 @@
+"""
+Benchmarks of the public hot paths of the package, on synthetic corpora.
+"""
+
+import logging
+import random
+import sys
+from multiprocessing import Pool
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from attr import define
+from rxn.utilities.containers import chunker
+
+from ..executors import ProcessExecutor
+from ..extended_reaction_smiles import parse_extended_reaction_smiles
+from ..miscellaneous import canonicalize_any
+from ..rdf import RdfParser, ReactionSmilesExtractor
+from ..rdf.property_parser import parse_properties, parse_properties_trie
+from ..smiles_augmenter import SmilesAugmenter
+from ..smiles_randomization import randomize_smiles_rotated
+from ..tokenization import to_tokens
+from .generators import (
+    generate_extended_reaction_smiles,
+    generate_rdf_file,
+    generate_reaction_metadata,
+    generate_reaction_smiles,
+)
+from .runner import BenchmarkResult, run_benchmark, run_iterator_benchmark
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+# Number of processes and chunk size for the benchmarks of the result transports
+TRANSPORT_N_JOBS = 2
+TRANSPORT_CHUNK_SIZE = 100
+
+
+@define
+class BenchmarkCorpus:
+    """
+    Synthetic data on which the benchmarks are run.
+
+    Attributes:
+        reaction_smiles: USPTO-like reaction SMILES, with tildes for fragments.
+        extended_reaction_smiles: reaction SMILES with fragment information.
+        rdf_file: path to an RDF file.
+        reaction_metadata: metadata of RDF reactions, of the size of the
+            Reaxys exports.
+        seed: seed used for the generation.
+    """
+
+    reaction_smiles: List[str]
+    extended_reaction_smiles: List[str]
+    rdf_file: Path
+    reaction_metadata: List[Dict[str, str]]
+    seed: int
+
+
+def build_corpus(
+    directory: Path, size: int = 1000, rdf_size: Optional[int] = None, seed: int = 42
+) -> BenchmarkCorpus:
+    """
+    Generate the synthetic data for the benchmarks.
+
+    Args:
+        directory: where to write the generated files.
+        size: number of reaction SMILES to generate.
+        rdf_size: number of reactions in the RDF file. Defaults to ``size``.
+        seed: random seed.
+    """
+    if rdf_size is None:
+        rdf_size = size
+    rdf_file = directory / "benchmark.rdf"
+    generate_rdf_file(rdf_file, n_reactions=rdf_size, seed=seed)
+    return BenchmarkCorpus(
+        reaction_smiles=generate_reaction_smiles(size, seed=seed),
+        extended_reaction_smiles=generate_extended_reaction_smiles(size, seed=seed),
+        rdf_file=rdf_file,
+        reaction_metadata=generate_reaction_metadata(rdf_size, seed=seed),
+        seed=seed,
+    )
+
+
+def _benchmark_canonicalize_any(
+    corpus: BenchmarkCorpus, measure_memory: bool
+) -> BenchmarkResult:
+    return run_benchmark(
+        "canonicalize_any",
+        canonicalize_any,
+        corpus.reaction_smiles,
+        measure_memory=measure_memory,
+    )
+
+
+def _benchmark_to_tokens(
+    corpus: BenchmarkCorpus, measure_memory: bool
+) -> BenchmarkResult:
+    return run_benchmark(
+        "to_tokens", to_tokens, corpus.reaction_smiles, measure_memory=measure_memory
+    )
+
+
+def _benchmark_parse_extended_reaction_smiles(
+    corpus: BenchmarkCorpus, measure_memory: bool
+) -> BenchmarkResult:
+    return run_benchmark(
+        "parse_extended_reaction_smiles",
+        parse_extended_reaction_smiles,
+        corpus.extended_reaction_smiles,
+        measure_memory=measure_memory,
+    )
+
+
+def _benchmark_rdf_parser(
+    corpus: BenchmarkCorpus, measure_memory: bool
+) -> BenchmarkResult:
+    return run_iterator_benchmark(
+        "rdf_parser",
+        lambda: RdfParser(corpus.rdf_file).iter_reactions(),
+        measure_memory=measure_memory,
+        metadata={"file_size": corpus.rdf_file.stat().st_size},
+    )
+
+
+def _benchmark_rdf_parser_mmap(
+    corpus: BenchmarkCorpus, measure_memory: bool
+) -> BenchmarkResult:
+    return run_iterator_benchmark(
+        "rdf_parser_mmap",
+        lambda: RdfParser(corpus.rdf_file, use_mmap=True).iter_reactions(),
+        measure_memory=measure_memory,
+        metadata={"file_size": corpus.rdf_file.stat().st_size},
+    )
+
+
+def _benchmark_rdf_to_smiles(
+    corpus: BenchmarkCorpus, measure_memory: bool
+) -> BenchmarkResult:
+    extractor = ReactionSmilesExtractor(fragment_bond="~", sanitize=False)
+    return run_iterator_benchmark(
+        "rdf_to_smiles",
+        lambda: (
+            extractor.to_reaction_smiles(reaction)
+            for reaction in RdfParser(corpus.rdf_file)
+        ),
+        measure_memory=measure_memory,
+    )
+
+
+def _benchmark_parse_properties(
+    corpus: BenchmarkCorpus, measure_memory: bool
+) -> BenchmarkResult:
+    return run_benchmark(
+        "parse_properties",
+        parse_properties,
+        corpus.reaction_metadata,
+        measure_memory=measure_memory,
+    )
+
+
+def _benchmark_parse_properties_trie(
+    corpus: BenchmarkCorpus, measure_memory: bool
+) -> BenchmarkResult:
+    return run_benchmark(
+        "parse_properties_trie",
+        parse_properties_trie,
+        corpus.reaction_metadata,
+        measure_memory=measure_memory,
+    )
+
+
+def _benchmark_smiles_augmenter(
+    corpus: BenchmarkCorpus, measure_memory: bool
+) -> BenchmarkResult:
+    # The augmentation is random: seed it for reproducible workloads
+    random.seed(corpus.seed)
+    augmenter = SmilesAugmenter(randomize_smiles_rotated)
+    n_augmentations = 5
+    return run_benchmark(
+        "smiles_augmenter",
+        lambda smiles: augmenter.augment(smiles, n_augmentations),
+        corpus.reaction_smiles,
+        measure_memory=measure_memory,
+        metadata={"number_augmentations": n_augmentations},
+    )
+
+
+def _canonicalize_chunk(chunk: List[str]) -> List[str]:
+    return [canonicalize_any(smiles, fallback_value="") for smiles in chunk]
+
+
+def _canonicalize_chunk_of_worker(state: Any, chunk: List[str]) -> List[str]:
+    return _canonicalize_chunk(chunk)
+
+
+def _iterate_with_pool_imap(smiles: List[str]) -> Iterator[str]:
+    chunks = chunker(smiles, chunk_size=TRANSPORT_CHUNK_SIZE)
+    with Pool(TRANSPORT_N_JOBS) as pool:
+        for results in pool.imap(_canonicalize_chunk, chunks):
+            yield from results
+
+
+def _iterate_with_shared_memory(smiles: List[str]) -> Iterator[str]:
+    # Not imported at the top: multiprocessing.shared_memory requires Python 3.8
+    from ..shared_memory_transport import imap_shared_strings
+
+    chunks = chunker(smiles, chunk_size=TRANSPORT_CHUNK_SIZE)
+    executor = ProcessExecutor(TRANSPORT_N_JOBS)
+    for shared in imap_shared_strings(executor, _canonicalize_chunk_of_worker, chunks):
+        with shared:
+            yield from shared.to_list()
+
+
+def _benchmark_canonicalize_any_pool_imap(
+    corpus: BenchmarkCorpus, measure_memory: bool
+) -> BenchmarkResult:
+    return run_iterator_benchmark(
+        "canonicalize_any_pool_imap",
+        lambda: _iterate_with_pool_imap(corpus.reaction_smiles),
+        measure_memory=measure_memory,
+        metadata={"n_jobs": TRANSPORT_N_JOBS, "chunk_size": TRANSPORT_CHUNK_SIZE},
+    )
+
+
+def _benchmark_canonicalize_any_shared_memory(
+    corpus: BenchmarkCorpus, measure_memory: bool
+) -> BenchmarkResult:
+    return run_iterator_benchmark(
+        "canonicalize_any_shared_memory",
+        lambda: _iterate_with_shared_memory(corpus.reaction_smiles),
+        measure_memory=measure_memory,
+        metadata={"n_jobs": TRANSPORT_N_JOBS, "chunk_size": TRANSPORT_CHUNK_SIZE},
+    )
+
+
+BENCHMARKS: Dict[str, Callable[[BenchmarkCorpus, bool], BenchmarkResult]] = {
+    "canonicalize_any": _benchmark_canonicalize_any,
+    "to_tokens": _benchmark_to_tokens,
+    "parse_extended_reaction_smiles": _benchmark_parse_extended_reaction_smiles,
+    "rdf_parser": _benchmark_rdf_parser,
+    "rdf_parser_mmap": _benchmark_rdf_parser_mmap,
+    "rdf_to_smiles": _benchmark_rdf_to_smiles,
+    "parse_properties": _benchmark_parse_properties,
+    "parse_properties_trie": _benchmark_parse_properties_trie,
+    "smiles_augmenter": _benchmark_smiles_augmenter,
+    "canonicalize_any_pool_imap": _benchmark_canonicalize_any_pool_imap,
+}
+if sys.version_info >= (3, 8):
+    BENCHMARKS["canonicalize_any_shared_memory"] = (
+        _benchmark_canonicalize_any_shared_memory
+    )
+
+
+def run_suite(
+    corpus: BenchmarkCorpus,
+    names: Optional[Iterable[str]] = None,
+    measure_memory: bool = True,
+) -> List[BenchmarkResult]:
+    """
+    Run the benchmarks on a corpus.
+
+    Args:
+        corpus: data to run the benchmarks on.
+        names: names of the benchmarks to run. Defaults to all of them.
+        measure_memory: whether to measure the peak memory.
+
+    Raises:
+        ValueError: for unknown benchmark names.
+    """
+    if names is None:
+        names = list(BENCHMARKS)
+
+    results = []
+    for name in names:
+        try:
+            benchmark_fn = BENCHMARKS[name]
+        except KeyError as e:
+            raise ValueError(
+                f'Unknown benchmark "{name}". Available: {", ".join(BENCHMARKS)}.'
+            ) from e
+        logger.info(f'Running benchmark "{name}"...')
+        results.append(benchmark_fn(corpus, measure_memory))
+    return results
@@ -0,0 +1,428 @@
+"""
+Local daemon keeping RDKit loaded and a cache of canonical SMILES in memory,
+for workflows running many short jobs.
+
+The daemon listens on a Unix domain socket. Requests and responses are
+JSON objects, each sent as a frame: its length in bytes (4-byte unsigned
+big-endian integer) followed by its UTF-8 encoding.
+
+Requests have an "op" field:
+    - "canonicalize", with "smiles" (list of strings), and optionally
+      "check_valence" and "sort_molecules": the response has "results" and
+      "errors", with, for every SMILES, either the canonical SMILES or the
+      error ("<exception class>: <message>"), the other one being null.
+    - "ping": the response has the package "version".
+    - "stats": the response has the cache statistics.
+    - "shutdown": stops the daemon after responding.
+Invalid requests get a response with an "error" field.
+
+The client falls back to computing in the current process when no daemon
+is running:
+
+    client = CanonicalizationClient()
+    canonical = client.canonicalize_batch(["OCC", "C(C)O"])
+"""
+
+import json
+import logging
+import os
+import socket
+import socketserver
+import struct
+import tempfile
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from . import __version__
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+# Environment variable for the location of the socket
+SOCKET_ENV_VARIABLE = "RXN_CHEMUTILS_SOCKET"
+
+# Maximal size of a frame, to reject garbage before allocating memory for it
+MAX_FRAME_BYTES = 256 * 1024 * 1024
+
+_HEADER = struct.Struct(">I")
+
+# Canonical SMILES, or error message
+_Outcome = Tuple[Optional[str], Optional[str]]
+
+
+class ProtocolError(RuntimeError):
+    """Exception raised for malformed frames."""
+
+
+def default_socket_path() -> Path:
+    """
+    Location of the socket of the daemon: the RXN_CHEMUTILS_SOCKET
+    environment variable if set, or a user-specific file in the runtime
+    directory (or in the temporary directory).
+    """
+    from_env = os.environ.get(SOCKET_ENV_VARIABLE)
+    if from_env:
+        return Path(from_env)
+    directory = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    return Path(directory) / f"rxn-chemutils-{os.getuid()}.sock"
+
+
+def send_frame(sock: socket.socket, message: Any) -> None:
+    """Send a JSON-serializable message as one frame."""
+    data = json.dumps(message).encode("utf-8")
+    if len(data) > MAX_FRAME_BYTES:
+        raise ProtocolError(f"Frame of {len(data)} bytes exceeds the maximal size.")
+    sock.sendall(_HEADER.pack(len(data)) + data)
+
+
+def receive_frame(sock: socket.socket) -> Optional[Any]:
+    """
+    Receive one frame and decode its message.
+
+    Returns:
+        The message, or None if the connection was closed before a new frame.
+
+    Raises:
+        ProtocolError: for frames that are truncated, too large, or not JSON.
+    """
+    header = _receive_exactly(sock, _HEADER.size, allow_eof=True)
+    if header is None:
+        return None
+    (size,) = _HEADER.unpack(header)
+    if size > MAX_FRAME_BYTES:
+        raise ProtocolError(f"Frame of {size} bytes exceeds the maximal size.")
+    data = _receive_exactly(sock, size)
+    assert data is not None
+    try:
+        return json.loads(data.decode("utf-8"))
+    except ValueError as e:
+        raise ProtocolError(f"Invalid frame: {e}") from e
+
+
+def _receive_exactly(
+    sock: socket.socket, size: int, allow_eof: bool = False
+) -> Optional[bytes]:
+    buffer = bytearray()
+    while len(buffer) < size:
+        chunk = sock.recv(size - len(buffer))
+        if not chunk:
+            if allow_eof and not buffer:
+                return None
+            raise ProtocolError("Connection closed in the middle of a frame.")
+        buffer.extend(chunk)
+    return bytes(buffer)
+
+
+def _canonicalize_outcome(
+    smiles: str, check_valence: bool, sort_molecules: bool
+) -> _Outcome:
+    # Imported here, so that the client does not load RDKit when the daemon runs
+    from .miscellaneous import canonicalize_any
+
+    try:
+        return (
+            canonicalize_any(
+                smiles, check_valence=check_valence, sort_molecules=sort_molecules
+            ),
+            None,
+        )
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+
+class CanonicalizationDaemon:
+    """
+    Server canonicalizing batches of SMILES strings sent over a Unix socket,
+    with a cache of the results (including the failures).
+    """
+
+    def __init__(
+        self, socket_path: Optional[Union[Path, str]] = None, cache_size: int = 100000
+    ):
+        """
+        Args:
+            socket_path: where to create the socket. Defaults to
+                ``default_socket_path()``.
+            cache_size: maximal number of SMILES strings in the cache.
+        """
+        self.socket_path = Path(
+            default_socket_path() if socket_path is None else socket_path
+        )
+        self.cache_size = cache_size
+        self._canonicalize = lru_cache(maxsize=cache_size)(_canonicalize_outcome)
+        self._server: Optional[socketserver.ThreadingUnixStreamServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def handle_request(self, request: Any) -> Dict[str, Any]:
+        """Compute the response to a request."""
+        if not isinstance(request, dict):
+            return {"error": "The request must be a JSON object."}
+        op = request.get("op")
+
+        if op == "canonicalize":
+            smiles = request.get("smiles")
+            if not isinstance(smiles, list) or not all(
+                isinstance(s, str) for s in smiles
+            ):
+                return {"error": '"smiles" must be a list of strings.'}
+            check_valence = bool(request.get("check_valence", True))
+            sort_molecules = bool(request.get("sort_molecules", False))
+            outcomes = [
+                self._canonicalize(s, check_valence, sort_molecules) for s in smiles
+            ]
+            return {
+                "results": [result for result, _ in outcomes],
+                "errors": [error for _, error in outcomes],
+            }
+        if op == "ping":
+            return {"version": __version__}
+        if op == "stats":
+            cache_info = self._canonicalize.cache_info()
+            return {
+                "hits": cache_info.hits,
+                "misses": cache_info.misses,
+                "maxsize": cache_info.maxsize,
+                "currsize": cache_info.currsize,
+            }
+        if op == "shutdown":
+            # From another thread, as shutdown() waits for the serving loop.
+            # Not a daemon thread (as the handler), to remove the socket
+            # before the interpreter exits.
+            threading.Thread(target=self.shutdown, daemon=False).start()
+            return {}
+        return {"error": f"Unknown op: {op}"}
+
+    def serve_forever(self) -> None:
+        """Serve the requests until shut down."""
+        self._bind().serve_forever()
+
+    def start(self) -> None:
+        """Serve the requests from a background thread."""
+        server = self._bind()
+        self._thread = threading.Thread(target=server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def shutdown(self) -> None:
+        """Stop serving, and remove the socket."""
+        server, self._server = self._server, None
+        if server is None:
+            return
+        server.shutdown()
+        server.server_close()
+        try:
+            self.socket_path.unlink()
+        except FileNotFoundError:
+            pass
+        logger.info(f'Stopped the canonicalization daemon on "{self.socket_path}".')
+
+    def __enter__(self) -> "CanonicalizationDaemon":
+        self.start()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.shutdown()
+
+    def _bind(self) -> socketserver.ThreadingUnixStreamServer:
+        if self.socket_path.exists():
+            if _is_listening(self.socket_path):
+                raise RuntimeError(
+                    f'A daemon is already listening on "{self.socket_path}".'
+                )
+            # Left over by a daemon that did not shut down properly
+            self.socket_path.unlink()
+
+        server = _Server(str(self.socket_path), _RequestHandler)
+        server.canonicalization_daemon = self
+        # Only for the current user
+        os.chmod(self.socket_path, 0o600)
+        self._server = server
+        logger.info(f'Canonicalization daemon listening on "{self.socket_path}".')
+        return server
+
+
+class _Server(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+    canonicalization_daemon: CanonicalizationDaemon
+
+
+class _RequestHandler(socketserver.BaseRequestHandler):
+    """Handle the requests of one connection, until the client closes it."""
+
+    server: _Server
+
+    def handle(self) -> None:
+        while True:
+            try:
+                request = receive_frame(self.request)
+            except ProtocolError as e:
+                logger.warning(f"Closing connection: {e}")
+                return
+            if request is None:
+                return
+            daemon = self.server.canonicalization_daemon
+            send_frame(self.request, daemon.handle_request(request))
+
+
+def _is_listening(socket_path: Path) -> bool:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(str(socket_path))
+        except OSError:
+            return False
+    return True
+
+
+class CanonicalizationClient:
+    """
+    Client for the canonicalization daemon, canonicalizing in the current
+    process when no daemon is running, or when the connection is lost.
+
+    The results are the same in both cases.
+    """
+
+    def __init__(
+        self, socket_path: Optional[Union[Path, str]] = None, timeout: float = 60.0
+    ):
+        """
+        Args:
+            socket_path: socket of the daemon. Defaults to
+                ``default_socket_path()``.
+            timeout: maximal number of seconds to wait for a response.
+        """
+        self.socket_path = Path(
+            default_socket_path() if socket_path is None else socket_path
+        )
+        self.timeout = timeout
+        self._socket: Optional[socket.socket] = None
+
+    def canonicalize_batch(
+        self,
+        smiles: Sequence[str],
+        check_valence: bool = True,
+        sort_molecules: bool = False,
+        fallback_value: Optional[str] = None,
+    ) -> List[str]:
+        """
+        Canonicalize SMILES strings, as ``canonicalize_any``.
+
+        Args:
+            smiles: SMILES strings (molecules, sets of molecules, or reactions).
+            check_valence: if False, will not do any valence check.
+            sort_molecules: whether to sort the compounds.
+            fallback_value: result for the invalid SMILES. By default, the
+                exception of the first invalid SMILES is raised.
+        """
+        smiles = list(smiles)
+        outcomes = self._request_outcomes(smiles, check_valence, sort_molecules)
+        if outcomes is None:
+            outcomes = [
+                _canonicalize_outcome(s, check_valence, sort_molecules) for s in smiles
+            ]
+
+        results: List[str] = []
+        for s, (result, _) in zip(smiles, outcomes):
+            if result is None:
+                if fallback_value is None:
+                    # Canonicalize in this process, to raise the original exception
+                    from .miscellaneous import canonicalize_any
+
+                    canonicalize_any(
+                        s, check_valence=check_valence, sort_molecules=sort_molecules
+                    )
+                    raise RuntimeError(f'Cannot canonicalize "{s}".')
+                result = fallback_value
+            results.append(result)
+        return results
+
+    def daemon_is_available(self) -> bool:
+        """Whether the daemon is running and responding."""
+        return self._request({"op": "ping"}) is not None
+
+    def stats(self) -> Optional[Dict[str, Any]]:
+        """Cache statistics of the daemon, or None if it is not available."""
+        return self._request({"op": "stats"})
+
+    def shutdown_daemon(self) -> None:
+        """Ask the daemon to stop."""
+        self._request({"op": "shutdown"})
+        self.close()
+
+    def close(self) -> None:
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+    def __enter__(self) -> "CanonicalizationClient":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def _request_outcomes(
+        self, smiles: List[str], check_valence: bool, sort_molecules: bool
+    ) -> Optional[List[_Outcome]]:
+        response = self._request(
+            {
+                "op": "canonicalize",
+                "smiles": smiles,
+                "check_valence": check_valence,
+                "sort_molecules": sort_molecules,
+            }
+        )
+        if response is None:
+            return None
+        return list(zip(response["results"], response["errors"]))
+
+    def _request(self, request: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Send a request to the daemon; None if it is not available."""
+        try:
+            sock = self._connect()
+            send_frame(sock, request)
+            response = receive_frame(sock)
+        except (OSError, ProtocolError) as e:
+            logger.debug(f"Canonicalization daemon not available: {e}")
+            self.close()
+            return None
+
+        if response is None:
+            logger.debug("Connection closed by the canonicalization daemon.")
+            self.close()
+            return None
+        if "error" in response:
+            raise RuntimeError(f"Canonicalization daemon: {response['error']}")
+        result: Dict[str, Any] = response
+        return result
+
+    def _connect(self) -> socket.socket:
+        if self._socket is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(str(self.socket_path))
+            except OSError:
+                sock.close()
+                raise
+            self._socket = sock
+        return self._socket
+
+
+def canonicalize_batch(
+    smiles: Sequence[str],
+    check_valence: bool = True,
+    sort_molecules: bool = False,
+    fallback_value: Optional[str] = None,
+    socket_path: Optional[Union[Path, str]] = None,
+) -> List[str]:
+    """
+    Canonicalize SMILES strings with the daemon if it is running, or in the
+    current process otherwise. See ``CanonicalizationClient.canonicalize_batch``.
+    """
+    with CanonicalizationClient(socket_path) as client:
+        return client.canonicalize_batch(
+            smiles,
+            check_valence=check_valence,
+            sort_molecules=sort_molecules,
+            fallback_value=fallback_value,
+        )
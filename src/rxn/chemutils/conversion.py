@@ -20,10 +20,12 @@ from rdkit.Chem.rdmolfiles import (
 )
 
 from .exceptions import InvalidInchi, InvalidMdl, InvalidSmiles, SanitizationError
+from .profiling import profiled
 
 RDLogger.logger().setLevel(RDLogger.CRITICAL)  # type: ignore[no-untyped-call]
 
 
+@profiled()
 def smiles_to_mol(
     smiles: str, sanitize: bool = True, find_radicals: bool = True
 ) -> Mol:
@@ -91,6 +93,7 @@ def inchi_to_mol(inchi: str, sanitize: bool = True, removeHs: bool = True) -> Mo
     return mol
 
 
+@profiled()
 def mol_to_smiles(mol: Mol, canonical: bool = True, isomericSmiles: bool = True) -> str:
     """
     Convert an RDKit Mol to a SMILES string.
@@ -100,6 +103,7 @@ def mol_to_smiles(mol: Mol, canonical: bool = True, isomericSmiles: bool = True)
     return MolToSmiles(mol, canonical=canonical, isomericSmiles=isomericSmiles)
 
 
+@profiled()
 def mdl_to_mol(mdl: str, sanitize: bool = True) -> Mol:
     """
     Convert an MDL Mol string to an RDKit Mol.
@@ -133,6 +137,7 @@ def mol_to_mdl(mol: Mol) -> str:
     return MolToMolBlock(mol)
 
 
+@profiled()
 def sanitize_mol(
     mol: Mol,
     *,
@@ -204,6 +209,7 @@ def mdl_to_smiles(
     return mol_to_smiles(mol, canonical=canonicalize)
 
 
+@profiled()
 def remove_hydrogens(mol: Mol) -> Mol:
     """
     Remove unnecessary hydrogens in a molecule.
@@ -216,6 +222,7 @@ def remove_hydrogens(mol: Mol) -> Mol:
     return RemoveHs(mol, sanitize=False)
 
 
+@profiled()
 def canonicalize_smiles(smiles: str, check_valence: bool = True) -> str:
     """
     Canonicalize a SMILES string for a molecule.
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Any, Optional, Tuple
 
 from rdkit.Chem.rdchem import Mol
 from rdkit.Chem.rdmolfiles import MolToSmiles
@@ -11,6 +11,11 @@ class InvalidSmiles(ValueError):
         super().__init__(msg)
         self.smiles = smiles
 
+    def __reduce__(self) -> Tuple[Any, ...]:
+        # For the exceptions to be identical after pickling (f.i. from worker
+        # processes); same for the other exceptions with custom arguments.
+        return type(self), (self.smiles, str(self))
+
 
 class InvalidInchi(ValueError):
     """
@@ -21,6 +26,9 @@ class InvalidInchi(ValueError):
         super().__init__(f"The following InChI string cannot be converted: {inchi}")
         self.inchi = inchi
 
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return type(self), (self.inchi,)
+
 
 class InvalidReactionSmiles(InvalidSmiles):
     def __init__(self, reaction_smiles: str, msg: Optional[str] = None):
@@ -38,6 +46,9 @@ class InvalidMdl(ValueError):
         super().__init__(f"The following MDL string cannot be converted: {mdl}")
         self.mdl = mdl
 
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return type(self), (self.mdl,)
+
 
 class SanitizationError(ValueError):
     def __init__(self, mol: Mol):
@@ -49,9 +60,24 @@ class SanitizationError(ValueError):
             pass
         super().__init__(message)
 
+    def __reduce__(self) -> Tuple[Any, ...]:
+        # The molecule is not kept, only the message
+        return _restore_exception, (type(self), str(self))
+
 
 class UnclearWhetherTokenized(ValueError):
     """Exception raised when unclear if something was tokenized or not."""
 
     def __init__(self, string: str):
         super().__init__(f'Cannot determine if "{string}" is tokenized.')
+        self.string = string
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return type(self), (self.string,)
+
+
+def _restore_exception(exception_class: Any, message: str) -> Exception:
+    """Instantiate an exception with its message, bypassing its constructor."""
+    exception: Exception = exception_class.__new__(exception_class)
+    Exception.__init__(exception, message)
+    return exception
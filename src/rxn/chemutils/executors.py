@@ -0,0 +1,336 @@
+"""
+Execution of batch operations in the current thread, on a pool of threads,
+or on a pool of processes, with the same interface.
+
+Every worker (the current thread for the serial executor) creates its own
+state once, with an initializer (f.i. an object with a cache), and the tasks
+are executed by a function of this state and of the task:
+
+    def tokenize(state: None, smiles: str) -> str:
+        return tokenize_smiles(smiles)
+
+    executor = create_executor("process", n_jobs=4)
+    tokenized = list(executor.map(tokenize, smiles_strings, chunk_size=1000))
+
+The results are returned in the order of the tasks, and the exceptions are
+raised in the current process as they were raised in the worker. For the
+process executor, the functions, the tasks and the results must be
+picklable.
+"""
+
+import logging
+import threading
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor as _ThreadPoolExecutor
+from functools import partial
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+from rxn.utilities.containers import chunker
+
+from .profiling import (
+    collect_worker_profile,
+    initialize_worker_profiling,
+    is_profiling_enabled,
+    merge_worker_profile,
+)
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+BACKENDS = ("serial", "thread", "process")
+
+# State of the worker processes and threads, see _initialize_worker()
+_worker_local = threading.local()
+
+
+class _WorkerConfig:
+    """Configuration of the current process to apply in worker processes."""
+
+    def __init__(self, profile: bool, log_level: int):
+        self.profile = profile
+        self.log_level = log_level
+
+    def apply(self) -> None:
+        initialize_worker_profiling(self.profile)
+        root_logger = logging.getLogger()
+        if not root_logger.handlers:
+            # Not inherited, f.i. with the "spawn" start method
+            logging.basicConfig(level=self.log_level)
+        root_logger.setLevel(self.log_level)
+
+
+def _initialize_worker(
+    initializer: Optional[Callable[..., Any]],
+    initargs: Tuple[Any, ...],
+    worker_config: Optional[_WorkerConfig],
+) -> None:
+    if worker_config is not None:
+        worker_config.apply()
+    _worker_local.state = None if initializer is None else initializer(*initargs)
+
+
+def _run_in_worker(function: Callable[[Any, T], R], task: T) -> R:
+    return function(_worker_local.state, task)
+
+
+def _run_in_worker_process(
+    function: Callable[[Any, T], R], task: T
+) -> Tuple[R, Optional[Dict[str, Any]]]:
+    return _run_in_worker(function, task), collect_worker_profile()
+
+
+def _apply_to_chunk(
+    function: Callable[[Any, T], R], state: Any, chunk: List[T]
+) -> Tuple[List[R], Optional[Exception]]:
+    """Results for a chunk, up to the first exception."""
+    results: List[R] = []
+    for item in chunk:
+        try:
+            results.append(function(state, item))
+        except Exception as e:
+            return results, e
+    return results, None
+
+
+class BatchExecutor(ABC):
+    """
+    Base class for the executors, see the module documentation.
+
+    Subclasses implement ``_iterate`` for the tasks of one ``imap`` call.
+    """
+
+    def __init__(self, n_jobs: int = 1, max_pending: Optional[int] = None):
+        """
+        Args:
+            n_jobs: number of workers.
+            max_pending: maximal number of tasks submitted but not returned
+                yet, to bound the memory. Defaults to twice the number of
+                workers.
+        """
+        self.n_jobs = n_jobs
+        self.max_pending = 2 * n_jobs if max_pending is None else max_pending
+
+    def imap(
+        self,
+        function: Callable[[Any, T], R],
+        tasks: Iterable[T],
+        initializer: Optional[Callable[..., Any]] = None,
+        initargs: Tuple[Any, ...] = (),
+    ) -> Iterator[R]:
+        """
+        Execute tasks, and get the results in the same order.
+
+        Args:
+            function: function called with the state of the worker and a task.
+            tasks: tasks; they are read progressively.
+            initializer: function creating the state of every worker. By
+                default, the state is None.
+            initargs: arguments for the initializer.
+        """
+        return self._iterate(function, tasks, initializer, initargs)
+
+    def map(
+        self,
+        function: Callable[[Any, T], R],
+        items: Iterable[T],
+        chunk_size: int = 1000,
+        initializer: Optional[Callable[..., Any]] = None,
+        initargs: Tuple[Any, ...] = (),
+    ) -> Iterator[R]:
+        """
+        Apply a function to items, sent to the workers in chunks, and get the
+        results in the same order.
+
+        If the function raises an exception, the results of the previous
+        items are returned before raising it.
+        """
+        chunks = chunker(items, chunk_size=chunk_size)
+        chunk_function = partial(_apply_to_chunk, function)
+        for results, exception in self.imap(
+            chunk_function, chunks, initializer, initargs
+        ):
+            yield from results
+            if exception is not None:
+                raise exception
+
+    @abstractmethod
+    def _iterate(
+        self,
+        function: Callable[[Any, T], R],
+        tasks: Iterable[T],
+        initializer: Optional[Callable[..., Any]],
+        initargs: Tuple[Any, ...],
+    ) -> Iterator[R]:
+        """Execute the tasks of one ``imap`` call."""
+
+
+class SerialExecutor(BatchExecutor):
+    """Execute the tasks one after the other, in the current thread."""
+
+    def __init__(self) -> None:
+        super().__init__(n_jobs=1, max_pending=1)
+
+    def _iterate(
+        self,
+        function: Callable[[Any, T], R],
+        tasks: Iterable[T],
+        initializer: Optional[Callable[..., Any]],
+        initargs: Tuple[Any, ...],
+    ) -> Iterator[R]:
+        state = None if initializer is None else initializer(*initargs)
+        for task in tasks:
+            yield function(state, task)
+
+
+class _PoolExecutor(BatchExecutor):
+    """Executor based on a pool from concurrent.futures."""
+
+    # What the workers execute for a task
+    _run_task: Callable[..., Any] = staticmethod(_run_in_worker)
+
+    @abstractmethod
+    def _create_pool(
+        self, initializer: Optional[Callable[..., Any]], initargs: Tuple[Any, ...]
+    ) -> Executor:
+        """Pool whose workers are initialized with ``_initialize_worker``."""
+
+    def _result(self, outcome: Any) -> Any:
+        """Result of a task from what the worker returned."""
+        return outcome
+
+    def create_pool(
+        self,
+        initializer: Optional[Callable[..., Any]] = None,
+        initargs: Tuple[Any, ...] = (),
+    ) -> Executor:
+        """
+        Create a pool of workers, for submitting tasks one by one with
+        ``submit`` (f.i. from asyncio code). The caller must shut it down.
+        """
+        return self._create_pool(initializer, initargs)
+
+    def submit(
+        self, pool: Executor, function: Callable[[Any, T], R], task: T
+    ) -> "Future[R]":
+        """
+        Submit a task to a pool created by ``create_pool``. The future gives
+        the result of the task, or the exception raised in the worker.
+        """
+        result_future: "Future[R]" = Future()
+
+        def transfer(outcome_future: "Future[Any]") -> None:
+            if not result_future.set_running_or_notify_cancel():
+                return
+            try:
+                result_future.set_result(self._result(outcome_future.result()))
+            except BaseException as e:
+                result_future.set_exception(e)
+
+        pool.submit(self._run_task, function, task).add_done_callback(transfer)
+        return result_future
+
+    def _iterate(
+        self,
+        function: Callable[[Any, T], R],
+        tasks: Iterable[T],
+        initializer: Optional[Callable[..., Any]],
+        initargs: Tuple[Any, ...],
+    ) -> Iterator[R]:
+        pending: Deque["Future[Any]"] = deque()
+        with self._create_pool(initializer, initargs) as pool:
+            try:
+                for task in tasks:
+                    pending.append(pool.submit(self._run_task, function, task))
+                    if len(pending) >= self.max_pending:
+                        yield self._result(pending.popleft().result())
+                while pending:
+                    yield self._result(pending.popleft().result())
+            finally:
+                # On errors, or if the iteration is stopped early
+                for future in pending:
+                    future.cancel()
+
+
+class ThreadExecutor(_PoolExecutor):
+    """
+    Execute the tasks on a pool of threads.
+
+    Useful for operations releasing the GIL, and with free-threaded Python
+    builds.
+    """
+
+    def _create_pool(
+        self, initializer: Optional[Callable[..., Any]], initargs: Tuple[Any, ...]
+    ) -> Executor:
+        return _ThreadPoolExecutor(
+            self.n_jobs,
+            initializer=_initialize_worker,
+            initargs=(initializer, initargs, None),
+        )
+
+
+class ProcessExecutor(_PoolExecutor):
+    """
+    Execute the tasks on a pool of processes.
+
+    When profiling is enabled (see the profiling module), the timings of the
+    worker processes are added to the ones of the current process.
+    """
+
+    _run_task = staticmethod(_run_in_worker_process)
+
+    def _create_pool(
+        self, initializer: Optional[Callable[..., Any]], initargs: Tuple[Any, ...]
+    ) -> Executor:
+        worker_config = _WorkerConfig(
+            profile=is_profiling_enabled(), log_level=logging.getLogger().level
+        )
+        return ProcessPoolExecutor(
+            self.n_jobs,
+            initializer=_initialize_worker,
+            initargs=(initializer, initargs, worker_config),
+        )
+
+    def _result(self, outcome: Any) -> Any:
+        result, profile = outcome
+        merge_worker_profile(profile)
+        return result
+
+
+def create_executor(backend: str = "process", n_jobs: int = 1) -> BatchExecutor:
+    """
+    Create an executor.
+
+    Args:
+        backend: "serial", "thread", or "process".
+        n_jobs: number of workers. With 1, the tasks are executed in the
+            current thread, whatever the backend.
+
+    Raises:
+        ValueError: for unknown backends.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(
+            f'Invalid backend: "{backend}". Available backends: {", ".join(BACKENDS)}.'
+        )
+    if backend == "serial" or n_jobs == 1:
+        return SerialExecutor()
+    if backend == "thread":
+        return ThreadExecutor(n_jobs)
+    return ProcessExecutor(n_jobs)
@@ -1,5 +1,5 @@
 import re
-from typing import List, Tuple
+from typing import Any, List, Tuple
 
 from .conversion import split_smiles_and_fragment_info
 from .reaction_equation import ReactionEquation, cleanup_compounds
@@ -17,6 +17,10 @@ class UnsupportedExtendedReactionSmiles(ValueError):
         super().__init__(
             f'The syntax of "{reaction_smiles}" is not supported by RDKit.'
         )
+        self.reaction_smiles = reaction_smiles
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return type(self), (self.reaction_smiles,)
 
 
 def parse_extended_reaction_smiles(
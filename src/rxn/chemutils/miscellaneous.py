@@ -21,6 +21,7 @@ from .multicomponent_smiles import (
     multicomponent_smiles_to_list,
     sort_multicomponent_smiles,
 )
+from .profiling import profiled
 from .reaction_equation import (
     ReactionEquation,
     apply_to_compound_groups,
@@ -190,6 +191,7 @@ def apply_to_smiles_groups(
         return list_to_multicomponent_smiles(fn(compounds), fragment_bond="~")
 
 
+@profiled()
 def canonicalize_any(
     any_smiles: str,
     check_valence: bool = True,
@@ -0,0 +1,303 @@
+"""
+Low-overhead timers and counters for the stages of the processing pipelines.
+
+Profiling is off by default: the instrumented code holds an optional
+StageProfiler and only measures anything when one is given, so that the
+disabled path costs a single check.
+
+The hot functions of the package (conversion, reaction SMILES parsing,
+tokenization) are instrumented with the process-wide registry instead,
+enabled with ``enable_profiling``:
+
+    profiler = enable_profiling()
+    canonicalize_file("in.smi", "out.smi")
+    print(profiler.summary_table())
+    profiler.save_pstats("canonicalize.prof")
+"""
+
+import functools
+import json
+import logging
+import marshal
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from time import perf_counter
+from typing import (
+    Any,
+    Callable,
+    ContextManager,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
+    cast,
+)
+
+from attr import define
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+T = TypeVar("T")
+F = TypeVar("F", bound=Callable[..., Any])
+
+# Pseudo file name for the stages in the pstats format
+PSTATS_FILENAME = "rxn.chemutils"
+
+
+@define
+class StageStats:
+    """Number of calls of a stage, and total time spent in it."""
+
+    calls: int = 0
+    seconds: float = 0.0
+
+    @property
+    def mean_seconds(self) -> float:
+        return self.seconds / self.calls if self.calls else 0.0
+
+
+class StageProfiler:
+    """
+    Accumulate the number of calls and the time spent per stage.
+
+    Stages are identified by dotted names, such as "rdf.handle_mol". They
+    may be nested: the time of a stage includes the one of its sub-stages.
+    """
+
+    def __init__(self) -> None:
+        self.stats: Dict[str, StageStats] = {}
+
+    def add(self, stage: str, seconds: float, calls: int = 1) -> None:
+        """Record calls of a stage and the time they took."""
+        stats = self.stats.get(stage)
+        if stats is None:
+            stats = self.stats[stage] = StageStats()
+        stats.calls += calls
+        stats.seconds += seconds
+
+    @contextmanager
+    def timer(self, stage: str) -> Iterator[None]:
+        """Time the enclosed code as one call of a stage."""
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, perf_counter() - start)
+
+    def time_iterator(self, stage: str, iterable: Iterable[T]) -> Iterator[T]:
+        """
+        Time the production of the items of an iterable, one call per item,
+        excluding the time spent by the consumer.
+        """
+        iterator = iter(iterable)
+        while True:
+            start = perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.add(stage, perf_counter() - start, calls=0)
+                return
+            self.add(stage, perf_counter() - start)
+            yield item
+
+    def reset(self) -> None:
+        self.stats.clear()
+
+    def merge(self, other: Union["StageProfiler", Mapping[str, Any]]) -> None:
+        """Add the statistics of another profiler, or of its to_dict() output."""
+        if isinstance(other, StageProfiler):
+            other = other.to_dict()
+        for stage, stats in other.items():
+            self.add(stage, stats["seconds"], calls=stats["calls"])
+
+    def to_dict(self) -> Dict[str, Dict[str, Any]]:
+        """Statistics per stage, as plain dictionaries (e.g. for JSON)."""
+        return {
+            stage: {"calls": stats.calls, "seconds": stats.seconds}
+            for stage, stats in self.stats.items()
+        }
+
+    @classmethod
+    def from_dict(cls, stats: Mapping[str, Any]) -> "StageProfiler":
+        profiler = cls()
+        profiler.merge(stats)
+        return profiler
+
+    def save_json(self, path: Union[Path, str]) -> None:
+        with open(path, "wt") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def to_pstats_dict(self) -> Dict[Tuple[str, int, str], Tuple[Any, ...]]:
+        """
+        Statistics in the format of the ``pstats`` module, one "function" per
+        stage. The callers are not known, and the internal time of a stage
+        is the same as its cumulative time (including its sub-stages).
+        """
+        return {
+            (PSTATS_FILENAME, 0, stage): (
+                stats.calls,
+                stats.calls,
+                stats.seconds,
+                stats.seconds,
+                {},
+            )
+            for stage, stats in self.stats.items()
+        }
+
+    def save_pstats(self, path: Union[Path, str]) -> None:
+        """Save the statistics in the cProfile format, readable by pstats.Stats,
+        snakeviz, etc."""
+        with open(path, "wb") as f:
+            marshal.dump(self.to_pstats_dict(), f)
+
+    def save(self, path: Union[Path, str]) -> None:
+        """Save the statistics as pstats for the ".prof" and ".pstats"
+        suffixes, as JSON otherwise."""
+        if Path(path).suffix in {".prof", ".pstats"}:
+            self.save_pstats(path)
+        else:
+            self.save_json(path)
+
+    def summary_table(self) -> str:
+        """Table of the stages, by decreasing total time."""
+        header = f"{'Stage':<32} {'Calls':>10} {'Total (s)':>10} {'Mean (us)':>10}"
+        lines: List[str] = [header, "-" * len(header)]
+        for stage, stats in sorted(
+            self.stats.items(), key=lambda item: item[1].seconds, reverse=True
+        ):
+            lines.append(
+                f"{stage:<32} {stats.calls:>10} {stats.seconds:>10.3f} "
+                f"{stats.mean_seconds * 1e6:>10.1f}"
+            )
+        return "\n".join(lines)
+
+
+# Process-wide registry for the instrumented functions; None when disabled.
+_registry: Optional[StageProfiler] = None
+
+_NO_TIMER: ContextManager[None] = nullcontext()
+
+
+def enable_profiling(profiler: Optional[StageProfiler] = None) -> StageProfiler:
+    """
+    Enable the process-wide profiling of the instrumented functions.
+
+    Args:
+        profiler: where to record the timings. Defaults to a new one.
+
+    Returns:
+        The profiler recording the timings.
+    """
+    global _registry
+    _registry = StageProfiler() if profiler is None else profiler
+    return _registry
+
+
+def disable_profiling() -> Optional[StageProfiler]:
+    """Disable the process-wide profiling, and return the profiler that
+    recorded the timings, if it was enabled."""
+    global _registry
+    profiler, _registry = _registry, None
+    return profiler
+
+
+def get_profiler() -> Optional[StageProfiler]:
+    """Process-wide profiler, or None if profiling is disabled."""
+    return _registry
+
+
+def is_profiling_enabled() -> bool:
+    return _registry is not None
+
+
+@contextmanager
+def profiling(profiler: Optional[StageProfiler] = None) -> Iterator[StageProfiler]:
+    """Enable the process-wide profiling for the duration of a block."""
+    previous = _registry
+    try:
+        yield enable_profiling(profiler)
+    finally:
+        if previous is None:
+            disable_profiling()
+        else:
+            enable_profiling(previous)
+
+
+def timed(stage: str) -> ContextManager[None]:
+    """Context manager timing a block as a stage, when profiling is enabled."""
+    registry = _registry
+    if registry is None:
+        return _NO_TIMER
+    return registry.timer(stage)
+
+
+def profiled(stage: Optional[str] = None) -> Callable[[F], F]:
+    """
+    Decorator timing the calls of a function, when profiling is enabled.
+
+    Args:
+        stage: name of the stage. Defaults to the module (without the
+            "rxn.chemutils." prefix) and the name of the function, such
+            as "conversion.smiles_to_mol".
+    """
+
+    def decorator(fn: F) -> F:
+        name = stage
+        if name is None:
+            module = fn.__module__
+            if module.startswith("rxn.chemutils."):
+                module = module[len("rxn.chemutils.") :]
+            name = f"{module}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            registry = _registry
+            if registry is None:
+                return fn(*args, **kwargs)
+            start = perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                registry.add(name, perf_counter() - start)
+
+        return cast(F, wrapper)
+
+    return decorator
+
+
+def initialize_worker_profiling(enabled: bool) -> None:
+    """
+    Set up the registry of a worker process, from the state of the parent
+    process. To call from the initializer of process pools.
+
+    The registry always starts empty, also for forked processes, whose
+    registry would otherwise be a copy of the parent's.
+    """
+    if enabled:
+        enable_profiling()
+    else:
+        disable_profiling()
+
+
+def collect_worker_profile() -> Optional[Dict[str, Dict[str, Any]]]:
+    """
+    Take the timings recorded in a worker process since the last call, to
+    return them to the parent process with the results of a task.
+    """
+    if _registry is None:
+        return None
+    profile = _registry.to_dict()
+    _registry.reset()
+    return profile
+
+
+def merge_worker_profile(profile: Optional[Mapping[str, Any]]) -> None:
+    """Add the timings of a worker process to the registry, if enabled."""
+    if profile is not None and _registry is not None:
+        _registry.merge(profile)
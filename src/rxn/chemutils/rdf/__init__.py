@@ -1,10 +1,22 @@
+from .compression import write_seekable_gzip
+from .pre_filter import RdfPreFilter
+from .rdf_index import RdfIndex, build_rdf_index
 from .rdf_parser import RdfParser, iterate_reactions_from_file
 from .rdf_reaction import RdfReaction
+from .rdf_to_smiles import RdfToSmilesConverter, convert_rdf_to_smiles
+from .rdf_writer import RdfWriter
 from .reaction_smiles_extractor import ReactionSmilesExtractor
 
 __all__ = [
+    "RdfIndex",
     "RdfParser",
+    "RdfPreFilter",
     "RdfReaction",
+    "RdfToSmilesConverter",
+    "RdfWriter",
     "ReactionSmilesExtractor",
+    "build_rdf_index",
+    "convert_rdf_to_smiles",
     "iterate_reactions_from_file",
+    "write_seekable_gzip",
 ]
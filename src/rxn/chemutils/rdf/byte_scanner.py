@@ -0,0 +1,195 @@
+"""
+Byte-level scanner for the blocks of RDF files.
+
+Instead of decoding and stripping every line of the file, the scanner looks
+for the block starts (lines starting with "$") with ``bytes.find`` on a
+memory-mapped file, and decodes every block in one go, only when it is used.
+"""
+
+import mmap
+from pathlib import Path
+from typing import IO, Iterator, List, Optional, Sequence, Tuple, Union, overload
+
+_BLOCK_START = b"\n$"
+_RECORD_START = b"\n$RFMT"
+
+
+class RdfBlock(Sequence[str]):
+    """
+    Block of an RDF file, from a line starting with "$" until the next one.
+
+    Behaves like the list of lines returned by ``RdfParser.iter_blocks``, but
+    keeps the raw bytes and decodes them lazily.
+    """
+
+    __slots__ = ("data", "encoding", "_text", "_first_line", "_split", "_lines")
+
+    def __init__(self, data: bytes, encoding: str):
+        """
+        Args:
+            data: raw content of the block, including the final line break.
+            encoding: encoding of the file.
+        """
+        self.data = data
+        self.encoding = encoding
+        self._text: Optional[str] = None
+        self._first_line: Optional[str] = None
+        self._split: Optional[Tuple[str, Optional[str]]] = None
+        self._lines: Optional[List[str]] = None
+
+    @property
+    def text(self) -> str:
+        """Content of the block, without the final line break."""
+        if self._text is None:
+            text = self.data.decode(self.encoding)
+            if "\r" in text:
+                # Same as the universal newlines of files opened in text mode
+                text = text.replace("\r\n", "\n").replace("\r", "\n")
+            if text.endswith("\n"):
+                text = text[:-1]
+            self._text = text
+        return self._text
+
+    @property
+    def first_line(self) -> str:
+        """First line of the block, decoding only this line if needed."""
+        if self._first_line is None:
+            end = self.data.find(b"\n")
+            if end == -1 or end == len(self.data) - 1 or self._text is not None:
+                self._first_line = self.split_first_line()[0]
+            else:
+                self._first_line = self.data[:end].decode(self.encoding).rstrip("\r")
+        return self._first_line
+
+    def split_first_line(self) -> Tuple[str, Optional[str]]:
+        """
+        Get the first line and the rest of the block (None if the block has
+        only one line), without splitting the block into lines.
+        """
+        if self._split is None:
+            first_line, separator, rest = self.text.partition("\n")
+            self._split = (first_line, rest if separator else None)
+        return self._split
+
+    @property
+    def lines(self) -> List[str]:
+        if self._lines is None:
+            self._lines = self.text.split("\n")
+        return self._lines
+
+    @overload
+    def __getitem__(self, index: int) -> str: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[str]: ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[str, List[str]]:
+        return self.lines[index]
+
+    def __len__(self) -> int:
+        return len(self.lines)
+
+    def __repr__(self) -> str:
+        return f"RdfBlock({self.data!r})"
+
+
+def iter_byte_blocks(
+    buffer: Union[bytes, mmap.mmap], encoding: str, start: int = 0, end: int = -1
+) -> Iterator[RdfBlock]:
+    """
+    Iterate over the blocks in a buffer of bytes.
+
+    Args:
+        buffer: bytes or memory-mapped file.
+        encoding: encoding of the file.
+        start: offset to start from; must be at the start of a line.
+        end: offset to stop at; must be at the start of a line. Defaults to
+            the end of the buffer.
+    """
+    if end == -1:
+        end = len(buffer)
+    while start < end:
+        next_start = buffer.find(_BLOCK_START, start, end)
+        next_start = end if next_start == -1 else next_start + 1
+        yield RdfBlock(buffer[start:next_start], encoding)
+        start = next_start
+
+
+def iter_stream_blocks(
+    f: IO[bytes], encoding: str, chunk_size: int = 1 << 22
+) -> Iterator[RdfBlock]:
+    """
+    Iterate over the blocks of a binary stream, such as a decompressed file,
+    for which memory mapping is not possible.
+    """
+    buffer = b""
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            break
+        buffer += chunk
+        # The last block may continue in the next chunk
+        last_start = buffer.rfind(_BLOCK_START)
+        if last_start == -1:
+            continue
+        yield from iter_byte_blocks(buffer, encoding, 0, last_start + 1)
+        buffer = buffer[last_start + 1 :]
+
+    if buffer:
+        yield from iter_byte_blocks(buffer, encoding)
+
+
+def iter_byte_records(
+    buffer: Union[bytes, mmap.mmap], start: int = 0, end: int = -1
+) -> Iterator[Tuple[int, int]]:
+    """
+    Iterate over the byte ranges of the records in a buffer, each of them
+    starting with a "$RFMT" line, except for the header of the file.
+
+    Args:
+        buffer: bytes or memory-mapped file.
+        start: offset to start from; must be at the start of a line.
+        end: offset to stop at; must be at the start of a line. Defaults to
+            the end of the buffer.
+
+    Returns:
+        Iterator over the (start, end) offsets of the records.
+    """
+    if end == -1:
+        end = len(buffer)
+    while start < end:
+        next_start = buffer.find(_RECORD_START, start, end)
+        next_start = end if next_start == -1 else next_start + 1
+        yield start, next_start
+        start = next_start
+
+
+def iter_stream_records(f: IO[bytes], chunk_size: int = 1 << 22) -> Iterator[bytes]:
+    """Iterate over the records of a binary stream, see ``iter_byte_records``."""
+    buffer = b""
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            break
+        buffer += chunk
+        # The last record may continue in the next chunk
+        last_start = buffer.rfind(_RECORD_START)
+        if last_start == -1:
+            continue
+        for start, end in iter_byte_records(buffer, 0, last_start + 1):
+            yield buffer[start:end]
+        buffer = buffer[last_start + 1 :]
+
+    if buffer:
+        for start, end in iter_byte_records(buffer):
+            yield buffer[start:end]
+
+
+def iter_mmap_blocks(filename: Union[Path, str], encoding: str) -> Iterator[RdfBlock]:
+    """Iterate over the blocks of a file, mapping it in memory."""
+    with open(filename, "rb") as f:
+        if f.seek(0, 2) == 0:
+            # Empty files cannot be mapped
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield from iter_byte_blocks(mm, encoding)
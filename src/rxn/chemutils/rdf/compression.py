@@ -0,0 +1,250 @@
+"""
+Reading of compressed RDF files (gzip, bz2, xz) with streaming decompression.
+
+For random access, offsets always refer to the decompressed content. Gzip
+files can be accessed efficiently with checkpoints at the start of the gzip
+members: decompression can restart at any member, while the other formats
+(and gzip files with a single member) are decompressed from the start of
+the file. ``write_seekable_gzip`` compresses RDF files into many members,
+each of them starting at a reaction.
+"""
+
+import bisect
+import bz2
+import gzip
+import io
+import logging
+import lzma
+import zlib
+from pathlib import Path
+from typing import IO, Any, BinaryIO, Iterator, List, Optional, Sequence, Tuple, Union
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+# (offset in the compressed file, offset in the decompressed content)
+Checkpoint = Tuple[int, int]
+
+_OPENERS: Any = {".gz": gzip.open, ".bz2": bz2.open, ".xz": lzma.open}
+
+
+def compression_suffix(filename: Union[Path, str]) -> Optional[str]:
+    """Get the compression suffix of a file (".gz", ".bz2", ".xz"), if any."""
+    suffix = Path(filename).suffix.lower()
+    return suffix if suffix in _OPENERS else None
+
+
+def is_compressed(filename: Union[Path, str]) -> bool:
+    return compression_suffix(filename) is not None
+
+
+def open_rdf_file(
+    filename: Union[Path, str], mode: str = "rb", encoding: Optional[str] = None
+) -> IO[Any]:
+    """
+    Open an RDF file, (de)compressing it on the fly if its name ends with
+    ".gz", ".bz2" or ".xz".
+
+    Args:
+        filename: RDF file.
+        mode: "rb" or "rt" for reading, "wb" for writing.
+        encoding: encoding, for the text mode.
+    """
+    suffix = compression_suffix(filename)
+    if suffix is None:
+        return open(filename, mode, encoding=encoding)
+    return _OPENERS[suffix](filename, mode, encoding=encoding)  # type: ignore[no-any-return]
+
+
+class RandomAccessReader:
+    """
+    Read byte ranges of the decompressed content of an RDF file.
+
+    Reading ranges in increasing order is efficient for all the formats, as
+    the decompression just continues. For other ranges, plain files are
+    seeked to, gzip files restart from the closest checkpoint, and other
+    compressed files restart from the beginning.
+    """
+
+    def __init__(
+        self, filename: Union[Path, str], checkpoints: Sequence[Checkpoint] = ()
+    ):
+        """
+        Args:
+            filename: RDF file.
+            checkpoints: gzip member starts, see ``iter_gzip_chunks``.
+        """
+        self.filename = filename
+        self.checkpoints = list(checkpoints)
+        self._uncompressed_offsets = [checkpoint[1] for checkpoint in checkpoints]
+        self._use_checkpoints = (
+            compression_suffix(filename) == ".gz" and len(self.checkpoints) > 0
+        )
+        self._raw: Optional[BinaryIO] = None
+        self._stream: Optional[Union[IO[bytes], gzip.GzipFile]] = None
+        # Checkpoint the stream was started from, and current decompressed offset
+        self._checkpoint = -1
+        self._position = 0
+
+    def read(self, offset: int, length: int) -> bytes:
+        stream = self._seek(offset)
+        data = stream.read(length)
+        self._position = offset + len(data)
+        return data
+
+    def _seek(self, offset: int) -> Union[IO[bytes], gzip.GzipFile]:
+        if not self._use_checkpoints:
+            if self._stream is None:
+                self._stream = open_rdf_file(self.filename, "rb")
+            self._stream.seek(offset)
+            return self._stream
+
+        checkpoint = bisect.bisect_right(self._uncompressed_offsets, offset) - 1
+        if (
+            self._stream is None
+            or offset < self._position
+            or checkpoint != self._checkpoint
+        ):
+            self._restart_at_checkpoint(checkpoint)
+        assert self._stream is not None
+
+        # Skip the bytes until the requested offset
+        self._stream.seek(offset - self.checkpoints[self._checkpoint][1])
+        self._position = offset
+        return self._stream
+
+    def _restart_at_checkpoint(self, checkpoint: int) -> None:
+        if self._raw is None:
+            self._raw = open(self.filename, "rb")
+        self._raw.seek(self.checkpoints[checkpoint][0])
+        # Offsets of the gzip file object are relative to the checkpoint
+        self._stream = gzip.GzipFile(fileobj=self._raw, mode="rb")
+        self._checkpoint = checkpoint
+        self._position = self.checkpoints[checkpoint][1]
+
+    def close(self) -> None:
+        for f in (self._stream, self._raw):
+            if f is not None:
+                f.close()
+        self._stream = None
+        self._raw = None
+
+    def __enter__(self) -> "RandomAccessReader":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+
+def iter_gzip_chunks(
+    f: BinaryIO, checkpoints: List[Checkpoint], chunk_size: int = 1 << 20
+) -> Iterator[bytes]:
+    """
+    Decompress a gzip file in chunks, recording the start of every gzip member.
+
+    Args:
+        f: gzip file opened in binary mode.
+        checkpoints: list to which the checkpoints are appended, as the
+            decompression proceeds.
+        chunk_size: number of compressed bytes to read at once.
+    """
+    compressed_offset = 0
+    uncompressed_offset = 0
+    pending = b""
+    decompressor = None
+    while True:
+        if decompressor is None:
+            if not pending:
+                pending = f.read(chunk_size)
+            # End of file, possibly with zero padding after the last member
+            if not pending.strip(b"\x00"):
+                return
+            checkpoints.append((compressed_offset, uncompressed_offset))
+            decompressor = zlib.decompressobj(wbits=16 + zlib.MAX_WBITS)
+
+        data = pending or f.read(chunk_size)
+        pending = b""
+        if not data:
+            raise EOFError("Compressed file ended before the end of a gzip member.")
+
+        decompressed = decompressor.decompress(data)
+        compressed_offset += len(data) - len(decompressor.unused_data)
+        uncompressed_offset += len(decompressed)
+        if decompressed:
+            yield decompressed
+
+        if decompressor.eof:
+            pending = decompressor.unused_data
+            decompressor = None
+
+
+class ChunkReader(io.RawIOBase):
+    """Binary file object reading from an iterator of chunks of bytes."""
+
+    def __init__(self, chunks: Iterator[bytes]):
+        self._chunks = chunks
+        self._current = memoryview(b"")
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        while not self._current:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return 0
+            self._current = memoryview(chunk)
+        n_bytes = min(len(buffer), len(self._current))
+        buffer[:n_bytes] = self._current[:n_bytes]
+        self._current = self._current[n_bytes:]
+        return n_bytes
+
+
+def write_seekable_gzip(
+    rdf_file: Union[Path, str],
+    gzip_file: Union[Path, str],
+    member_size: int = 1 << 20,
+    compresslevel: int = 6,
+) -> int:
+    """
+    Compress an RDF file into a gzip file made of many members, each of them
+    starting at a reaction.
+
+    The result is a valid gzip file for any tool, and allows for random
+    access with the index after decompressing at most one member.
+
+    Args:
+        rdf_file: RDF file to compress, possibly compressed itself.
+        gzip_file: where to write the gzip file.
+        member_size: minimal size of the decompressed content of the members.
+        compresslevel: gzip compression level.
+
+    Returns:
+        The number of gzip members.
+    """
+    n_members = 0
+    member: List[bytes] = []
+    member_bytes = 0
+    with open_rdf_file(rdf_file, "rb") as f_in, open(gzip_file, "wb") as f_out:
+        for line in f_in:
+            if member_bytes >= member_size and line.startswith(b"$RFMT"):
+                _write_gzip_member(f_out, member, compresslevel)
+                n_members += 1
+                member, member_bytes = [], 0
+            member.append(line)
+            member_bytes += len(line)
+        if member:
+            _write_gzip_member(f_out, member, compresslevel)
+            n_members += 1
+    logger.info(f'Wrote "{gzip_file}" with {n_members} gzip members.')
+    return n_members
+
+
+def _write_gzip_member(
+    f_out: IO[bytes], lines: List[bytes], compresslevel: int
+) -> None:
+    """Write lines as one gzip member, without file name and time stamp."""
+    with gzip.GzipFile(
+        filename="", fileobj=f_out, mode="wb", compresslevel=compresslevel, mtime=0
+    ) as member:
+        member.writelines(lines)
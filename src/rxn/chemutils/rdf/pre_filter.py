@@ -0,0 +1,168 @@
+"""
+Declarative filter of the reactions of RDF files, evaluated on the raw bytes
+of the records, before they are split into blocks and parsed.
+"""
+
+import mmap
+import re
+from functools import lru_cache
+from typing import Collection, FrozenSet, Mapping, Optional, Union
+
+import attr
+
+from .byte_scanner import RdfBlock
+from .rdf_parser import InvalidBlock, datum_value
+
+_RIREG_BYTES_REGEX = re.compile(rb"\$RFMT \$[RM]IREG (\d+)")
+_RXN_BLOCK_START = b"\n$RXN"
+# Line number of the reactant and product counts in the $RXN block
+_RXN_COUNTS_LINE = 4
+
+
+def _to_frozenset(values: Optional[Collection[int]]) -> Optional[FrozenSet[int]]:
+    return None if values is None else frozenset(values)
+
+
+@attr.s(auto_attribs=True, frozen=True)
+class RdfPreFilter:
+    """
+    Filter on the fields of RDF reactions that are cheap to extract from
+    the raw records.
+
+    The conditions are combined with AND; the ones left to their default
+    value are ignored. Records that cannot be evaluated because they are
+    malformed are kept, so that the parser reports the error.
+
+    Attributes:
+        reaction_indices: RIREGs of the reactions to keep.
+        n_reactants: number of reactants (precursors) in the $RXN header.
+        n_products: number of products in the $RXN header.
+        dtypes: DTYPEs that must be present in the reaction.
+        dtype_values: DTYPEs that must be present with the given value, as
+            it would appear in the meta of the reaction.
+    """
+
+    reaction_indices: Optional[FrozenSet[int]] = attr.ib(
+        default=None, converter=_to_frozenset
+    )
+    n_reactants: Optional[int] = None
+    n_products: Optional[int] = None
+    dtypes: Collection[str] = ()
+    dtype_values: Mapping[str, str] = attr.Factory(dict)
+
+    def matches(
+        self,
+        buffer: Union[bytes, mmap.mmap],
+        encoding: str,
+        start: int = 0,
+        end: int = -1,
+    ) -> bool:
+        """
+        Whether the record in the given range of a buffer fulfills the
+        conditions.
+
+        Args:
+            buffer: bytes or memory-mapped file.
+            encoding: encoding of the file.
+            start: offset of the "$RFMT" line of the record.
+            end: offset after the record. Defaults to the end of the buffer.
+        """
+        if end == -1:
+            end = len(buffer)
+
+        if self.reaction_indices is not None and not self._matches_rireg(
+            buffer, start, end
+        ):
+            return False
+        if (
+            self.n_reactants is not None or self.n_products is not None
+        ) and not self._matches_counts(buffer, start, end):
+            return False
+
+        for dtype in self.dtypes:
+            if _find_dtype_line_end(buffer, encoding, dtype, start, end) == -1:
+                return False
+        for dtype, value in self.dtype_values.items():
+            if _datum_value(buffer, encoding, dtype, start, end) != value:
+                return False
+        return True
+
+    def accepts_reaction_index(self, reaction_index: int) -> bool:
+        """Whether the RIREG condition is fulfilled, f.i. for indexed files."""
+        return self.reaction_indices is None or reaction_index in self.reaction_indices
+
+    def _matches_rireg(
+        self, buffer: Union[bytes, mmap.mmap], start: int, end: int
+    ) -> bool:
+        match = _RIREG_BYTES_REGEX.match(buffer[start : min(start + 64, end)])
+        if match is None:
+            return True
+        return self.accepts_reaction_index(int(match.group(1)))
+
+    def _matches_counts(
+        self, buffer: Union[bytes, mmap.mmap], start: int, end: int
+    ) -> bool:
+        position = buffer.find(_RXN_BLOCK_START, start, end)
+        if position == -1:
+            return True
+        for _ in range(_RXN_COUNTS_LINE):
+            position = buffer.find(b"\n", position + 1, end)
+            if position == -1:
+                return True
+        line_end = buffer.find(b"\n", position + 1, end)
+        counts_line = buffer[position + 1 : end if line_end == -1 else line_end]
+        try:
+            n_reactants, n_products = (int(count) for count in counts_line.split())
+        except ValueError:
+            return True
+
+        if self.n_reactants is not None and n_reactants != self.n_reactants:
+            return False
+        if self.n_products is not None and n_products != self.n_products:
+            return False
+        return True
+
+
+@lru_cache(maxsize=1000)
+def _dtype_line_start(dtype: str, encoding: str) -> bytes:
+    return f"\n$DTYPE {dtype}".encode(encoding)
+
+
+def _find_dtype_line_end(
+    buffer: Union[bytes, mmap.mmap], encoding: str, dtype: str, start: int, end: int
+) -> int:
+    """
+    Find the last "$DTYPE" line for the given DTYPE in a record.
+
+    Returns:
+        The offset after the line break of the line, or -1 if not found.
+    """
+    line_start = _dtype_line_start(dtype, encoding)
+    search_end = end
+    while True:
+        position = buffer.rfind(line_start, start, search_end)
+        if position == -1:
+            return -1
+        line_end = position + len(line_start)
+        # Make sure that the DTYPE is not only the prefix of another one
+        following = buffer[line_end : line_end + 2]
+        if following.startswith(b"\n"):
+            return line_end + 1
+        if following == b"\r\n":
+            return line_end + 2
+        search_end = position
+
+
+def _datum_value(
+    buffer: Union[bytes, mmap.mmap], encoding: str, dtype: str, start: int, end: int
+) -> Optional[str]:
+    """Get the value of the DATUM following the given DTYPE, None if absent."""
+    datum_start = _find_dtype_line_end(buffer, encoding, dtype, start, end)
+    if datum_start == -1:
+        return None
+    datum_end = buffer.find(b"\n$", datum_start, end)
+    datum_end = end if datum_end == -1 else datum_end + 1
+    try:
+        return datum_value(RdfBlock(buffer[datum_start:datum_end], encoding))
+    except InvalidBlock:
+        return None
@@ -1,11 +1,17 @@
 import re
-from typing import Any, Dict, Generator, List, Tuple
+from functools import lru_cache
+from typing import Any, Callable, Dict, Generator, List, Mapping, Optional, Tuple
 
 from rxn.utilities.regex import capturing
 
 _LIST_REGEX_STRING = capturing(".+") + r"\(" + capturing(r"\d+") + r"\)"
 _LIST_REGEX = re.compile(_LIST_REGEX_STRING)
 
+# Key segment before a colon: subkey, and 1-based list index for list segments
+KeySegment = Tuple[str, Optional[int]]
+# Tokenized key: the segments leading to the container, and the final subkey
+TokenizedKey = Tuple[Tuple[KeySegment, ...], str]
+
 
 class PropertyParser:
     """
@@ -74,6 +80,76 @@ class PropertyParser:
         self._parse_property(container[subkey], ":".join(key_splits[1:]), value)
 
 
+@lru_cache(maxsize=10000)
+def _parse_key_segment(segment: str) -> KeySegment:
+    list_match = _LIST_REGEX.match(segment)
+    if list_match is None:
+        return segment, None
+    return list_match.group(1), int(list_match.group(2))
+
+
+@lru_cache(maxsize=100000)
+def tokenize_property_key(key: str) -> TokenizedKey:
+    """
+    Split a property key into its segments, parsing the list indices.
+
+    The result is cached, as the same keys appear in every reaction of an
+    RDF file.
+
+    Raises:
+        ValueError: for empty keys, or keys ending with a colon.
+    """
+    *segments, leaf = key.split(":")
+    if not leaf:
+        raise ValueError("A key must be provided.")
+    return tuple(_parse_key_segment(segment) for segment in segments), leaf
+
+
+class TriePropertyParser:
+    """
+    Faster equivalent of PropertyParser.
+
+    Every key is tokenized only once (see ``tokenize_property_key``), and
+    the nested structure is then built in one walk over the segments,
+    instead of splitting and joining the remainder of the key at every depth.
+    """
+
+    def __init__(
+        self, tokenize: Callable[[str], TokenizedKey] = tokenize_property_key
+    ) -> None:
+        """
+        Args:
+            tokenize: function to tokenize the keys. Can be replaced by a
+                (cached) function normalizing the keys before tokenizing them.
+        """
+        self.result: Dict[str, Any] = {}
+        self._tokenize = tokenize
+
+    def parse_dict(self, property_dict: Mapping[str, str]) -> None:
+        for key, value in property_dict.items():
+            self.parse_property(key, value)
+
+    def parse_property(self, key: str, value: str) -> None:
+        segments, leaf = self._tokenize(key)
+        container = self.result
+        for subkey, list_index in segments:
+            if list_index is None:
+                child = container.get(subkey)
+                if child is None:
+                    child = container[subkey] = {}
+                container = child
+                continue
+
+            subkey_list = container.get(subkey)
+            if subkey_list is None:
+                subkey_list = container[subkey] = []
+            # Add new dicts if necessary
+            for _ in range(len(subkey_list), list_index):
+                subkey_list.append({})
+            container = subkey_list[list_index - 1]
+        container[leaf] = value
+
+
 class PropertySerializer:
     """Do the reverse operation compared to PropertyParser."""
 
@@ -112,6 +188,13 @@ def parse_properties(properties: Dict[str, str]) -> Dict[str, Any]:
     return pp.result
 
 
+def parse_properties_trie(properties: Mapping[str, str]) -> Dict[str, Any]:
+    """Same as parse_properties, with the faster TriePropertyParser."""
+    parser = TriePropertyParser()
+    parser.parse_dict(properties)
+    return parser.result
+
+
 def serialize_properties(properties: Dict[str, Any]) -> Dict[str, str]:
     """Do the reverse operation compared to parse_properties."""
     return PropertySerializer().convert_dict(properties)
@@ -0,0 +1,464 @@
+"""
+Export of RDF reactions to sharded JSONL or CSV files, with the reaction
+SMILES and a configurable set of flattened reaction properties.
+"""
+
+import csv
+import io
+import json
+import logging
+from functools import partial
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from attr import define
+
+from ..executors import ProcessExecutor
+from .compression import is_compressed
+from .property_parser import TokenizedKey, tokenize_property_key
+from .rdf_index import (
+    load_or_build_rdf_index,
+    split_rdf_file,
+    supports_parallel_reading,
+)
+from .rdf_parser import RdfParser
+from .rdf_reaction import RdfReaction
+from .rdf_to_smiles import MAX_RANGE_BYTES
+from .reaction_properties import ReactionProperties
+from .reaction_smiles_extractor import ReactionSmilesExtractor
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+OUTPUT_FORMATS = ("jsonl", "csv")
+
+# Names of the compounds in the reaction properties, per category
+COMPOUND_FIELDS = {
+    "solvents": "SOLVENT",
+    "catalysts": "CATALYST",
+    "reagents": "REAGENT",
+}
+
+DEFAULT_FIELDS = (
+    "reaction_index",
+    "smiles",
+    "temperature=VARIATION:STEP:CONDITIONS:TEMP",
+    "yield=VARIATION:PRODUCT:YIELD",
+    "solvents",
+    "catalysts",
+)
+
+# Separator for the multiple values of a field in CSV files
+CSV_VALUE_SEPARATOR = "; "
+
+# File listing the shards of an export, in the output directory
+MANIFEST_NAME = "shards.txt"
+
+
+@define
+class ExportField:
+    """
+    Column of the export.
+
+    Attributes:
+        name: name of the column.
+        path: for property fields, the path in the reaction properties (as
+            in ``ReactionProperties.properties``, i.e. without the "RXN:"
+            prefix and the "MOL(1):" and "SYMBOL(1):" segments). List
+            segments without index, such as "VARIATION" in
+            "VARIATION:PRODUCT(1):YIELD", select all the list elements.
+        category: for compound fields, category of the compounds whose
+            names to export.
+    """
+
+    name: str
+    path: Optional[TokenizedKey] = None
+    category: Optional[str] = None
+
+    @classmethod
+    def from_spec(cls, spec: str) -> "ExportField":
+        """
+        Create a field from its specification: "reaction_index", "smiles",
+        the name of a compound field ("solvents", "catalysts", "reagents"),
+        or a property path, optionally preceded by a column name, such as
+        "temperature=VARIATION:STEP:CONDITIONS:TEMP".
+
+        Raises:
+            ValueError: for invalid property paths.
+        """
+        if spec in ("reaction_index", "smiles"):
+            return cls(name=spec)
+        if spec in COMPOUND_FIELDS:
+            return cls(name=spec, category=COMPOUND_FIELDS[spec])
+        name, _, path = spec.rpartition("=")
+        return cls(name=name or path, path=tokenize_property_key(path))
+
+    def extract(
+        self,
+        reaction: RdfReaction,
+        smiles: str,
+        properties: ReactionProperties,
+    ) -> Any:
+        """Get the value of the field: a string, or a list of strings for
+        the property and compound fields."""
+        if self.category is not None:
+            names = (
+                compound.get_name()
+                for compound in properties.get_compounds()
+                if compound.category == self.category
+            )
+            return [name for name in names if name is not None]
+        if self.path is not None:
+            return _values_at_path(properties.properties, self.path)
+        if self.name == "reaction_index":
+            return reaction.reaction_index
+        return smiles
+
+
+def _values_at_path(properties: Dict[str, Any], path: TokenizedKey) -> List[str]:
+    segments, leaf = path
+    containers = [properties]
+    for subkey, list_index in segments:
+        children = []
+        for container in containers:
+            child = container.get(subkey)
+            if isinstance(child, dict) and list_index is None:
+                children.append(child)
+            elif isinstance(child, list):
+                if list_index is None:
+                    children.extend(child)
+                elif list_index <= len(child):
+                    children.append(child[list_index - 1])
+        containers = children
+
+    values = (container.get(leaf) for container in containers)
+    return [value for value in values if isinstance(value, str)]
+
+
+class _ShardWriter:
+    """Write rows to numbered files, starting a new file when one is full."""
+
+    def __init__(
+        self,
+        directory: Path,
+        prefix: str,
+        output_format: str,
+        columns: Sequence[str],
+        max_shard_bytes: int,
+    ):
+        self.directory = directory
+        self.prefix = prefix
+        self.output_format = output_format
+        self.columns = columns
+        self.max_shard_bytes = max_shard_bytes
+        self.shard_files: List[Path] = []
+        self._file: Optional[BinaryIO] = None
+        self._shard_bytes = 0
+
+    def write(self, row: Dict[str, Any]) -> None:
+        data = self._format_row(row)
+        if self._file is not None and (
+            self._shard_bytes + len(data) > self.max_shard_bytes
+        ):
+            self._file.close()
+            self._file = None
+        if self._file is None:
+            self._open_shard()
+        assert self._file is not None
+        self._file.write(data)
+        self._shard_bytes += len(data)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _open_shard(self) -> None:
+        path = (
+            self.directory
+            / f"{self.prefix}-{len(self.shard_files):04d}.{self.output_format}"
+        )
+        self.shard_files.append(path)
+        self._file = open(path, "wb")
+        self._shard_bytes = 0
+        if self.output_format == "csv":
+            header = self._format_csv_line(self.columns)
+            self._file.write(header)
+            self._shard_bytes += len(header)
+
+    def _format_row(self, row: Dict[str, Any]) -> bytes:
+        if self.output_format == "jsonl":
+            return (json.dumps(row) + "\n").encode("utf-8")
+        return self._format_csv_line(
+            [_csv_value(row[column]) for column in self.columns]
+        )
+
+    @staticmethod
+    def _format_csv_line(values: Iterable[str]) -> bytes:
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator="\n").writerow(values)
+        return buffer.getvalue().encode("utf-8")
+
+
+def _csv_value(value: Any) -> str:
+    if isinstance(value, list):
+        return CSV_VALUE_SEPARATOR.join(value)
+    return str(value)
+
+
+class RdfExporter:
+    """
+    Export RDF reactions, with their reaction SMILES and flattened properties,
+    to JSONL or CSV shards. Reactions that cannot be converted to SMILES are
+    skipped.
+    """
+
+    def __init__(
+        self,
+        fields: Iterable[str] = DEFAULT_FIELDS,
+        output_format: str = "jsonl",
+        max_shard_bytes: int = 256 * 1024 * 1024,
+        fragment_bond: Optional[str] = "~",
+        sanitize: bool = False,
+    ):
+        """
+        Args:
+            fields: specifications of the columns, see ``ExportField.from_spec``.
+            output_format: "jsonl" or "csv".
+            max_shard_bytes: maximal size of the shards (unless a single row
+                is larger).
+            fragment_bond: fragment bond to use in the reaction SMILES.
+            sanitize: whether to sanitize the molecules when converting them.
+        """
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(
+                f'Invalid output format "{output_format}". '
+                f'Available: {", ".join(OUTPUT_FORMATS)}.'
+            )
+        self.field_specs = list(fields)
+        self.fields = [ExportField.from_spec(spec) for spec in self.field_specs]
+        self.output_format = output_format
+        self.max_shard_bytes = max_shard_bytes
+        self.extractor = ReactionSmilesExtractor(
+            fragment_bond=fragment_bond, sanitize=sanitize
+        )
+        self.total_reactions = 0
+        self.successful_reactions = 0
+
+    @property
+    def columns(self) -> List[str]:
+        return [field.name for field in self.fields]
+
+    def to_row(self, reaction: RdfReaction) -> Dict[str, Any]:
+        """
+        Get the values of the fields for a reaction.
+
+        Raises:
+            Exception: if the reaction cannot be converted to SMILES, or if
+                its properties cannot be parsed.
+        """
+        # Parsed once, for the reagents of the SMILES and for the fields
+        properties = ReactionProperties(reaction.meta)
+        smiles = self.extractor.to_reaction_smiles(reaction, properties)
+        return {
+            field.name: field.extract(reaction, smiles, properties)
+            for field in self.fields
+        }
+
+    def export(
+        self, reactions: Iterable[RdfReaction], directory: Path, prefix: str
+    ) -> List[Path]:
+        """
+        Export reactions to shards named "<prefix>-0000.<format>", etc.
+
+        Returns:
+            The shard files, in the order of the reactions.
+        """
+        writer = _ShardWriter(
+            directory=directory,
+            prefix=prefix,
+            output_format=self.output_format,
+            columns=self.columns,
+            max_shard_bytes=self.max_shard_bytes,
+        )
+        try:
+            for reaction in reactions:
+                self.total_reactions += 1
+                try:
+                    row = self.to_row(reaction)
+                except Exception as e:
+                    logger.warning(f"Cannot export reaction: {e}")
+                    continue
+                writer.write(row)
+                self.successful_reactions += 1
+        finally:
+            writer.close()
+        return writer.shard_files
+
+    def export_file(
+        self,
+        rdf_file: Union[Path, str],
+        output_dir: Union[Path, str],
+        n_jobs: int = 1,
+    ) -> List[Path]:
+        """
+        Export an RDF file in one pass, to shards in a directory.
+
+        With several processes, the file is split into byte ranges exported
+        independently, each of them to its own shards. In all cases, the
+        concatenation of the shards (without the CSV headers) in the order
+        of their names follows the order of the RDF file.
+
+        The names of the shards are written to a manifest file in the
+        directory (see MANIFEST_NAME). The shards listed in the manifest of
+        a previous export to the same directory are removed first; other
+        files are left untouched.
+
+        Args:
+            rdf_file: RDF file.
+            output_dir: directory for the shards; created if necessary.
+            n_jobs: number of processes.
+
+        Returns:
+            The shard files, in the order of the reactions.
+        """
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        self._remove_previous_shards(output_dir)
+
+        if n_jobs > 1 and not supports_parallel_reading(rdf_file):
+            logger.warning(
+                f'"{rdf_file}" can only be decompressed sequentially, exporting '
+                "it with one process."
+            )
+            n_jobs = 1
+
+        if n_jobs > 1:
+            shard_files = self._export_file_in_parallel(rdf_file, output_dir, n_jobs)
+        else:
+            shard_files = self.export(RdfParser(rdf_file), output_dir, "part-00000")
+
+        logger.info(
+            f"Finished export to {len(shard_files)} shards. Successful: "
+            f"{self.successful_reactions} / {self.total_reactions}."
+        )
+        (output_dir / MANIFEST_NAME).write_text(
+            "".join(f"{path.name}\n" for path in shard_files)
+        )
+        return shard_files
+
+    def _remove_previous_shards(self, output_dir: Path) -> None:
+        """Remove the shards of a previous export, listed in its manifest,
+        which would otherwise be mixed with the new ones (f.i. after an
+        export with more ranges)."""
+        manifest = output_dir / MANIFEST_NAME
+        if not manifest.exists():
+            return
+        previous_shards = manifest.read_text().splitlines()
+        logger.info(
+            f"Removing the {len(previous_shards)} shards of the previous export "
+            f'in "{output_dir}".'
+        )
+        for name in previous_shards:
+            if Path(name).name != name:
+                # Only files of the output directory
+                continue
+            try:
+                (output_dir / name).unlink()
+            except FileNotFoundError:
+                pass
+        manifest.unlink()
+
+    def _export_file_in_parallel(
+        self, rdf_file: Union[Path, str], output_dir: Path, n_jobs: int
+    ) -> List[Path]:
+        if is_compressed(rdf_file):
+            file_size = load_or_build_rdf_index(rdf_file).content_size
+        else:
+            file_size = Path(rdf_file).stat().st_size
+        n_ranges = max(4 * n_jobs, file_size // MAX_RANGE_BYTES + 1)
+        byte_ranges = split_rdf_file(rdf_file, n_ranges)
+
+        # One exporter per worker, kept between byte ranges for its cache
+        create_exporter = partial(
+            RdfExporter,
+            fields=self.field_specs,
+            output_format=self.output_format,
+            max_shard_bytes=self.max_shard_bytes,
+            fragment_bond=self.extractor.fragment_bond,
+            sanitize=self.extractor.sanitize,
+        )
+        shard_files: List[Path] = []
+        executor = ProcessExecutor(n_jobs)
+        for result in executor.imap(
+            partial(
+                _export_byte_range_in_worker, rdf_file=rdf_file, output_dir=output_dir
+            ),
+            enumerate(byte_ranges),
+            initializer=create_exporter,
+        ):
+            self.total_reactions += result.total_reactions
+            self.successful_reactions += result.successful_reactions
+            shard_files.extend(result.shard_files)
+        return shard_files
+
+
+@define
+class _RangeExport:
+    """Results of the export of a byte range in a worker process."""
+
+    shard_files: List[Path]
+    total_reactions: int
+    successful_reactions: int
+
+
+def _export_byte_range_in_worker(
+    exporter: RdfExporter,
+    indexed_range: Tuple[int, Tuple[int, int]],
+    rdf_file: Union[Path, str],
+    output_dir: Path,
+) -> _RangeExport:
+    """Export the reactions in a byte range, in a worker process."""
+    range_index, byte_range = indexed_range
+    total, successful = exporter.total_reactions, exporter.successful_reactions
+    reactions = RdfParser(rdf_file).iter_byte_range(*byte_range)
+    shard_files = exporter.export(reactions, output_dir, f"part-{range_index:05d}")
+    return _RangeExport(
+        shard_files=shard_files,
+        total_reactions=exporter.total_reactions - total,
+        successful_reactions=exporter.successful_reactions - successful,
+    )
+
+
+def export_rdf_file(
+    rdf_file: Union[Path, str],
+    output_dir: Union[Path, str],
+    fields: Iterable[str] = DEFAULT_FIELDS,
+    output_format: str = "jsonl",
+    max_shard_bytes: int = 256 * 1024 * 1024,
+    fragment_bond: str = "~",
+    n_jobs: int = 1,
+) -> RdfExporter:
+    """
+    Export an RDF file to JSONL or CSV shards, as rxn-rdf-export.
+
+    Args:
+        rdf_file: RDF file.
+        output_dir: directory for the shards.
+        fields: specifications of the columns, see ``ExportField.from_spec``.
+        output_format: "jsonl" or "csv".
+        max_shard_bytes: maximal size of the shards.
+        fragment_bond: fragment bond to use in the reaction SMILES.
+        n_jobs: number of processes.
+
+    Returns:
+        The exporter, giving access to the export statistics.
+    """
+    exporter = RdfExporter(
+        fields=fields,
+        output_format=output_format,
+        max_shard_bytes=max_shard_bytes,
+        fragment_bond=fragment_bond,
+    )
+    exporter.export_file(rdf_file, output_dir, n_jobs=n_jobs)
+    return exporter
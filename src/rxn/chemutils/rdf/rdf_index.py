@@ -0,0 +1,396 @@
+"""
+Byte-offset index of the reactions in an RDF file, for random access.
+
+The index is stored in a binary sidecar file (by default, the RDF file name
+with an additional ".idx" suffix), with 24 bytes per reaction: the RIREG, the
+byte offset of the "$RFMT" line, and the length of the record in bytes.
+For compressed files, the offsets refer to the decompressed content, and the
+index also contains the checkpoints for restarting the decompression of
+gzip files.
+"""
+
+import bisect
+import io
+import logging
+import mmap
+import os
+import re
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import (
+    IO,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from .compression import (
+    Checkpoint,
+    ChunkReader,
+    compression_suffix,
+    is_compressed,
+    iter_gzip_chunks,
+    open_rdf_file,
+)
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+INDEX_SUFFIX = ".idx"
+
+_MAGIC = b"RDFIDX03"
+# magic, number of reactions, size and modification time (in nanoseconds) of
+# the indexed RDF file, number of checkpoints
+_HEADER = struct.Struct("<8sQQqQ")
+_RIREG_BYTES_REGEX = re.compile(rb"\$RFMT \$[RM]IREG (\d+)")
+
+
+class RdfIndexError(RuntimeError):
+    """Exception raised for invalid RDF index files or RDF files."""
+
+
+class RdfIndex:
+    """
+    Position, byte offset and length of every reaction of an RDF file.
+
+    Positions refer to the order of the reactions in the file (0-based);
+    the reaction indices are the RIREG values.
+    """
+
+    def __init__(
+        self,
+        reaction_indices: Iterable[int],
+        offsets: Iterable[int],
+        lengths: Iterable[int],
+        file_size: int,
+        checkpoints: Sequence[Checkpoint] = (),
+        file_mtime_ns: int = 0,
+    ):
+        """
+        Args:
+            reaction_indices: RIREG of the reactions, in the order of the file.
+            offsets: byte offsets of the reactions.
+            lengths: lengths in bytes of the reactions.
+            file_size: size of the indexed file, to detect outdated indices.
+            checkpoints: for gzip files, the compressed and decompressed
+                offsets of the gzip members.
+            file_mtime_ns: modification time of the indexed file, in
+                nanoseconds, to detect outdated indices.
+        """
+        self.reaction_indices = array("Q", reaction_indices)
+        self.offsets = array("Q", offsets)
+        self.lengths = array("Q", lengths)
+        self.file_size = file_size
+        self.file_mtime_ns = file_mtime_ns
+        self.checkpoints = list(checkpoints)
+        if not len(self.reaction_indices) == len(self.offsets) == len(self.lengths):
+            raise RdfIndexError("Inconsistent number of entries in the RDF index.")
+
+        self._positions: Optional[Dict[int, int]] = None
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    @property
+    def content_size(self) -> int:
+        """Size of the (decompressed) content until the end of the last reaction."""
+        if len(self) == 0:
+            return 0
+        return self.offsets[-1] + self.lengths[-1]
+
+    def entry(self, position: int) -> Tuple[int, int, int]:
+        """Get the RIREG, offset and length of the reaction at the given position."""
+        return (
+            self.reaction_indices[position],
+            self.offsets[position],
+            self.lengths[position],
+        )
+
+    def position(self, reaction_index: int) -> int:
+        """
+        Get the position of a reaction in the file from its RIREG.
+
+        For duplicate RIREGs, the first occurrence is returned.
+
+        Raises:
+            KeyError: if no reaction has this RIREG.
+        """
+        if self._positions is None:
+            positions: Dict[int, int] = {}
+            for position, rireg in enumerate(self.reaction_indices):
+                positions.setdefault(rireg, position)
+            self._positions = positions
+        return self._positions[reaction_index]
+
+    def save(self, path: Union[Path, str]) -> None:
+        """Write the index to a sidecar file."""
+        with open(path, "wb") as f:
+            f.write(
+                _HEADER.pack(
+                    _MAGIC,
+                    len(self),
+                    self.file_size,
+                    self.file_mtime_ns,
+                    len(self.checkpoints),
+                )
+            )
+            for values in (self.reaction_indices, self.offsets, self.lengths):
+                f.write(_to_little_endian(values).tobytes())
+            for checkpoint_values in zip(*self.checkpoints):
+                f.write(_to_little_endian(array("Q", checkpoint_values)).tobytes())
+
+    @classmethod
+    def load(cls, path: Union[Path, str]) -> "RdfIndex":
+        """
+        Read an index from a sidecar file.
+
+        Raises:
+            RdfIndexError: if the file is not a valid index file.
+        """
+        with open(path, "rb") as f:
+            header = f.read(_HEADER.size)
+            if len(header) != _HEADER.size:
+                raise RdfIndexError(f'Truncated RDF index file "{path}".')
+            (
+                magic,
+                n_reactions,
+                file_size,
+                file_mtime_ns,
+                n_checkpoints,
+            ) = _HEADER.unpack(header)
+            if magic != _MAGIC:
+                raise RdfIndexError(f'"{path}" is not an RDF index file.')
+
+            columns = []
+            for n_values in [n_reactions] * 3 + [n_checkpoints] * 2:
+                values = array("Q")
+                try:
+                    values.fromfile(f, n_values)
+                except EOFError as e:
+                    raise RdfIndexError(f'Truncated RDF index file "{path}".') from e
+                columns.append(_to_little_endian(values))
+        reaction_indices, offsets, lengths, compressed, decompressed = columns
+        return cls(
+            reaction_indices,
+            offsets,
+            lengths,
+            file_size=file_size,
+            checkpoints=list(zip(compressed, decompressed)),
+            file_mtime_ns=file_mtime_ns,
+        )
+
+
+def default_index_path(rdf_file: Union[Path, str]) -> Path:
+    """Get the default location of the index sidecar file for an RDF file."""
+    rdf_file = Path(rdf_file)
+    return rdf_file.with_name(rdf_file.name + INDEX_SUFFIX)
+
+
+def build_rdf_index(rdf_file: Union[Path, str]) -> RdfIndex:
+    """
+    Scan an RDF file once and index the byte ranges of its reactions.
+
+    A reaction starts with a "$RFMT" line and extends until the next one, or
+    until the end of the file.
+
+    Raises:
+        RdfIndexError: for "$RFMT" lines without a valid RIREG.
+    """
+    if is_compressed(rdf_file):
+        return _build_compressed_rdf_index(rdf_file)
+
+    with open(rdf_file, "rb") as f:
+        stat = os.fstat(f.fileno())
+        if stat.st_size == 0:
+            return RdfIndex([], [], [], file_size=0, file_mtime_ns=stat.st_mtime_ns)
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return _index_from_rfmt_lines(
+                _iter_rfmt_lines(mm), content_size=stat.st_size, stat=stat
+            )
+
+
+def _build_compressed_rdf_index(rdf_file: Union[Path, str]) -> RdfIndex:
+    checkpoints: List[Checkpoint] = []
+    with open(rdf_file, "rb") as raw:
+        if compression_suffix(rdf_file) == ".gz":
+            chunk_reader = ChunkReader(iter_gzip_chunks(raw, checkpoints))
+            f: IO[bytes] = io.BufferedReader(chunk_reader)
+        else:
+            f = open_rdf_file(rdf_file, "rb")
+
+        rfmt_lines = []
+        content_size = 0
+        with f:
+            for line in f:
+                if line.startswith(b"$RFMT"):
+                    rfmt_lines.append((content_size, line.rstrip()))
+                content_size += len(line)
+        stat = os.fstat(raw.fileno())
+
+    index = _index_from_rfmt_lines(rfmt_lines, content_size=content_size, stat=stat)
+    index.checkpoints = checkpoints
+    return index
+
+
+def _index_from_rfmt_lines(
+    rfmt_lines: Iterable[Tuple[int, bytes]], content_size: int, stat: os.stat_result
+) -> RdfIndex:
+    reaction_indices = []
+    offsets = []
+    for offset, line in rfmt_lines:
+        match = _RIREG_BYTES_REGEX.match(line)
+        if match is None:
+            raise RdfIndexError(f"Invalid $RFMT line at byte {offset}: {line!r}")
+        reaction_indices.append(int(match.group(1)))
+        offsets.append(offset)
+
+    ends = offsets[1:] + [content_size]
+    lengths = [end - start for start, end in zip(offsets, ends)]
+    return RdfIndex(
+        reaction_indices,
+        offsets,
+        lengths,
+        file_size=stat.st_size,
+        file_mtime_ns=stat.st_mtime_ns,
+    )
+
+
+def split_rdf_file(rdf_file: Union[Path, str], n_ranges: int) -> List[Tuple[int, int]]:
+    """
+    Split an RDF file into byte ranges of similar sizes, each of them
+    starting at a "$RFMT" line, for processing them independently.
+
+    The header of the file, before the first reaction, is not part of any
+    range. Fewer ranges than requested are returned for small files.
+
+    Args:
+        rdf_file: RDF file.
+        n_ranges: number of ranges to split the file into.
+
+    Returns:
+        List of (start, end) byte offsets, in the order of the file.
+    """
+    if is_compressed(rdf_file):
+        return _split_index(load_or_build_rdf_index(rdf_file), n_ranges)
+
+    with open(rdf_file, "rb") as f:
+        file_size = f.seek(0, 2)
+        if file_size == 0:
+            return []
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            first = 0 if mm[:5] == b"$RFMT" else _next_rfmt_line(mm, 0)
+            if first == -1:
+                return []
+
+            boundaries = [first]
+            for i in range(1, n_ranges):
+                target = first + i * (file_size - first) // n_ranges
+                boundary = _next_rfmt_line(mm, max(target - 1, boundaries[-1]))
+                if boundary == -1:
+                    break
+                if boundary > boundaries[-1]:
+                    boundaries.append(boundary)
+    boundaries.append(file_size)
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def supports_parallel_reading(rdf_file: Union[Path, str]) -> bool:
+    """
+    Whether the byte ranges of an RDF file can be read independently: this
+    is the case for plain files, and gzip files with several members.
+    """
+    if not is_compressed(rdf_file):
+        return True
+    return len(load_or_build_rdf_index(rdf_file).checkpoints) > 1
+
+
+def _split_index(index: RdfIndex, n_ranges: int) -> List[Tuple[int, int]]:
+    if len(index) == 0:
+        return []
+    first = index.offsets[0]
+    content_size = index.content_size
+
+    boundaries = [first]
+    for i in range(1, n_ranges):
+        target = first + i * (content_size - first) // n_ranges
+        position = bisect.bisect_left(index.offsets, target)
+        if position == len(index):
+            break
+        if index.offsets[position] > boundaries[-1]:
+            boundaries.append(index.offsets[position])
+    boundaries.append(content_size)
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def load_or_build_rdf_index(
+    rdf_file: Union[Path, str], index_file: Optional[Union[Path, str]] = None
+) -> RdfIndex:
+    """
+    Load the index of an RDF file, or build it and save it if it does not
+    exist or is outdated.
+
+    Failing to save the index (f.i. for a read-only directory) is not an
+    error; the index is then only kept in memory.
+
+    Args:
+        rdf_file: RDF file.
+        index_file: location of the sidecar file. Defaults to the RDF file
+            name with the ".idx" suffix.
+    """
+    if index_file is None:
+        index_file = default_index_path(rdf_file)
+
+    stat = Path(rdf_file).stat()
+    if Path(index_file).exists():
+        try:
+            index = RdfIndex.load(index_file)
+            # The size alone does not detect edits keeping it
+            if (index.file_size, index.file_mtime_ns) == (
+                stat.st_size,
+                stat.st_mtime_ns,
+            ):
+                return index
+            logger.warning(f'Outdated RDF index "{index_file}", rebuilding it.')
+        except RdfIndexError as e:
+            logger.warning(f"{e} Rebuilding it.")
+
+    logger.info(f'Indexing "{rdf_file}"...')
+    index = build_rdf_index(rdf_file)
+    try:
+        index.save(index_file)
+        logger.info(f'Saved the RDF index to "{index_file}".')
+    except OSError as e:
+        logger.warning(f'Cannot save the RDF index to "{index_file}": {e}')
+    return index
+
+
+def _iter_rfmt_lines(mm: mmap.mmap) -> Iterator[Tuple[int, bytes]]:
+    """Find the offsets and contents of the lines starting with "$RFMT"."""
+    position = 0 if mm[:5] == b"$RFMT" else _next_rfmt_line(mm, 0)
+    while position != -1:
+        line_end = mm.find(b"\n", position)
+        if line_end == -1:
+            line_end = len(mm)
+        yield position, mm[position:line_end].rstrip()
+        position = _next_rfmt_line(mm, line_end)
+
+
+def _next_rfmt_line(mm: mmap.mmap, start: int) -> int:
+    newline = mm.find(b"\n$RFMT", start)
+    return newline if newline == -1 else newline + 1
+
+
+def _to_little_endian(values: "array[int]") -> "array[int]":
+    if sys.byteorder == "big":
+        values = array("Q", values)
+        values.byteswap()
+    return values
@@ -1,10 +1,42 @@
+import fnmatch
+import io
+import mmap
 import re
+from functools import lru_cache
 from pathlib import Path
-from typing import Callable, Iterator, List, Optional, Union
+from time import perf_counter
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 
 from rxn.utilities.regex import capturing
 
-from .rdf_reaction import RdfReaction
+from ..profiling import StageProfiler
+from .byte_scanner import (
+    RdfBlock,
+    iter_byte_blocks,
+    iter_byte_records,
+    iter_mmap_blocks,
+    iter_stream_blocks,
+    iter_stream_records,
+)
+from .compression import RandomAccessReader, is_compressed, open_rdf_file
+from .rdf_index import RdfIndex, load_or_build_rdf_index
+from .rdf_reaction import LazyMeta, RdfReaction
+
+if TYPE_CHECKING:
+    # Not imported at runtime, as the pre-filter relies on this module
+    from .pre_filter import RdfPreFilter
 
 
 class RdfParsingError(RuntimeError):
@@ -14,10 +46,13 @@ class RdfParsingError(RuntimeError):
 class InvalidBlock(RdfParsingError):
     """Exception raised when a block of an RDF file cannot be processed."""
 
-    def __init__(self, lines: List[str]):
+    def __init__(self, lines: Sequence[str]):
         self.lines = lines
         super().__init__("Invalid block:\n" + "\n".join(lines))
 
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return type(self), (self.lines,)
+
 
 class IncompleteReaction(RdfParsingError):
     """Exception for incomplete reaction in RDF file."""
@@ -34,15 +69,30 @@ class ParsedReaction:
     Reaction under construction during parsing of an RDF file.
     """
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        lazy_meta: bool = False,
+        meta_key_filter: Optional[Callable[[str], bool]] = None,
+    ) -> None:
+        """
+        Args:
+            lazy_meta: whether to keep the raw DATUM blocks, converted to
+                strings only when accessed in the meta of the reaction.
+            meta_key_filter: if specified, only the DTYPEs for which it
+                returns True are kept in the meta of the reaction.
+        """
+        self.lazy_meta = lazy_meta
+        self.meta_key_filter = meta_key_filter
         self.rireg: Optional[int] = None
         self.n_precursors: Optional[int] = None
         self.n_products: Optional[int] = None
         self.mols: List[str] = []
         self.dtypes: List[str] = []
-        self.datums: List[str] = []
+        # None for the DATUMs of DTYPEs excluded by the filter
+        self.datums: List[Optional[str]] = []
+        self.raw_datums: List[Optional[Sequence[str]]] = []
 
-    def handle_line_block(self, lines: List[str]) -> None:
+    def handle_line_block(self, lines: Sequence[str]) -> None:
         block_type = self.block_type(lines)
         if block_type == "RFMT":
             self.handle_rfmt(lines)
@@ -57,48 +107,54 @@ class ParsedReaction:
         else:
             raise ValueError(f"Invalid block type: {block_type}")
 
-    def handle_rfmt(self, lines: List[str]) -> None:
-        if len(lines) != 1:
+    def handle_rfmt(self, lines: Sequence[str]) -> None:
+        first_line, rest = _split_first_line(lines)
+        if rest is not None:
             raise InvalidBlock(lines)
-        match = RIREG_REGEX.match(lines[0])
+        match = RIREG_REGEX.match(first_line)
         if match is None:
             raise InvalidBlock(lines)
         self.rireg = int(match.group(1))
 
-    def handle_rxn(self, lines: List[str]) -> None:
+    def handle_rxn(self, lines: Sequence[str]) -> None:
         if len(lines) != 5:
             raise InvalidBlock(lines)
 
         self.n_precursors, self.n_products = [int(x) for x in lines[4].split()]
 
-    def handle_mol(self, lines: List[str]) -> None:
-        self.mols.append("\n".join(lines[1:]))
+    def handle_mol(self, lines: Sequence[str]) -> None:
+        _, rest = _split_first_line(lines)
+        self.mols.append(rest or "")
 
-    def handle_dtype(self, lines: List[str]) -> None:
-        if len(lines) != 1:
+    def handle_dtype(self, lines: Sequence[str]) -> None:
+        first_line, rest = _split_first_line(lines)
+        if rest is not None:
             raise InvalidBlock(lines)
 
-        match = DTYPE_REGEX.match(lines[0])
+        match = DTYPE_REGEX.match(first_line)
         if match is None:
             raise InvalidBlock(lines)
         self.dtypes.append(match.group(1))
 
-    def handle_datum(self, lines: List[str]) -> None:
-        match = DATUM_REGEX.match(lines[0])
-        if match is None:
-            raise InvalidBlock(lines)
-        lines[0] = match.group(1)
-
-        # special case: leave out $MFMT, otherwise the property will not be
-        # valid MolBlocks for parsing with RDKit.
-        if lines[0] == "$MFMT":
-            lines = lines[1:]
-
-        self.datums.append("\n".join(lines))
+    def handle_datum(self, lines: Sequence[str]) -> None:
+        datums: List[Any] = self.raw_datums if self.lazy_meta else self.datums
+
+        # Skip the DATUMs not needed, without looking at them
+        n_datums = len(datums)
+        if (
+            self.meta_key_filter is not None
+            and n_datums < len(self.dtypes)
+            and not self.meta_key_filter(self.dtypes[n_datums])
+        ):
+            datums.append(None)
+        elif self.lazy_meta:
+            datums.append(lines)
+        else:
+            datums.append(datum_value(lines))
 
-    def block_type(self, lines: List[str]) -> str:
+    def block_type(self, lines: Sequence[str]) -> str:
         """Get the type of a block: RXN, DTYPE, DATUM, etc."""
-        match = BLOCK_TYPE_REGEX.match(lines[0])
+        match = BLOCK_TYPE_REGEX.match(_first_line(lines))
         if match is None:
             raise InvalidBlock(lines)
         return match.group(1)
@@ -113,10 +169,24 @@ class ParsedReaction:
         precursors = self.mols[: self.n_precursors]
         products = self.mols[-self.n_products :]
 
-        if len(self.dtypes) != len(self.datums):
-            raise RdfParsingError()
-
-        meta = {key: value for key, value in zip(self.dtypes, self.datums)}
+        meta: Dict[str, str]
+        if self.lazy_meta:
+            if len(self.dtypes) != len(self.raw_datums):
+                raise RdfParsingError()
+            raw_meta = {
+                key: lines
+                for key, lines in zip(self.dtypes, self.raw_datums)
+                if lines is not None
+            }
+            meta = LazyMeta(raw_meta, datum_value)
+        else:
+            if len(self.dtypes) != len(self.datums):
+                raise RdfParsingError()
+            meta = {
+                key: value
+                for key, value in zip(self.dtypes, self.datums)
+                if value is not None
+            }
 
         return RdfReaction(
             reactants=precursors,
@@ -127,20 +197,89 @@ class ParsedReaction:
         )
 
 
+def _profiled(method_name: str) -> Callable[..., Any]:
+    """Wrap a method of ParsedReaction to time it with the profiler."""
+    method = getattr(ParsedReaction, method_name)
+    stage = f"rdf.{method_name}"
+
+    def profiled(self: "_ProfiledParsedReaction", *args: Any) -> Any:
+        start = perf_counter()
+        result = method(self, *args)
+        self.profiler.add(stage, perf_counter() - start)
+        return result
+
+    return profiled
+
+
+class _ProfiledParsedReaction(ParsedReaction):
+    """ParsedReaction timing its handling of every block type."""
+
+    def __init__(self, profiler: StageProfiler, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.profiler = profiler
+
+    handle_rfmt = _profiled("handle_rfmt")
+    handle_rxn = _profiled("handle_rxn")
+    handle_mol = _profiled("handle_mol")
+    handle_dtype = _profiled("handle_dtype")
+    handle_datum = _profiled("handle_datum")
+    to_reaction = _profiled("to_reaction")
+
+
 class RdfParser:
     """
     Custom parser for RDF files.
     """
 
-    def __init__(self, filename: Union[Path, str], encoding: str = "latin-1"):
+    def __init__(
+        self,
+        filename: Union[Path, str],
+        encoding: str = "latin-1",
+        index_file: Optional[Union[Path, str]] = None,
+        use_mmap: bool = False,
+        lazy_meta: bool = False,
+        meta_keys: Optional[Iterable[str]] = None,
+        pre_filter: Optional["RdfPreFilter"] = None,
+        profiler: Optional[StageProfiler] = None,
+    ):
         """
         Args:
-            filename: path to the RDF file to read.
+            filename: path to the RDF file to read. Files with the ".gz",
+                ".bz2" or ".xz" suffixes are decompressed on the fly.
             encoding: file encoding. Defaults to latin-1 because Thieme has such
                 an encoding for several files.
+            index_file: location of the byte-offset index, needed for random
+                access with ``get`` and ``iter_range``. Defaults to the RDF file
+                name with the ".idx" suffix. Built and saved on first use if it
+                does not exist.
+            use_mmap: whether to map the file in memory and scan it at the byte
+                level, instead of reading it line by line. The blocks are then
+                ``RdfBlock`` instances, decoded only when used. Compressed files
+                cannot be mapped; the decompressed stream is scanned instead.
+            lazy_meta: whether the meta of the reactions should keep the raw
+                DATUM blocks and convert them to strings only when accessed.
+                With use_mmap, the DATUMs are then not even decoded.
+            meta_keys: if specified, only the DTYPEs matching these keys are
+                kept in the meta of the reactions. Wildcards such as in
+                "RXN:*:MOLSTRUCTURE" are supported.
+            pre_filter: if specified, the reactions not fulfilling its
+                conditions are skipped based on their raw bytes, before
+                being split into blocks. The file is then always scanned at
+                the byte level, as with use_mmap.
+            profiler: if specified, records the time spent reading the blocks
+                ("rdf.blocks") and handling them, per block type.
         """
         self.filename = filename
         self.encoding = encoding
+        self.index_file = index_file
+        self.use_mmap = use_mmap
+        self.lazy_meta = lazy_meta
+        self.meta_key_filter = (
+            None if meta_keys is None else meta_key_filter_from_patterns(meta_keys)
+        )
+        self.pre_filter = pre_filter
+        self.profiler = profiler
+        self._index: Optional[RdfIndex] = None
 
     def __iter__(self) -> Iterator[RdfReaction]:
         yield from self.iter_reactions()
@@ -152,47 +291,333 @@ class RdfParser:
         # Consume line with DATM
         _ = next(block_iterator)
 
-        current_reaction = None
-        for lines in block_iterator:
-            if lines[0].startswith("$RFMT"):
-                # A new reaction started.
-                # We yield the current one before initializing the new one
-                if current_reaction is not None:
-                    yield current_reaction.to_reaction()
-                current_reaction = ParsedReaction()
+        yield from self._iter_reactions_from_blocks(block_iterator)
+
+    def iter_blocks(self) -> Iterator[Sequence[str]]:
+        if self.pre_filter is not None:
+            yield from self._iter_prefiltered_blocks(self.pre_filter)
+            return
+        if self.use_mmap and is_compressed(self.filename):
+            with open_rdf_file(self.filename, "rb") as f:
+                yield from iter_stream_blocks(f, self.encoding)
+            return
+        if self.use_mmap:
+            yield from iter_mmap_blocks(self.filename, self.encoding)
+            return
+
+        with open_rdf_file(self.filename, "rt", encoding=self.encoding) as f:
+            yield from _iter_line_blocks(f)
+
+    def _iter_prefiltered_blocks(
+        self, pre_filter: "RdfPreFilter"
+    ) -> Iterator[RdfBlock]:
+        if is_compressed(self.filename):
+            with open_rdf_file(self.filename, "rb") as f:
+                for record in iter_stream_records(f):
+                    yield from _iter_prefiltered_blocks(
+                        record, self.encoding, pre_filter
+                    )
+            return
+
+        with open(self.filename, "rb") as f:
+            if f.seek(0, 2) == 0:
+                # Empty files cannot be mapped
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                yield from _iter_prefiltered_blocks(mm, self.encoding, pre_filter)
+
+    @property
+    def index(self) -> RdfIndex:
+        """Byte-offset index of the reactions, loaded or built on first use."""
+        if self._index is None:
+            self._index = load_or_build_rdf_index(self.filename, self.index_file)
+        return self._index
+
+    def get(self, reaction_index: int) -> RdfReaction:
+        """
+        Get a reaction from its reaction index (RIREG), without parsing the
+        reactions before it.
+
+        Raises:
+            KeyError: if there is no reaction with this index, or if it is
+                rejected by the pre-filter.
+        """
+        position = self.index.position(reaction_index)
+        reaction = next(self.iter_range(position, position + 1), None)
+        if reaction is None:
+            raise KeyError(reaction_index)
+        return reaction
+
+    def iter_range(
+        self, start: int, stop: Optional[int] = None
+    ) -> Iterator[RdfReaction]:
+        """
+        Iterate over the reactions at the given positions in the file, without
+        parsing the reactions before them.
+
+        Args:
+            start: position (0-based) of the first reaction.
+            stop: position after the last reaction. Defaults to the end of the file.
+        """
+        start, stop, _ = slice(start, stop).indices(len(self.index))
+        with self._random_access_reader() as reader:
+            for position in range(start, stop):
+                reaction_index, offset, length = self.index.entry(position)
+                if self.pre_filter is None:
+                    yield self._parse_reaction(reader.read(offset, length))
+                    continue
+
+                # No need to read the reactions with other RIREGs
+                if not self.pre_filter.accepts_reaction_index(reaction_index):
+                    continue
+                data = reader.read(offset, length)
+                if self.pre_filter.matches(data, self.encoding):
+                    yield self._parse_reaction(data)
+
+    def iter_raw_bytes(
+        self, positions: Iterable[int], chunk_size: int = 1 << 22
+    ) -> Iterator[bytes]:
+        """
+        Iterate over the raw content of the reactions at the given positions,
+        for copying them without parsing them.
+
+        Consecutive reactions are read together, in chunks of at most
+        ``chunk_size`` bytes; the chunks do not necessarily end at the end of
+        a reaction. A line break is added after the last reaction of the file
+        if it is missing. Increasing positions are the most efficient,
+        especially for compressed files.
+
+        Args:
+            positions: positions (0-based) of the reactions.
+            chunk_size: maximal number of bytes per chunk.
+        """
+        with self._random_access_reader() as reader:
+            for start, end in _merge_byte_ranges(self.index, positions):
+                while start < end:
+                    data = reader.read(start, min(chunk_size, end - start))
+                    if not data:
+                        raise RdfParsingError(
+                            f'"{self.filename}" is shorter than in its index.'
+                        )
+                    yield data
+                    start += len(data)
+                # The last reaction of a file may lack the final line break
+                if not data.endswith(b"\n"):
+                    yield b"\n"
+
+    def iter_byte_range(self, start: int, end: int) -> Iterator[RdfReaction]:
+        """
+        Iterate over the reactions contained in a range of bytes of the file.
+
+        For compressed files, the offsets refer to the decompressed content.
+
+        Args:
+            start: offset of the first reaction; must be at the start of
+                a "$RFMT" line.
+            end: offset after the last reaction; must be at the start of
+                a "$RFMT" line, or at the end of the file.
+        """
+        use_mmap = self.use_mmap or self.pre_filter is not None
+        if use_mmap and not is_compressed(self.filename):
+            with open(self.filename, "rb") as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    yield from self._iter_reactions_from_blocks(
+                        self._iter_buffer_blocks(mm, start, end)
+                    )
+            return
+
+        with self._random_access_reader() as reader:
+            yield from self._iter_reactions_from_blocks(
+                self._iter_data_blocks(reader.read(start, end - start))
+            )
+
+    def _new_reaction(self) -> ParsedReaction:
+        if self.profiler is not None:
+            return _ProfiledParsedReaction(
+                self.profiler,
+                lazy_meta=self.lazy_meta,
+                meta_key_filter=self.meta_key_filter,
+            )
+        return ParsedReaction(
+            lazy_meta=self.lazy_meta, meta_key_filter=self.meta_key_filter
+        )
+
+    def _iter_reactions_from_blocks(
+        self, blocks: Iterable[Sequence[str]]
+    ) -> Iterator[RdfReaction]:
+        if self.profiler is not None:
+            blocks = self.profiler.time_iterator("rdf.blocks", blocks)
+        return _iter_reactions_from_blocks(blocks, self._new_reaction)
+
+    def _random_access_reader(self) -> RandomAccessReader:
+        # The checkpoints are only needed (and the index only built) for gzip
+        checkpoints = self.index.checkpoints if is_compressed(self.filename) else []
+        return RandomAccessReader(self.filename, checkpoints)
+
+    def _parse_reaction(self, data: bytes) -> RdfReaction:
+        reaction = self._new_reaction()
+        for lines in self._iter_data_blocks(data):
+            reaction.handle_line_block(lines)
+        return reaction.to_reaction()
+
+    def _iter_data_blocks(self, data: bytes) -> Iterator[Sequence[str]]:
+        if self.use_mmap or self.pre_filter is not None:
+            return self._iter_buffer_blocks(data)
+        return _iter_line_blocks(io.TextIOWrapper(io.BytesIO(data), self.encoding))
+
+    def _iter_buffer_blocks(
+        self, buffer: Union[bytes, mmap.mmap], start: int = 0, end: int = -1
+    ) -> Iterator[RdfBlock]:
+        if self.pre_filter is None:
+            return iter_byte_blocks(buffer, self.encoding, start, end)
+        return _iter_prefiltered_blocks(
+            buffer, self.encoding, self.pre_filter, start, end
+        )
+
+
+def datum_value(lines: Sequence[str]) -> str:
+    """Get the value of a DATUM block, as given in the meta of the reactions."""
+    first_line, rest = _split_first_line(lines)
+    match = DATUM_REGEX.match(first_line)
+    if match is None:
+        raise InvalidBlock(lines)
+    first_line = match.group(1)
+
+    # special case: leave out $MFMT, otherwise the property will not be
+    # valid MolBlocks for parsing with RDKit.
+    if first_line == "$MFMT":
+        return rest or ""
+    elif rest is None:
+        return first_line
+    else:
+        return first_line + "\n" + rest
 
-            if current_reaction is None:
-                raise RuntimeError("No reaction block started")
 
-            current_reaction.handle_line_block(lines)
+def meta_key_filter_from_patterns(patterns: Iterable[str]) -> Callable[[str], bool]:
+    """
+    Get a function telling whether a DTYPE matches one of the given
+    patterns, such as "RXN:VARIATION(1):YIELD" or "RXN:*:MOLSTRUCTURE".
+
+    Args:
+        patterns: DTYPEs, possibly with the wildcards of ``fnmatch``.
+    """
+    regex = re.compile("|".join(fnmatch.translate(pattern) for pattern in patterns))
+    # The same DTYPEs occur in many reactions
+    return lru_cache(maxsize=100000)(lambda key: regex.match(key) is not None)
+
 
-        # yield the last reaction
-        if current_reaction is not None:
-            yield current_reaction.to_reaction()
+def _first_line(lines: Sequence[str]) -> str:
+    """Get the first line of a block, without splitting lazy blocks into lines."""
+    if isinstance(lines, RdfBlock):
+        return lines.first_line
+    return lines[0]
 
-    def iter_blocks(self) -> Iterator[List[str]]:
-        current_line_block: List[str] = []
-        with open(self.filename, "rt", encoding=self.encoding) as f:
-            for line in f:
-                line = line.rstrip("\n")
 
-                if line.startswith("$"):
-                    if current_line_block:
-                        yield current_line_block
-                        current_line_block = []
+def _split_first_line(lines: Sequence[str]) -> Tuple[str, Optional[str]]:
+    """Get the first line of a block, and the other ones joined (None if absent)."""
+    if isinstance(lines, RdfBlock):
+        return lines.split_first_line()
+    rest = "\n".join(lines[1:]) if len(lines) > 1 else None
+    return lines[0], rest
 
-                current_line_block.append(line)
 
-        # Last line block at the end of the file
-        if current_line_block:
-            yield current_line_block
+def _iter_reactions_from_blocks(
+    block_iterator: Iterable[Sequence[str]],
+    new_reaction: Callable[[], ParsedReaction] = ParsedReaction,
+) -> Iterator[RdfReaction]:
+    """Assemble reactions from blocks, each reaction starting with "$RFMT"."""
+    current_reaction = None
+    for lines in block_iterator:
+        if _first_line(lines).startswith("$RFMT"):
+            # A new reaction started.
+            # We yield the current one before initializing the new one
+            if current_reaction is not None:
+                yield current_reaction.to_reaction()
+            current_reaction = new_reaction()
+
+        if current_reaction is None:
+            raise RuntimeError("No reaction block started")
+
+        current_reaction.handle_line_block(lines)
+
+    # yield the last reaction
+    if current_reaction is not None:
+        yield current_reaction.to_reaction()
+
+
+def _merge_byte_ranges(
+    index: RdfIndex, positions: Iterable[int]
+) -> Iterator[Tuple[int, int]]:
+    """Get the byte ranges of reactions, merging the contiguous ones."""
+    start = end = -1
+    for position in positions:
+        _, offset, length = index.entry(position)
+        if offset == end:
+            end += length
+            continue
+        if end != -1:
+            yield start, end
+        start, end = offset, offset + length
+    if end != -1:
+        yield start, end
+
+
+def _iter_prefiltered_blocks(
+    buffer: Union[bytes, mmap.mmap],
+    encoding: str,
+    pre_filter: "RdfPreFilter",
+    start: int = 0,
+    end: int = -1,
+) -> Iterator[RdfBlock]:
+    """
+    Iterate over the blocks of the records accepted by the pre-filter; the
+    other records are skipped without being split into blocks.
+
+    The file header, before the first "$RFMT" line, is always kept.
+    """
+    for record_start, record_end in iter_byte_records(buffer, start, end):
+        if buffer[record_start : record_start + 5] == b"$RFMT" and not (
+            pre_filter.matches(buffer, encoding, record_start, record_end)
+        ):
+            continue
+        yield from iter_byte_blocks(buffer, encoding, record_start, record_end)
+
+
+def _iter_line_blocks(lines: Iterable[str]) -> Iterator[List[str]]:
+    """Group lines into blocks, each of them starting with a "$" line."""
+    current_line_block: List[str] = []
+    for line in lines:
+        line = line.rstrip("\n")
+
+        if line.startswith("$"):
+            if current_line_block:
+                yield current_line_block
+                current_line_block = []
+
+        current_line_block.append(line)
+
+    # Last line block at the end of the file
+    if current_line_block:
+        yield current_line_block
 
 
 def iterate_reactions_from_file(
     filename: Union[Path, str],
     filter_fn: Optional[Callable[[RdfReaction], bool]] = None,
+    pre_filter: Optional["RdfPreFilter"] = None,
+    profiler: Optional[StageProfiler] = None,
 ) -> Iterator[RdfReaction]:
-    parser = RdfParser(filename)
+    """
+    Iterate over the reactions of an RDF file.
+
+    Args:
+        filename: RDF file.
+        filter_fn: function to filter the parsed reactions.
+        pre_filter: conditions on the raw records, evaluated before parsing
+            them; cheaper than filter_fn for the fields it supports.
+        profiler: if specified, records the time spent per parsing stage.
+    """
+    parser = RdfParser(filename, pre_filter=pre_filter, profiler=profiler)
     reactions = (entry for entry in parser.iter_reactions())
 
     if filter_fn is not None:
@@ -1,8 +1,119 @@
-from typing import Dict, List
+from typing import Any, Callable, Dict, Iterator, List, Tuple
 
 from attr import define
 
 
+class LazyMeta(Dict[str, str]):
+    """
+    Meta information of a reaction, with the values materialized only
+    when accessed.
+
+    All the keys are present from the start. Single values are materialized
+    by ``meta[key]`` and ``get``; the other operations reading or modifying
+    the values (iteration over the items, comparison, updates, etc.)
+    materialize all of them first, after which this is a plain dict.
+    """
+
+    def __init__(self, raw_values: Dict[str, Any], materialize: Callable[[Any], str]):
+        """
+        Args:
+            raw_values: raw values (f.i. DATUM blocks), for every key.
+            materialize: function converting a raw value to the string value.
+        """
+        # The values not materialized yet are empty strings in the dict
+        super().__init__(dict.fromkeys(raw_values, ""))
+        self._pending = dict(raw_values)
+        self._materialize = materialize
+
+    def __getitem__(self, key: str) -> str:
+        if key in self._pending:
+            value = self._materialize(self._pending.pop(key))
+            super().__setitem__(key, value)
+            return value
+        return super().__getitem__(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def materialize_all(self) -> None:
+        """Materialize all the values not accessed yet."""
+        for key in list(self._pending):
+            self[key]
+
+    def __iter__(self) -> Iterator[str]:
+        # Overridden so that dict(meta) and {**meta} go through __getitem__
+        return super().__iter__()
+
+    def values(self) -> Any:
+        self.materialize_all()
+        return super().values()
+
+    def items(self) -> Any:
+        self.materialize_all()
+        return super().items()
+
+    def copy(self) -> Dict[str, str]:
+        self.materialize_all()
+        return dict(super().items())
+
+    def __eq__(self, other: object) -> bool:
+        self.materialize_all()
+        if isinstance(other, LazyMeta):
+            other.materialize_all()
+        return super().__eq__(other)
+
+    def __ne__(self, other: object) -> bool:
+        return not self == other
+
+    def __or__(self, other: Any) -> Any:
+        return self.copy() | other
+
+    def __ror__(self, other: Any) -> Any:
+        return other | self.copy()
+
+    def __setitem__(self, key: str, value: str) -> None:
+        self._pending.pop(key, None)
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key: str) -> None:
+        self._pending.pop(key, None)
+        super().__delitem__(key)
+
+    def pop(self, *args: Any) -> Any:
+        self.materialize_all()
+        return super().pop(*args)
+
+    def popitem(self) -> Tuple[str, str]:
+        self.materialize_all()
+        return super().popitem()
+
+    def setdefault(self, *args: Any) -> Any:
+        self.materialize_all()
+        return super().setdefault(*args)
+
+    def update(self, *args: Any, **kwargs: Any) -> None:
+        self.materialize_all()
+        super().update(*args, **kwargs)
+
+    def __ior__(self, other: Any) -> Any:
+        self.update(other)
+        return self
+
+    def clear(self) -> None:
+        self._pending.clear()
+        super().clear()
+
+    def __reduce__(self) -> Any:
+        return dict, (self.copy(),)
+
+    def __repr__(self) -> str:
+        self.materialize_all()
+        return super().__repr__()
+
+
 @define
 class RdfReaction:
     """
@@ -12,7 +123,7 @@ class RdfReaction:
         reactants: List of reactants, given in MDL format.
         reagents: List of reagents, given in MDL format.
         products: List of products, given in MDL format.
-        meta: meta information.
+        meta: meta information; may be a LazyMeta instance (a dict).
         reaction_index: index of the reaction, coming from the "$RFMT $RIREG" line.
     """
 
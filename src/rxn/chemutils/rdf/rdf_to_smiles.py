@@ -0,0 +1,556 @@
+import json
+import logging
+import os
+from collections import Counter
+from functools import partial
+from itertools import islice
+from pathlib import Path
+from time import perf_counter
+from typing import (
+    IO,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+import attr
+from attr import define
+
+from ..executors import ProcessExecutor
+from ..profiling import StageProfiler
+from .compression import is_compressed
+from .rdf_index import (
+    RdfIndex,
+    load_or_build_rdf_index,
+    split_rdf_file,
+    supports_parallel_reading,
+)
+from .rdf_parser import RdfParser, iterate_reactions_from_file
+from .rdf_reaction import RdfReaction
+from .reaction_smiles_extractor import (
+    MolBlockCacheInfo,
+    ProfiledReactionSmilesExtractor,
+    ReactionSmilesExtractor,
+)
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+# Maximal size of the byte ranges converted by the worker processes
+MAX_RANGE_BYTES = 64 * 1024 * 1024
+
+# Stages of the conversion at which a reaction can fail
+STAGE_PROPERTIES = "properties"
+STAGE_MOLBLOCKS = "molblocks"
+STAGE_REACTION_SMILES = "reaction_smiles"
+
+CHECKPOINT_SUFFIX = ".checkpoint.json"
+FAILURES_SUFFIX = ".failures.jsonl"
+PROFILE_SUFFIX = ".profile.json"
+
+
+@define
+class ConversionFailure:
+    """
+    Reaction that could not be converted to SMILES.
+
+    Attributes:
+        reaction_index: RIREG of the reaction.
+        error_type: class name of the exception.
+        message: message of the exception.
+        stage: stage at which the conversion failed (STAGE_* constants).
+    """
+
+    reaction_index: int
+    error_type: str
+    message: str
+    stage: str
+
+    def to_json(self) -> str:
+        return json.dumps(attr.asdict(self))
+
+
+@define
+class ConversionCheckpoint:
+    """
+    State of an interrupted conversion of an RDF file.
+
+    Attributes:
+        rdf_size: size of the RDF file, to detect modifications.
+        total_reactions: number of reactions processed, from the start of
+            the RDF file.
+        reaction_index: RIREG of the last processed reaction.
+        successful_reactions: number of reactions converted successfully.
+        output_offset: size of the SMILES file.
+        failures_offset: size of the failure file.
+        failure_counts: number of failures per error class.
+        finished: whether the conversion is complete.
+    """
+
+    rdf_size: int
+    total_reactions: int
+    reaction_index: Optional[int]
+    successful_reactions: int
+    output_offset: int
+    failures_offset: int
+    failure_counts: Dict[str, int]
+    finished: bool = False
+
+    def save(self, path: Union[Path, str]) -> None:
+        """Write the checkpoint, atomically."""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wt") as f:
+            json.dump(attr.asdict(self), f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Union[Path, str]) -> "ConversionCheckpoint":
+        with open(path, "rt") as f:
+            return cls(**json.load(f))
+
+
+def default_checkpoint_path(smiles_file: Union[Path, str]) -> Path:
+    """Get the default location of the checkpoint of a conversion."""
+    smiles_file = Path(smiles_file)
+    return smiles_file.with_name(smiles_file.name + CHECKPOINT_SUFFIX)
+
+
+def default_failures_path(smiles_file: Union[Path, str]) -> Path:
+    """Get the default location of the failures of a conversion (JSONL)."""
+    smiles_file = Path(smiles_file)
+    return smiles_file.with_name(smiles_file.name + FAILURES_SUFFIX)
+
+
+def default_profile_path(smiles_file: Union[Path, str]) -> Path:
+    """Get the default location of the profile of a conversion (JSON)."""
+    smiles_file = Path(smiles_file)
+    return smiles_file.with_name(smiles_file.name + PROFILE_SUFFIX)
+
+
+@define
+class _Batch:
+    """Results of the conversion of consecutive reactions."""
+
+    smiles: List[str]
+    failures: List[ConversionFailure]
+    total_reactions: int
+    successful_reactions: int
+    last_reaction_index: Optional[int]
+    cache_hits: int = 0
+    cache_misses: int = 0
+    # Timings of the worker processes, for profiled parallel conversions
+    profile: Optional[Dict[str, Any]] = None
+
+
+class RdfToSmilesConverter:
+    """
+    Convert RDF reactions to reaction SMILES, ignoring the ones causing an
+    error and keeping track of the number of successful conversions.
+    """
+
+    def __init__(
+        self,
+        fragment_bond: Optional[str] = "~",
+        sanitize: bool = False,
+        cache_size: int = 10000,
+        profile: bool = False,
+    ):
+        """
+        Args:
+            fragment_bond: fragment bond to use in the reaction SMILES.
+            sanitize: whether to sanitize the molecules when converting them.
+            cache_size: size of the cache of MolBlock conversions, per process.
+            profile: whether to record the time spent in the parsing and
+                conversion stages, available in the ``profiler`` attribute.
+        """
+        self.profiler = StageProfiler() if profile else None
+        self.extractor: ReactionSmilesExtractor
+        if self.profiler is not None:
+            self.extractor = ProfiledReactionSmilesExtractor(
+                self.profiler,
+                fragment_bond=fragment_bond,
+                sanitize=sanitize,
+                cache_size=cache_size,
+            )
+        else:
+            self.extractor = ReactionSmilesExtractor(
+                fragment_bond=fragment_bond, sanitize=sanitize, cache_size=cache_size
+            )
+        self.total_reactions = 0
+        self.successful_reactions = 0
+        self.last_reaction_index: Optional[int] = None
+        self.failure_counts: Counter[str] = Counter()
+        # Where to send the failures; if None, they are logged as warnings
+        self.failure_sink: Optional[Callable[[ConversionFailure], None]] = None
+        # Cache statistics of the worker processes, for parallel conversions
+        self._worker_cache_hits = 0
+        self._worker_cache_misses = 0
+
+    def cache_info(self) -> MolBlockCacheInfo:
+        """Statistics about the MolBlock cache, including the worker processes."""
+        info = self.extractor.cache_info()
+        info.hits += self._worker_cache_hits
+        info.misses += self._worker_cache_misses
+        return info
+
+    def convert(self, rdfs: Iterable[RdfReaction]) -> Iterator[str]:
+        """Convert reactions, ignoring the ones causing an error."""
+        for rdf in rdfs:
+            self.total_reactions += 1
+            self.last_reaction_index = rdf.reaction_index
+            stage = STAGE_PROPERTIES
+            try:
+                reagents = self.extractor.reagent_mdls(rdf)
+                stage = STAGE_MOLBLOCKS
+                reaction_equation = self.extractor.mdls_to_reaction_equation(
+                    rdf.reactants, reagents, rdf.products
+                )
+                stage = STAGE_REACTION_SMILES
+                smiles = self.extractor.to_string(reaction_equation)
+            except Exception as e:
+                self._handle_failure(
+                    ConversionFailure(
+                        reaction_index=rdf.reaction_index,
+                        error_type=type(e).__name__,
+                        message=str(e),
+                        stage=stage,
+                    )
+                )
+                continue
+            self.successful_reactions += 1
+            yield smiles
+
+    def convert_file(
+        self,
+        rdf_file: Union[Path, str],
+        smiles_file: Union[Path, str],
+        n_jobs: int = 1,
+        resume: bool = False,
+        failures_file: Optional[Union[Path, str]] = None,
+        checkpoint_interval: int = 10000,
+    ) -> None:
+        """
+        Convert an RDF file to a file with one reaction SMILES per line.
+
+        The failed reactions are written to a JSONL file, and the progress
+        is saved regularly to a checkpoint file next to the SMILES file, so
+        that an interrupted conversion can be resumed.
+
+        Args:
+            rdf_file: RDF file.
+            smiles_file: where to write the reaction SMILES.
+            n_jobs: number of processes. For more than one, the file is split
+                into byte ranges converted independently, and the results are
+                written in the original order.
+            resume: whether to continue from the checkpoint of an interrupted
+                conversion, if there is one.
+            failures_file: where to write the failed reactions. Defaults to the
+                SMILES file name with the ".failures.jsonl" suffix.
+            checkpoint_interval: number of reactions between checkpoints, for
+                sequential conversions; parallel ones save a checkpoint after
+                every byte range.
+
+        Raises:
+            ValueError: if the RDF file does not match the checkpoint.
+        """
+        if n_jobs > 1 and not supports_parallel_reading(rdf_file):
+            logger.warning(
+                f'"{rdf_file}" can only be decompressed sequentially, converting '
+                "it with one process. Compress it with write_seekable_gzip for "
+                "parallel conversions."
+            )
+            n_jobs = 1
+
+        if failures_file is None:
+            failures_file = default_failures_path(smiles_file)
+        checkpoint_file = default_checkpoint_path(smiles_file)
+        rdf_size = Path(rdf_file).stat().st_size
+
+        checkpoint = None
+        if resume and checkpoint_file.exists():
+            checkpoint = ConversionCheckpoint.load(checkpoint_file)
+            if checkpoint.finished:
+                logger.info(f'The conversion to "{smiles_file}" is already finished.')
+                self._restore(checkpoint)
+                return
+        elif resume:
+            logger.info(f'No checkpoint "{checkpoint_file}", starting from scratch.')
+
+        start_offset = 0
+        if checkpoint is not None:
+            start_offset = self._restore_checkpoint(checkpoint, rdf_file, rdf_size)
+            logger.info(
+                f"Resuming after reaction {checkpoint.reaction_index} "
+                f"({checkpoint.total_reactions} reactions already processed)."
+            )
+
+        with _open_output(
+            smiles_file, checkpoint.output_offset if checkpoint else None
+        ) as smiles_out, _open_output(
+            failures_file, checkpoint.failures_offset if checkpoint else None
+        ) as failures_out:
+            if n_jobs > 1:
+                batches = self._convert_file_in_parallel(rdf_file, n_jobs, start_offset)
+            else:
+                batches = self._convert_file_sequentially(
+                    rdf_file, start_offset, checkpoint_interval
+                )
+            for batch in batches:
+                smiles_out.write("".join(f"{s}\n" for s in batch.smiles).encode())
+                failures_out.write(
+                    "".join(f"{f.to_json()}\n" for f in batch.failures).encode()
+                )
+                smiles_out.flush()
+                failures_out.flush()
+                self._checkpoint(rdf_size, smiles_out, failures_out).save(
+                    checkpoint_file
+                )
+
+            final_checkpoint = self._checkpoint(rdf_size, smiles_out, failures_out)
+            final_checkpoint.finished = True
+            final_checkpoint.save(checkpoint_file)
+
+        self._log_summary(failures_file)
+
+    def _handle_failure(self, failure: ConversionFailure) -> None:
+        self.failure_counts[failure.error_type] += 1
+        if self.failure_sink is not None:
+            self.failure_sink(failure)
+        else:
+            logger.warning(
+                f"Cannot convert reaction {failure.reaction_index}: {failure.message}"
+            )
+
+    def _convert_batch(self, rdfs: Iterable[RdfReaction]) -> _Batch:
+        """Convert reactions, collecting the results and the failures."""
+        total, successful = self.total_reactions, self.successful_reactions
+        cache_info = self.cache_info()
+        failures: List[ConversionFailure] = []
+        failure_sink, self.failure_sink = self.failure_sink, failures.append
+        try:
+            smiles = list(self.convert(rdfs))
+        finally:
+            self.failure_sink = failure_sink
+
+        new_cache_info = self.cache_info()
+        return _Batch(
+            smiles=smiles,
+            failures=failures,
+            total_reactions=self.total_reactions - total,
+            successful_reactions=self.successful_reactions - successful,
+            last_reaction_index=self.last_reaction_index,
+            cache_hits=new_cache_info.hits - cache_info.hits,
+            cache_misses=new_cache_info.misses - cache_info.misses,
+        )
+
+    def _convert_file_sequentially(
+        self, rdf_file: Union[Path, str], start_offset: int, checkpoint_interval: int
+    ) -> Iterator[_Batch]:
+        if start_offset == 0:
+            reactions = iterate_reactions_from_file(rdf_file, profiler=self.profiler)
+        else:
+            end = load_or_build_rdf_index(rdf_file).content_size
+            parser = RdfParser(rdf_file, profiler=self.profiler)
+            reactions = parser.iter_byte_range(start_offset, end)
+
+        while True:
+            batch = self._convert_batch(islice(reactions, checkpoint_interval))
+            if batch.total_reactions == 0:
+                return
+            yield batch
+
+    def _convert_file_in_parallel(
+        self, rdf_file: Union[Path, str], n_jobs: int, start_offset: int
+    ) -> Iterator[_Batch]:
+        # Several ranges per process, for load balancing, but not too large
+        # ones, as every range is read in memory at once.
+        if is_compressed(rdf_file):
+            file_size = load_or_build_rdf_index(rdf_file).content_size
+        else:
+            file_size = Path(rdf_file).stat().st_size
+        n_ranges = max(4 * n_jobs, file_size // MAX_RANGE_BYTES + 1)
+        byte_ranges = [
+            (max(start, start_offset), end)
+            for start, end in split_rdf_file(rdf_file, n_ranges)
+            if end > start_offset
+        ]
+
+        # One converter per worker, kept between byte ranges for its cache
+        create_converter = partial(
+            RdfToSmilesConverter,
+            fragment_bond=self.extractor.fragment_bond,
+            sanitize=self.extractor.sanitize,
+            cache_size=self.extractor.cache_size,
+            profile=self.profiler is not None,
+        )
+        executor = ProcessExecutor(n_jobs)
+        for batch in executor.imap(
+            partial(_convert_byte_range_in_worker, rdf_file=rdf_file),
+            byte_ranges,
+            initializer=create_converter,
+        ):
+            self.total_reactions += batch.total_reactions
+            self.successful_reactions += batch.successful_reactions
+            if batch.last_reaction_index is not None:
+                self.last_reaction_index = batch.last_reaction_index
+            self.failure_counts.update(f.error_type for f in batch.failures)
+            self._worker_cache_hits += batch.cache_hits
+            self._worker_cache_misses += batch.cache_misses
+            if self.profiler is not None and batch.profile is not None:
+                self.profiler.merge(batch.profile)
+            yield batch
+
+    def _checkpoint(
+        self, rdf_size: int, smiles_out: IO[bytes], failures_out: IO[bytes]
+    ) -> ConversionCheckpoint:
+        return ConversionCheckpoint(
+            rdf_size=rdf_size,
+            total_reactions=self.total_reactions,
+            reaction_index=self.last_reaction_index,
+            successful_reactions=self.successful_reactions,
+            output_offset=smiles_out.tell(),
+            failures_offset=failures_out.tell(),
+            failure_counts=dict(self.failure_counts),
+        )
+
+    def _restore(self, checkpoint: ConversionCheckpoint) -> None:
+        self.total_reactions = checkpoint.total_reactions
+        self.successful_reactions = checkpoint.successful_reactions
+        self.last_reaction_index = checkpoint.reaction_index
+        self.failure_counts = Counter(checkpoint.failure_counts)
+
+    def _restore_checkpoint(
+        self,
+        checkpoint: ConversionCheckpoint,
+        rdf_file: Union[Path, str],
+        rdf_size: int,
+    ) -> int:
+        """Restore the state from a checkpoint, and get the offset to resume from."""
+        if checkpoint.rdf_size != rdf_size:
+            raise ValueError(
+                f'"{rdf_file}" was modified since the checkpoint: its size '
+                f"changed from {checkpoint.rdf_size} to {rdf_size} bytes."
+            )
+        index = load_or_build_rdf_index(rdf_file)
+        _check_last_reaction(index, checkpoint)
+        self._restore(checkpoint)
+
+        if checkpoint.total_reactions == len(index):
+            return index.content_size
+        return index.offsets[checkpoint.total_reactions]
+
+    def _log_summary(self, failures_file: Union[Path, str]) -> None:
+        logger.info(
+            f"Finished conversion. Successful: {self.successful_reactions} / "
+            f"{self.total_reactions}."
+        )
+        if self.failure_counts:
+            counts = ", ".join(
+                f"{error_type}: {count}"
+                for error_type, count in self.failure_counts.most_common()
+            )
+            logger.info(f'Failures by error class: {counts}. See "{failures_file}".')
+        cache_info = self.cache_info()
+        logger.info(
+            f"MolBlock cache: {cache_info.hits} hits, {cache_info.misses} misses "
+            f"(hit rate: {cache_info.hit_rate:.1%})."
+        )
+
+
+def _check_last_reaction(index: RdfIndex, checkpoint: ConversionCheckpoint) -> None:
+    n_reactions = checkpoint.total_reactions
+    if n_reactions == 0:
+        return
+    if (
+        n_reactions > len(index)
+        or index.reaction_indices[n_reactions - 1] != checkpoint.reaction_index
+    ):
+        raise ValueError(
+            f"The RDF file does not match the checkpoint: reaction {n_reactions} "
+            f"should have the RIREG {checkpoint.reaction_index}."
+        )
+
+
+def _open_output(path: Union[Path, str], offset: Optional[int]) -> IO[bytes]:
+    """Open an output file, truncated at the given offset (None to overwrite it)."""
+    if offset is None:
+        return open(path, "wb")
+    f = open(path, "r+b")
+    f.truncate(offset)
+    f.seek(offset)
+    return f
+
+
+def _convert_byte_range_in_worker(
+    converter: RdfToSmilesConverter,
+    byte_range: Tuple[int, int],
+    rdf_file: Union[Path, str],
+) -> _Batch:
+    """Convert the reactions in a byte range, in a worker process."""
+    # Reset, so that the last reaction index is the one of this range
+    converter.last_reaction_index = None
+    reactions = RdfParser(rdf_file, profiler=converter.profiler).iter_byte_range(
+        *byte_range
+    )
+    batch = converter._convert_batch(reactions)
+
+    # Send the timings of this range only
+    if converter.profiler is not None:
+        batch.profile = converter.profiler.to_dict()
+        converter.profiler.reset()
+    return batch
+
+
+def convert_rdf_to_smiles(
+    rdf_file: Union[Path, str],
+    smiles_file: Union[Path, str],
+    fragment_bond: str = "~",
+    n_jobs: int = 1,
+    resume: bool = False,
+    failures_file: Optional[Union[Path, str]] = None,
+    profile: bool = False,
+) -> RdfToSmilesConverter:
+    """
+    Convert a file of RDF reactions to SMILES format, as rxn-rdf-to-smiles.
+
+    Args:
+        rdf_file: RDF file.
+        smiles_file: where to write the reaction SMILES.
+        fragment_bond: fragment bond to use in the reaction SMILES.
+        n_jobs: number of processes for the conversion.
+        resume: whether to continue an interrupted conversion.
+        failures_file: where to write the failed reactions (JSONL).
+        profile: whether to record the time spent per stage, logged as a
+            table at the end and saved next to the SMILES file (with the
+            ".profile.json" suffix).
+
+    Returns:
+        The converter, giving access to the conversion statistics.
+    """
+    converter = RdfToSmilesConverter(fragment_bond=fragment_bond, profile=profile)
+    start = perf_counter()
+    converter.convert_file(
+        rdf_file,
+        smiles_file,
+        n_jobs=n_jobs,
+        resume=resume,
+        failures_file=failures_file,
+    )
+
+    if converter.profiler is not None:
+        # Wall-clock time; with several processes, the stages add up the
+        # time of all of them.
+        converter.profiler.add("rdf_to_smiles.total", perf_counter() - start)
+        profile_file = default_profile_path(smiles_file)
+        converter.profiler.save_json(profile_file)
+        logger.info(
+            f"Time per stage:\n{converter.profiler.summary_table()}\n"
+            f'Saved to "{profile_file}".'
+        )
+    return converter
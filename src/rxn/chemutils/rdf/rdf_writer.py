@@ -0,0 +1,135 @@
+"""
+Streaming writer of RDF files, in the format read by ``RdfParser``.
+"""
+
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import IO, Any, Dict, Iterable, List, Mapping, Optional, Union
+
+from .compression import open_rdf_file
+from .property_parser import serialize_properties
+from .rdf_parser import RdfParser
+from .rdf_reaction import RdfReaction
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+class RdfWriter:
+    """
+    Write reactions to an RDF file, one at a time.
+
+    Reactions can either be serialized from RdfReaction objects, or be
+    copied from another RDF file as raw bytes, which is much faster for
+    reactions that were not modified:
+
+        parser = RdfParser("input.rdf")
+        kept = [position for position, r in enumerate(parser) if keep(r)]
+        with RdfWriter("output.rdf") as writer:
+            writer.copy_reactions(parser, kept)
+    """
+
+    def __init__(
+        self,
+        filename: Union[Path, str],
+        encoding: str = "latin-1",
+        date: Optional[datetime] = None,
+    ):
+        """
+        Args:
+            filename: where to write the RDF file. Files with the ".gz",
+                ".bz2" or ".xz" suffixes are compressed on the fly.
+            encoding: file encoding.
+            date: date for the header of the file. Defaults to the current time.
+        """
+        self.filename = filename
+        self.encoding = encoding
+        self.n_reactions = 0
+        self._file: IO[bytes] = open_rdf_file(filename, "wb")
+
+        if date is None:
+            date = datetime.now()
+        self._write_text(f"$RDFILE 1\n$DATM {date:%d-%b-%Y %H:%M:%S}\n".upper())
+
+    def write(
+        self, reaction: RdfReaction, properties: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """
+        Serialize a reaction.
+
+        Args:
+            reaction: reaction to write.
+            properties: if specified, nested properties (as returned by
+                ``parse_properties``) to write instead of the meta of the
+                reaction, f.i. after editing them.
+
+        Raises:
+            ValueError: for reactions with reagents, which the RDF format
+                only supports as part of the meta.
+        """
+        if reaction.reagents:
+            raise ValueError(
+                "RDF records do not support reagents outside of the meta: "
+                f"reaction {reaction.reaction_index} has {len(reaction.reagents)}."
+            )
+        meta = reaction.meta if properties is None else serialize_properties(properties)
+        self._write_text(_format_record(reaction, meta))
+        self.n_reactions += 1
+
+    def write_raw(self, data: bytes) -> None:
+        """Write raw bytes of reactions, as obtained from another RDF file."""
+        self._file.write(data)
+
+    def copy_reactions(self, parser: RdfParser, positions: Iterable[int]) -> None:
+        """
+        Copy reactions from another RDF file without parsing them.
+
+        Args:
+            parser: parser for the source file, used for its index.
+            positions: positions of the reactions to copy in the source file
+                (0-based). Increasing positions are most efficient.
+        """
+        positions = list(positions)
+        for data in parser.iter_raw_bytes(positions):
+            self.write_raw(data)
+        self.n_reactions += len(positions)
+
+    def close(self) -> None:
+        self._file.close()
+        logger.info(f'Wrote {self.n_reactions} reactions to "{self.filename}".')
+
+    def __enter__(self) -> "RdfWriter":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def _write_text(self, text: str) -> None:
+        self._file.write(text.encode(self.encoding))
+
+
+def _format_record(reaction: RdfReaction, meta: Mapping[str, str]) -> str:
+    lines: List[str] = [
+        f"$RFMT $RIREG {reaction.reaction_index}",
+        "$RXN",
+        "",
+        "",
+        "",
+        f"{len(reaction.reactants):3d}{len(reaction.products):3d}",
+    ]
+    for mol in reaction.reactants + reaction.products:
+        lines.append("$MOL")
+        lines.append(mol)
+    for key, value in meta.items():
+        lines.append(f"$DTYPE {key}")
+        lines.append(_format_datum(value))
+    lines.append("")
+    return "\n".join(lines)
+
+
+def _format_datum(value: str) -> str:
+    # MolBlocks are preceded by "$MFMT", as in the vendor files
+    if value.endswith("M  END"):
+        return "$DATUM $MFMT\n" + value
+    return "$DATUM " + value
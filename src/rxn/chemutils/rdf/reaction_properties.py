@@ -1,8 +1,9 @@
-from typing import Any, Dict, Iterator, Optional, Tuple
+from functools import lru_cache
+from typing import Any, Dict, Iterator, Mapping, Optional, Tuple
 
 import attr
 
-from .property_parser import parse_properties
+from .property_parser import TokenizedKey, TriePropertyParser, tokenize_property_key
 
 
 @attr.s(auto_attribs=True)
@@ -52,9 +53,10 @@ class ReactionProperties:
     Class compiling the reaction properties given for an RDF reaction.
     """
 
-    def __init__(self, meta: Dict[str, str]):
-        pruned_meta = self._prune_unnecessary_lists(meta)
-        parsed_properties = parse_properties(pruned_meta)
+    def __init__(self, meta: Mapping[str, str]):
+        parser = TriePropertyParser(tokenize=_tokenize_pruned_key)
+        parser.parse_dict(meta)
+        parsed_properties = parser.result
         try:
             self.properties: Dict[str, Any] = parsed_properties["RXN"]
         except KeyError:
@@ -72,20 +74,22 @@ class ReactionProperties:
             for cpd_dict, category in find_compounds_with_category(self.properties)
         )
 
-    def _prune_unnecessary_lists(self, meta: Dict[str, str]) -> Dict[str, str]:
-        """
-        In the meta dict, often there will be unnecessary list-like keys.
-        In particular, "MOL(1):" and "SYMBOL(1):" can be removed as they are
-        never necessary.
-        """
 
-        def simplify_key(key: str) -> str:
-            updated_key = key.replace("MOL(1):", "").replace("SYMBOL(1):", "")
-            if "MOL(" in updated_key or "SYMBOL(" in updated_key:
-                raise ValueError(f"MOL or SYMBOL list with index other than 1: {key}")
-            return updated_key
+def _prune_unnecessary_lists(key: str) -> str:
+    """
+    In the meta keys, often there will be unnecessary list-like segments.
+    In particular, "MOL(1):" and "SYMBOL(1):" can be removed as they are
+    never necessary.
+    """
+    updated_key = key.replace("MOL(1):", "").replace("SYMBOL(1):", "")
+    if "MOL(" in updated_key or "SYMBOL(" in updated_key:
+        raise ValueError(f"MOL or SYMBOL list with index other than 1: {key}")
+    return updated_key
+
 
-        return {simplify_key(key): value for key, value in meta.items()}
+@lru_cache(maxsize=100000)
+def _tokenize_pruned_key(key: str) -> TokenizedKey:
+    return tokenize_property_key(_prune_unnecessary_lists(key))
 
 
 def find_compounds(property_dict: Dict[str, Any]) -> Iterator[Dict[str, str]]:
@@ -97,7 +101,7 @@ def find_compounds(property_dict: Dict[str, Any]) -> Iterator[Dict[str, str]]:
 
 
 def find_compounds_with_category(
-    property_dict: Dict[str, Any]
+    property_dict: Dict[str, Any],
 ) -> Iterator[Tuple[Dict[str, str], str]]:
     """Iterate through a property dictionary to find compound dicts, with the
     associated category ("SOLVENT", "CATALYST", etc.)."""
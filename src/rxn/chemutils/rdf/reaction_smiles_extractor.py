@@ -1,44 +1,122 @@
-from typing import Iterable, List, Optional
+import hashlib
+from collections import OrderedDict
+from typing import Any, Iterable, List, Optional
+
+from attr import define
 
 from rxn.chemutils.reaction_equation import ReactionEquation
 
-from ..conversion import mdl_to_smiles
+from ..conversion import mdl_to_mol, mdl_to_smiles, mol_to_smiles
+from ..exceptions import InvalidMdl
+from ..profiling import StageProfiler
 from .rdf_reaction import RdfReaction
 from .reaction_properties import ReactionProperties
 
 
+@define
+class MolBlockCacheInfo:
+    """Statistics about the cache of MolBlock conversions."""
+
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+def molblock_cache_key(mdl: str) -> bytes:
+    """
+    Hash of a MolBlock, ignoring the lines that do not influence the
+    conversion to SMILES.
+
+    The name, header and comment lines are dropped, except for the
+    dimension code ("2D" or "3D") of the header line, which influences
+    the stereochemistry perception. In particular, this ignores the
+    timestamps in the header lines.
+    """
+    lines = mdl.split("\n", 3)
+    if len(lines) == 4:
+        mdl = lines[1][20:22] + "\n" + lines[3]
+    return hashlib.blake2b(mdl.encode("utf-8"), digest_size=16).digest()
+
+
 class ReactionSmilesExtractor:
     """Extract reaction SMILES from RdfReaction instances."""
 
-    def __init__(self, fragment_bond: Optional[str] = None, sanitize: bool = True):
+    def __init__(
+        self,
+        fragment_bond: Optional[str] = None,
+        sanitize: bool = True,
+        cache_size: int = 10000,
+    ):
+        """
+        Args:
+            fragment_bond: fragment bond to use in the reaction SMILES.
+            sanitize: whether to sanitize the molecules when converting them.
+            cache_size: number of MolBlock conversions (including failed ones)
+                to keep in memory, for the molecules that occur in many
+                reactions, such as solvents and catalysts. 0 to disable.
+        """
         self.fragment_bond = fragment_bond
         self.sanitize = sanitize
+        self.cache_size = cache_size
+        # For failed conversions, the value is None
+        self._cache: "OrderedDict[bytes, Optional[str]]" = OrderedDict()
+        self._cache_hits = 0
+        self._cache_misses = 0
 
-    def to_reaction_smiles(self, reaction: RdfReaction) -> str:
+    def to_reaction_smiles(
+        self, reaction: RdfReaction, properties: Optional[ReactionProperties] = None
+    ) -> str:
         """Extract the reaction SMILES.
 
         Args:
             reaction: RdfReaction to extract the reaction equation from.
+            properties: properties of the reaction, if already parsed.
         """
-        return self.to_string(self.to_reaction_equation(reaction))
+        return self.to_string(self.to_reaction_equation(reaction, properties))
 
-    def to_reaction_equation(self, reaction: RdfReaction) -> ReactionEquation:
+    def to_reaction_equation(
+        self, reaction: RdfReaction, properties: Optional[ReactionProperties] = None
+    ) -> ReactionEquation:
         """Extract the reaction equation.
 
         Args:
             reaction: RdfReaction to extract the reaction equation from.
+            properties: properties of the reaction, if already parsed.
         """
+        return self.mdls_to_reaction_equation(
+            reaction.reactants,
+            self.reagent_mdls(reaction, properties),
+            reaction.products,
+        )
 
+    def reagent_mdls(
+        self, reaction: RdfReaction, properties: Optional[ReactionProperties] = None
+    ) -> List[str]:
+        """Get the MolBlocks of the reagents, including the ones in the
+        reaction properties (solvents, catalysts, etc.).
+
+        The properties are parsed from the reaction unless given."""
+        if properties is None:
+            properties = ReactionProperties(reaction.meta)
         # NB: reaction.reagents should actually always be an empty list
         reagents = reaction.reagents.copy()
-        reagents.extend(
-            c.mol_structure for c in ReactionProperties(reaction.meta).get_compounds()
-        )
+        reagents.extend(c.mol_structure for c in properties.get_compounds())
+        return reagents
 
+    def mdls_to_reaction_equation(
+        self, reactants: List[str], reagents: List[str], products: List[str]
+    ) -> ReactionEquation:
+        """Convert the MolBlocks of a reaction to a reaction equation."""
         return ReactionEquation(
-            reactants=self._to_smiles_group(reaction.reactants),
+            reactants=self._to_smiles_group(reactants),
             agents=self._to_smiles_group(reagents),
-            products=self._to_smiles_group(reaction.products),
+            products=self._to_smiles_group(products),
         )
 
     def to_string(self, reaction_equation: ReactionEquation) -> str:
@@ -47,8 +125,80 @@ class ReactionSmilesExtractor:
         Useful function as it automatically uses the correct fragment bond."""
         return reaction_equation.to_string(fragment_bond=self.fragment_bond)
 
+    def cache_info(self) -> MolBlockCacheInfo:
+        """Statistics about the cache of MolBlock conversions."""
+        return MolBlockCacheInfo(
+            hits=self._cache_hits,
+            misses=self._cache_misses,
+            maxsize=self.cache_size,
+            currsize=len(self._cache),
+        )
+
     def _to_smiles(self, mdl: str) -> str:
+        if self.cache_size <= 0:
+            return self._to_smiles_uncached(mdl)
+
+        key = molblock_cache_key(mdl)
+        try:
+            smiles = self._cache[key]
+            self._cache.move_to_end(key)
+            self._cache_hits += 1
+        except KeyError:
+            self._cache_misses += 1
+            try:
+                smiles = self._to_smiles_uncached(mdl)
+            except InvalidMdl:
+                smiles = None
+            self._cache[key] = smiles
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+        if smiles is None:
+            raise InvalidMdl(mdl)
+        return smiles
+
+    def _to_smiles_uncached(self, mdl: str) -> str:
         return mdl_to_smiles(mdl, sanitize=self.sanitize, canonicalize=True)
 
     def _to_smiles_group(self, mdl_iterable: Iterable[str]) -> List[str]:
         return [self._to_smiles(m) for m in mdl_iterable]
+
+
+class ProfiledReactionSmilesExtractor(ReactionSmilesExtractor):
+    """
+    ReactionSmilesExtractor recording the time spent in every step:
+    parsing of the reaction properties, conversion of the MolBlocks (and,
+    for the ones not in the cache, MolBlock parsing and SMILES writing),
+    and serialization of the reaction SMILES.
+    """
+
+    def __init__(self, profiler: StageProfiler, **kwargs: Any):
+        """
+        Args:
+            profiler: where to record the timings.
+            kwargs: arguments for ReactionSmilesExtractor.
+        """
+        super().__init__(**kwargs)
+        self.profiler = profiler
+
+    def reagent_mdls(
+        self, reaction: RdfReaction, properties: Optional[ReactionProperties] = None
+    ) -> List[str]:
+        with self.profiler.timer("extractor.properties"):
+            return super().reagent_mdls(reaction, properties)
+
+    def mdls_to_reaction_equation(
+        self, reactants: List[str], reagents: List[str], products: List[str]
+    ) -> ReactionEquation:
+        with self.profiler.timer("extractor.molblocks"):
+            return super().mdls_to_reaction_equation(reactants, reagents, products)
+
+    def to_string(self, reaction_equation: ReactionEquation) -> str:
+        with self.profiler.timer("extractor.to_string"):
+            return super().to_string(reaction_equation)
+
+    def _to_smiles_uncached(self, mdl: str) -> str:
+        with self.profiler.timer("extractor.mdl_to_mol"):
+            mol = mdl_to_mol(mdl, sanitize=self.sanitize)
+        with self.profiler.timer("extractor.mol_to_smiles"):
+            return mol_to_smiles(mol, canonical=True)
@@ -13,6 +13,7 @@ from .extended_reaction_smiles import (
     parse_extended_reaction_smiles,
     to_extended_reaction_smiles,
 )
+from .profiling import profiled
 from .reaction_equation import ReactionEquation
 
 
@@ -33,6 +34,7 @@ class ReactionFormat(RxnEnum):
     STANDARD_WITH_TILDE = auto()
 
 
+@profiled()
 def determine_format(reaction_smiles: str) -> ReactionFormat:
     """
     Determine the format of a reaction SMILES.
@@ -53,6 +55,7 @@ def parse_any_reaction_smiles(smiles: str) -> ReactionEquation:
     return parse_reaction_smiles(smiles, reaction_format=determine_format(smiles))
 
 
+@profiled()
 def parse_reaction_smiles(
     smiles: str, reaction_format: ReactionFormat
 ) -> ReactionEquation:
@@ -71,6 +74,7 @@ def parse_reaction_smiles(
     raise ValueError(f"Unsupported reaction format: {reaction_format}")
 
 
+@profiled()
 def to_reaction_smiles(
     reaction_equation: ReactionEquation, reaction_format: ReactionFormat
 ) -> str:
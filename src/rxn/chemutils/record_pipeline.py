@@ -0,0 +1,155 @@
+"""
+Chains of processing stages applied to records (one SMILES string per line),
+such as "canonicalize | sort | dedup | tokenize", executed in one process
+or on one pool of worker processes, without intermediate files.
+"""
+
+from typing import Callable, Dict, Iterable, List, Optional, Union
+
+from .batch_processing import BatchProcessor
+from .standardization_pipeline import StandardizationPipeline, StandardizationStep
+from .tokenization import detokenize_smiles, tokenize_smiles
+
+STAGE_SEPARATOR = "|"
+
+# Stages acting on the whole record, as opposed to the standardization steps
+_RECORD_FUNCTIONS: Dict[str, Callable[[str], str]] = {
+    "tokenize": tokenize_smiles,
+    "detokenize": detokenize_smiles,
+}
+
+
+def available_stages() -> List[str]:
+    """Names of the stages that can be used in a RecordPipeline."""
+    return [step.to_string() for step in StandardizationStep] + list(_RECORD_FUNCTIONS)
+
+
+def parse_stages(stages: Union[str, Iterable[str]]) -> List[str]:
+    """
+    Get the names of the stages of a pipeline.
+
+    Args:
+        stages: stage names, or one string with the stages separated by
+            "|", such as "canonicalize | sort | tokenize".
+
+    Raises:
+        ValueError: for unknown stages, or if there is no stage.
+    """
+    if isinstance(stages, str):
+        stages = stages.split(STAGE_SEPARATOR)
+    names = [stage.strip().lower() for stage in stages if stage.strip()]
+    if not names:
+        raise ValueError("The pipeline has no stage.")
+
+    allowed = available_stages()
+    for name in names:
+        if name not in allowed:
+            raise ValueError(
+                f'Invalid stage: "{name}". Available stages: {", ".join(allowed)}.'
+            )
+    return names
+
+
+class RecordPipeline:
+    """
+    Apply a chain of stages to records.
+
+    Consecutive standardization steps (see StandardizationStep, f.i.
+    "canonicalize", "sort", "dedup") are executed by one
+    StandardizationPipeline, parsing every compound only once; "tokenize"
+    and "detokenize" act on the whole record.
+
+    Examples:
+        >>> pipeline = RecordPipeline("detokenize | canonicalize | tokenize")
+        >>> pipeline("O C C >> C ( C ) O")
+        'C C O >> C C O'
+    """
+
+    def __init__(self, stages: Union[str, Iterable[str]], check_valence: bool = True):
+        """
+        Args:
+            stages: stages, see ``parse_stages``.
+            check_valence: if False, the canonicalization will not do any
+                valence check.
+        """
+        self.stages = parse_stages(stages)
+        self.check_valence = check_valence
+        self._functions = self._compile(self.stages)
+
+    def __call__(self, record: str) -> str:
+        for function in self._functions:
+            record = function(record)
+        return record
+
+    def _compile(self, stages: List[str]) -> List[Callable[[str], str]]:
+        functions: List[Callable[[str], str]] = []
+        steps: List[str] = []
+        for stage in stages:
+            record_function = _RECORD_FUNCTIONS.get(stage)
+            if record_function is None:
+                steps.append(stage)
+                continue
+            if steps:
+                functions.append(self._standardization_pipeline(steps))
+                steps = []
+            functions.append(record_function)
+        if steps:
+            functions.append(self._standardization_pipeline(steps))
+        return functions
+
+    def _standardization_pipeline(self, steps: List[str]) -> StandardizationPipeline:
+        return StandardizationPipeline(steps, check_valence=self.check_valence)
+
+
+class BatchPipeline(BatchProcessor):
+    """
+    Apply a RecordPipeline to records one per line, in chunks that are
+    distributed over one pool of worker processes.
+
+    The output is identical for any number of processes, see BatchProcessor.
+    """
+
+    def __init__(
+        self,
+        stages: Union[str, Iterable[str]],
+        check_valence: bool = True,
+        invalid_placeholder: Optional[str] = None,
+        n_jobs: int = 1,
+        chunk_size: int = 1000,
+        progress_interval: float = 10.0,
+        timeout: Optional[float] = None,
+        backend: str = "process",
+        shared_memory: bool = False,
+    ):
+        """
+        Args:
+            stages: stages, see ``parse_stages``.
+            check_valence: if False, the canonicalization will not do any
+                valence check.
+            invalid_placeholder: output for the records that cannot be
+                processed. By default, the exception is raised.
+            n_jobs: number of workers. With 1, everything is done in the
+                current process.
+            chunk_size: number of lines sent to a worker process at once.
+            progress_interval: minimal number of seconds between progress
+                messages.
+            timeout: maximal number of seconds for one line, see
+                BatchProcessor. By default, no limit.
+            backend: "process" or "thread", see the executors module.
+            shared_memory: whether the worker processes send the results
+                through shared memory, see BatchProcessor.
+        """
+        self.pipeline = RecordPipeline(stages, check_valence=check_valence)
+        super().__init__(
+            init_kwargs=dict(stages=self.pipeline.stages, check_valence=check_valence),
+            invalid_placeholder=invalid_placeholder,
+            n_jobs=n_jobs,
+            chunk_size=chunk_size,
+            progress_interval=progress_interval,
+            timeout=timeout,
+            backend=backend,
+            shared_memory=shared_memory,
+        )
+
+    def process(self, record: str) -> str:
+        return self.pipeline(record)
@@ -0,0 +1,90 @@
+import logging
+from pathlib import Path
+from typing import Optional, Tuple
+
+import click
+from rxn.utilities.files import named_temporary_directory
+from rxn.utilities.logging import setup_console_logger
+
+from ..benchmarking import BENCHMARKS, build_corpus, run_suite, save_results
+from ..benchmarking.runner import format_results
+from ..profiling import disable_profiling, enable_profiling
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+@click.command()
+@click.option(
+    "--size", type=int, default=1000, help="Number of reaction SMILES to generate."
+)
+@click.option(
+    "--rdf_size",
+    type=int,
+    help="Number of reactions in the generated RDF file. Defaults to --size.",
+)
+@click.option("--seed", type=int, default=42, help="Random seed for the corpora.")
+@click.option(
+    "--benchmark",
+    "-b",
+    "benchmarks",
+    type=click.Choice(list(BENCHMARKS)),
+    multiple=True,
+    help="Benchmark(s) to run. Defaults to all of them.",
+)
+@click.option(
+    "--output",
+    "-o",
+    type=click.Path(writable=True, dir_okay=False, path_type=Path),
+    help="Where to save the results (JSON).",
+)
+@click.option(
+    "--no_memory", is_flag=True, help="Do not measure the peak memory (faster)."
+)
+@click.option(
+    "--profile",
+    type=click.Path(writable=True, dir_okay=False, path_type=Path),
+    help="Record the time spent in the instrumented functions (SMILES parsing, "
+    "sanitization, tokenization, etc.) and save it to this file, in the cProfile "
+    "format for the .prof suffix, as JSON otherwise. Slows the benchmarks down.",
+)
+def main(
+    size: int,
+    rdf_size: Optional[int],
+    seed: int,
+    benchmarks: Tuple[str, ...],
+    output: Optional[Path],
+    no_memory: bool,
+    profile: Optional[Path],
+) -> None:
+    """Benchmark the main functionality of the package on synthetic data.
+
+    Reports the throughput, the per-item latency percentiles, and the peak
+    memory, and optionally saves them as JSON for comparison between runs.
+    Does not require any network access."""
+    setup_console_logger()
+
+    with named_temporary_directory() as directory:
+        corpus = build_corpus(directory, size=size, rdf_size=rdf_size, seed=seed)
+        profiler = enable_profiling() if profile is not None else None
+        try:
+            results = run_suite(
+                corpus, names=benchmarks or None, measure_memory=not no_memory
+            )
+        finally:
+            disable_profiling()
+
+    click.echo(format_results(results))
+
+    if profile is not None and profiler is not None:
+        click.echo(profiler.summary_table())
+        profiler.save(profile)
+        logger.info(f'Saved the profile to "{profile}".')
+
+    if output is not None:
+        save_results(results, output)
+        logger.info(f'Saved the benchmark results to "{output}".')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import logging
+import sys
+from pathlib import Path
+from typing import Optional
+
+import click
+from rxn.utilities.files import named_temporary_directory
+from rxn.utilities.logging import setup_console_logger
+
+from ..benchmarking.regression import (
+    build_regression_workload,
+    check_same_workload,
+    compare_to_baseline,
+    load_baseline,
+    measure_entry_points,
+    save_baseline,
+)
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+@click.command()
+@click.option(
+    "--baseline",
+    "-b",
+    type=click.Path(dir_okay=False, path_type=Path),
+    required=True,
+    help="Baseline JSON file to compare to (or to write with --update_baseline).",
+)
+@click.option(
+    "--tolerance",
+    type=float,
+    default=0.1,
+    help="Allowed relative decrease of the throughput (0.1 for 10%).",
+)
+@click.option("--repeats", type=int, default=5, help="Number of runs per entry point.")
+@click.option("--size", type=int, default=2000, help="Number of reactions.")
+@click.option("--seed", type=int, default=42, help="Random seed for the workload.")
+@click.option(
+    "--update_baseline",
+    is_flag=True,
+    help="Overwrite the baseline with the current results instead of comparing.",
+)
+@click.option(
+    "--output",
+    "-o",
+    type=click.Path(writable=True, dir_okay=False, path_type=Path),
+    help="Where to save the current results (JSON), in the baseline format.",
+)
+def main(
+    baseline: Path,
+    tolerance: float,
+    repeats: int,
+    size: int,
+    seed: int,
+    update_baseline: bool,
+    output: Optional[Path],
+) -> None:
+    """Check the throughput of the main entry points against a baseline.
+
+    Times canonicalize_file, tokenize_file, rxn-rdf-to-smiles and
+    ReactionCombiner.combine on a seeded synthetic workload, keeping the best
+    of several runs, and exits with a non-zero code if the throughput of any
+    of them dropped by more than the tolerance compared to the baseline."""
+    setup_console_logger()
+
+    with named_temporary_directory() as directory:
+        workload = build_regression_workload(directory, size=size, seed=seed)
+        if not update_baseline:
+            baseline_results, baseline_workload = load_baseline(baseline)
+            check_same_workload(baseline_workload, workload)
+        results = measure_entry_points(workload, repeats=repeats)
+
+    if output is not None:
+        save_baseline(results, workload, output)
+        logger.info(f'Saved the results to "{output}".')
+
+    if update_baseline:
+        save_baseline(results, workload, baseline)
+        logger.info(f'Updated the baseline "{baseline}".')
+        return
+
+    checks = compare_to_baseline(results, baseline_results, tolerance=tolerance)
+    click.echo(f"{'entry point':<20}{'baseline':>12}{'current':>12}{'change':>10}")
+    for check in checks:
+        click.echo(str(check))
+
+    failed = [check.name for check in checks if not check.passed]
+    if failed:
+        logger.error(
+            f"Throughput regression beyond {tolerance:.0%} for: {', '.join(failed)}."
+        )
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
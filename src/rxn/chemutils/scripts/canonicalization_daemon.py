@@ -0,0 +1,55 @@
+from pathlib import Path
+from typing import Optional
+
+import click
+from rxn.utilities.logging import setup_console_logger
+
+from ..canonicalization_daemon import (
+    CanonicalizationClient,
+    CanonicalizationDaemon,
+    default_socket_path,
+)
+
+
+@click.command()
+@click.option(
+    "--socket",
+    "socket_path",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help=f"Location of the Unix socket. Defaults to {default_socket_path()} "
+    "(see the RXN_CHEMUTILS_SOCKET environment variable).",
+)
+@click.option(
+    "--cache_size",
+    type=int,
+    default=100000,
+    help="Maximal number of SMILES strings in the cache.",
+)
+@click.option("--stop", is_flag=True, help="Stop the running daemon.")
+def main(socket_path: Optional[Path], cache_size: int, stop: bool) -> None:
+    """Run a local daemon canonicalizing SMILES strings for other processes.
+
+    It keeps RDKit loaded and the canonical SMILES in a cache, for workflows
+    running many short jobs. The clients (see CanonicalizationClient) fall back
+    to canonicalizing in their own process when no daemon is running.
+    """
+    setup_console_logger()
+
+    if stop:
+        with CanonicalizationClient(socket_path) as client:
+            if not client.daemon_is_available():
+                raise click.ClickException("No daemon is running.")
+            client.shutdown_daemon()
+        return
+
+    daemon = CanonicalizationDaemon(socket_path, cache_size=cache_size)
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.shutdown()
+
+
+if __name__ == "__main__":
+    main()
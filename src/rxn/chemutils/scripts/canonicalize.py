@@ -1,10 +1,11 @@
 import sys
+from pathlib import Path
 from typing import Optional, TextIO
 
 import click
 from rxn.utilities.logging import setup_console_logger
 
-from rxn.chemutils.miscellaneous import canonicalize_any
+from rxn.chemutils.batch_canonicalization import BatchCanonicalizer
 
 
 @click.command()
@@ -24,11 +25,61 @@ from rxn.chemutils.miscellaneous import canonicalize_any
     is_flag=True,
     help="If specified, the compounds will be sorted after canonicalization.",
 )
+@click.option(
+    "--jobs",
+    "-j",
+    type=int,
+    default=1,
+    help="Number of processes. The output is identical to the one with one process.",
+)
+@click.option(
+    "--chunk_size",
+    type=int,
+    default=1000,
+    help="Number of lines sent to a worker process at once.",
+)
+@click.option(
+    "--errors_file",
+    type=click.Path(writable=True, dir_okay=False, path_type=Path),
+    help="Where to write the invalid SMILES (JSONL, with their line number, "
+    "the SMILES, and the exception).",
+)
+@click.option(
+    "--progress_interval",
+    type=float,
+    default=10.0,
+    help="Number of seconds between progress messages.",
+)
+@click.option(
+    "--timeout",
+    type=float,
+    help="Maximal number of seconds for one line. The lines exceeding it, or "
+    "crashing the worker process, are handled as invalid ones. By default, no limit.",
+)
+@click.option(
+    "--backend",
+    type=click.Choice(["process", "thread"]),
+    default="process",
+    help="Whether the jobs are processes or threads (for free-threaded Python builds).",
+)
+@click.option(
+    "--shared_memory",
+    is_flag=True,
+    help="Send the results of the worker processes through shared memory "
+    "instead of pickling them (Python 3.8 or later).",
+)
 def main(
     input_file: TextIO,
     output_file: TextIO,
     invalid_placeholder: Optional[str],
     sort_compounds: bool,
+    jobs: int,
+    chunk_size: int,
+    errors_file: Optional[Path],
+    progress_interval: float,
+    timeout: Optional[float],
+    backend: str,
+    shared_memory: bool,
 ) -> None:
     """
     Canonicalize SMILES strings (molecules, sets of molecules, or reactions).
@@ -39,18 +90,17 @@ def main(
     """
     setup_console_logger()
 
-    for line in input_file:
-        smiles = line.strip()
-
-        # Canonicalize the SMILES, handle exception if needed
-        try:
-            canonical = canonicalize_any(smiles, sort_molecules=sort_compounds)
-        except Exception:
-            if invalid_placeholder is None:
-                raise
-            canonical = invalid_placeholder
-
-        output_file.write(f"{canonical}\n")
+    canonicalizer = BatchCanonicalizer(
+        sort_molecules=sort_compounds,
+        invalid_placeholder=invalid_placeholder,
+        n_jobs=jobs,
+        chunk_size=chunk_size,
+        progress_interval=progress_interval,
+        timeout=timeout,
+        backend=backend,
+        shared_memory=shared_memory,
+    )
+    canonicalizer.process_stream(input_file, output_file, errors_file=errors_file)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,164 @@
+import importlib
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, TextIO
+
+import click
+from rxn.utilities.logging import setup_console_logger
+
+# Subcommands that are also available as individual executables
+# (f.i. "rxn-chemutils canonicalize" and "rxn-canonicalize"). They are
+# imported only when used, so that the group starts quickly.
+_ALIASED_COMMANDS: Dict[str, str] = {
+    "benchmark": "benchmark",
+    "benchmark-gate": "benchmark_gate",
+    "canonicalization-daemon": "canonicalization_daemon",
+    "canonicalize": "canonicalize",
+    "combine-reaction": "combine_reaction",
+    "detokenize": "detokenize",
+    "rdf-export": "rdf_export",
+    "rdf-to-smiles": "rdf_to_smiles",
+    "tokenize": "tokenize",
+}
+
+# Names of the stages of "pipeline", as given by record_pipeline.available_stages;
+# repeated here so that the group does not import RDKit.
+_STAGES: List[str] = [
+    "remove_atom_mapping",
+    "cleanup",
+    "canonicalize",
+    "inchify",
+    "merge_reactants_and_agents",
+    "sort",
+    "dedup",
+    "remove_precursors_from_products",
+    "tokenize",
+    "detokenize",
+]
+
+
+class _LazyGroup(click.Group):
+    """Group importing the modules of the aliased subcommands on demand."""
+
+    def list_commands(self, ctx: click.Context) -> List[str]:
+        return sorted(set(super().list_commands(ctx)) | set(_ALIASED_COMMANDS))
+
+    def get_command(self, ctx: click.Context, cmd_name: str) -> Optional[click.Command]:
+        module_name = _ALIASED_COMMANDS.get(cmd_name)
+        if module_name is None:
+            return super().get_command(ctx, cmd_name)
+        module = importlib.import_module(f"{__package__}.{module_name}")
+        command: click.Command = module.main
+        return command
+
+
+@click.group(cls=_LazyGroup)
+def main() -> None:
+    """Utilities for SMILES strings, reactions and RDF files.
+
+    Apart from "pipeline", the subcommands are the same as the individual
+    executables: "rxn-chemutils canonicalize" is "rxn-canonicalize", etc.
+    """
+
+
+@main.command()
+@click.argument("input_file", type=click.File(mode="r"), default=sys.stdin)
+@click.argument("output_file", type=click.File(mode="w"), default=sys.stdout)
+@click.option(
+    "--stages",
+    "-s",
+    type=str,
+    required=True,
+    help="Stages separated by '|', f.i. 'canonicalize | sort | dedup | tokenize'. "
+    f"Available stages: {', '.join(_STAGES)}. Apart from tokenize and "
+    "detokenize, they act on the compounds of every line (see "
+    "StandardizationPipeline); sort and dedup, f.i., act on the compounds of a "
+    "reaction, not on the lines.",
+)
+@click.option(
+    "--invalid_placeholder",
+    type=str,
+    help=(
+        "If specified, the given value will be the output for the lines that cannot "
+        "be processed. By default, an exception is raised in such cases."
+    ),
+)
+@click.option(
+    "--jobs",
+    "-j",
+    type=int,
+    default=1,
+    help="Number of processes, shared by all the stages. The output is identical "
+    "to the one with one process.",
+)
+@click.option(
+    "--chunk_size",
+    type=int,
+    default=1000,
+    help="Number of lines sent to a worker process at once.",
+)
+@click.option(
+    "--errors_file",
+    type=click.Path(writable=True, dir_okay=False, path_type=Path),
+    help="Where to write the lines that cannot be processed (JSONL, with their "
+    "line number, the input, and the exception).",
+)
+@click.option(
+    "--progress_interval",
+    type=float,
+    default=10.0,
+    help="Number of seconds between progress messages.",
+)
+@click.option(
+    "--timeout",
+    type=float,
+    help="Maximal number of seconds for one line. The lines exceeding it, or "
+    "crashing the worker process, are handled as invalid ones. By default, no limit.",
+)
+@click.option(
+    "--backend",
+    type=click.Choice(["process", "thread"]),
+    default="process",
+    help="Whether the jobs are processes or threads (for free-threaded Python builds).",
+)
+def pipeline(
+    input_file: TextIO,
+    output_file: TextIO,
+    stages: str,
+    invalid_placeholder: Optional[str],
+    jobs: int,
+    chunk_size: int,
+    errors_file: Optional[Path],
+    progress_interval: float,
+    timeout: Optional[float],
+    backend: str,
+) -> None:
+    """
+    Apply a chain of stages to SMILES strings (one per line), in one pass.
+
+    The script will read strings either from stdin, or from a file given as the
+    first argument, and write to stdout, or from a file given as the second
+    argument.
+    """
+    from ..record_pipeline import BatchPipeline
+
+    setup_console_logger()
+
+    try:
+        batch_pipeline = BatchPipeline(
+            stages,
+            invalid_placeholder=invalid_placeholder,
+            n_jobs=jobs,
+            chunk_size=chunk_size,
+            progress_interval=progress_interval,
+            timeout=timeout,
+            backend=backend,
+        )
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--stages") from e
+
+    batch_pipeline.process_stream(input_file, output_file, errors_file=errors_file)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+from pathlib import Path
+from typing import Tuple
+
+import click
+from rxn.utilities.logging import setup_console_logger
+
+from ..rdf.rdf_export import DEFAULT_FIELDS, OUTPUT_FORMATS, export_rdf_file
+
+
+@click.command()
+@click.option(
+    "-r",
+    "--rdf_file",
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    required=True,
+    help="RDF file (to read from), possibly compressed (.gz, .bz2, .xz).",
+)
+@click.option(
+    "-o",
+    "--output_dir",
+    type=click.Path(file_okay=False, path_type=Path),
+    required=True,
+    help="Directory where to write the shards.",
+)
+@click.option(
+    "--field",
+    "-f",
+    "fields",
+    type=str,
+    multiple=True,
+    default=DEFAULT_FIELDS,
+    show_default=True,
+    help=(
+        'Column to export: "reaction_index", "smiles", "solvents", "catalysts", '
+        '"reagents", or a path in the reaction properties, optionally named '
+        '(f.i. "temperature=VARIATION:STEP:CONDITIONS:TEMP"). Can be repeated.'
+    ),
+)
+@click.option(
+    "--format",
+    "output_format",
+    type=click.Choice(OUTPUT_FORMATS),
+    default="jsonl",
+    help="Format of the shards.",
+)
+@click.option(
+    "--max_shard_size",
+    type=int,
+    default=256,
+    help="Maximal size of the shards, in MB.",
+)
+@click.option("--fragment_bond", type=str, default="~", help="Fragment bond.")
+@click.option("--jobs", "-j", type=int, default=1, help="Number of processes.")
+def main(
+    rdf_file: Path,
+    output_dir: Path,
+    fields: Tuple[str, ...],
+    output_format: str,
+    max_shard_size: int,
+    fragment_bond: str,
+    jobs: int,
+) -> None:
+    """Export the reaction SMILES and properties of an RDF file to JSONL or CSV.
+
+    The file is parsed once; the reactions are written to size-bounded shards
+    in the output directory, whose order (by file name) follows the order of
+    the RDF file. The shards are listed in "shards.txt"; the ones of a previous
+    export to the same directory are replaced."""
+    setup_console_logger()
+
+    export_rdf_file(
+        rdf_file,
+        output_dir,
+        fields=fields,
+        output_format=output_format,
+        max_shard_bytes=max_shard_size * 1024 * 1024,
+        fragment_bond=fragment_bond,
+        n_jobs=jobs,
+    )
+
+
+if __name__ == "__main__":
+    main()
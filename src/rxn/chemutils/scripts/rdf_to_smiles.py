@@ -1,15 +1,10 @@
-import logging
 from pathlib import Path
-from typing import Iterable, Iterator
+from typing import Optional
 
 import click
-from rxn.utilities.files import dump_list_to_file
 from rxn.utilities.logging import setup_console_logger
 
-from ..rdf import RdfReaction, ReactionSmilesExtractor, iterate_reactions_from_file
-
-logger = logging.getLogger(__name__)
-logger.addHandler(logging.NullHandler())
+from ..rdf import convert_rdf_to_smiles
 
 
 @click.command()
@@ -18,7 +13,7 @@ logger.addHandler(logging.NullHandler())
     "--rdf_file",
     type=click.Path(exists=True, dir_okay=False, path_type=Path),
     required=True,
-    help="RDF file (to read from).",
+    help="RDF file (to read from), possibly compressed (.gz, .bz2, .xz).",
 )
 @click.option(
     "-s",
@@ -33,37 +28,55 @@ logger.addHandler(logging.NullHandler())
     default="~",
     help="Fragment bond.",
 )
-def main(rdf_file: Path, smiles_file: Path, fragment_bond: str) -> None:
-    """Convert a file of RDF reactions to SMILES format."""
-    setup_console_logger()
-
-    extractor = ReactionSmilesExtractor(fragment_bond=fragment_bond, sanitize=False)
-    total_reactions = 0
-    successful_reactions = 0
-
-    def convert(rdfs: Iterable[RdfReaction]) -> Iterator[str]:
-        """Convert reactions, ignoring the ones causing an error.
-
-        Note: should be refactored to a class if the functionality is
-        to be made a bit cleaner (avoid ``nonlocal``)."""
-        nonlocal total_reactions
-        nonlocal successful_reactions
-
-        for rdf in rdfs:
-            total_reactions += 1
-            try:
-                yield extractor.to_reaction_smiles(rdf)
-                successful_reactions += 1
-            except Exception as e:
-                logger.warning(f"Cannot convert reaction: {e}")
-                continue
+@click.option(
+    "--jobs",
+    "-j",
+    type=int,
+    default=1,
+    help="Number of processes. The output is identical to the one with one process.",
+)
+@click.option(
+    "--resume",
+    is_flag=True,
+    help="Continue an interrupted conversion from its checkpoint "
+    "(<smiles_file>.checkpoint.json), instead of starting from scratch.",
+)
+@click.option(
+    "--failures_file",
+    type=click.Path(writable=True, path_type=Path),
+    help="Where to write the reactions that could not be converted (JSONL). "
+    "Defaults to <smiles_file>.failures.jsonl.",
+)
+@click.option(
+    "--profile",
+    is_flag=True,
+    help="Log the time spent per parsing and conversion stage, and save it "
+    "to <smiles_file>.profile.json.",
+)
+def main(
+    rdf_file: Path,
+    smiles_file: Path,
+    fragment_bond: str,
+    jobs: int,
+    resume: bool,
+    failures_file: Optional[Path],
+    profile: bool,
+) -> None:
+    """Convert a file of RDF reactions to SMILES format.
 
-    rdf_reactions = iterate_reactions_from_file(rdf_file)
-    smiles_reactions = convert(rdf_reactions)
-    dump_list_to_file(smiles_reactions, smiles_file)
+    The reactions that cannot be converted are written to a JSONL file, with
+    their RIREG, the exception, and the stage of the conversion that failed.
+    """
+    setup_console_logger()
 
-    logger.info(
-        f"Finished conversion. Successful: {successful_reactions} / {total_reactions}."
+    convert_rdf_to_smiles(
+        rdf_file,
+        smiles_file,
+        fragment_bond=fragment_bond,
+        n_jobs=jobs,
+        resume=resume,
+        failures_file=failures_file,
+        profile=profile,
     )
 
 
@@ -0,0 +1,214 @@
+"""
+Transport of string results from worker processes through shared memory,
+instead of pickling them.
+
+A worker writes the strings of a task into a shared memory block, as UTF-8
+lines, preceded by the offsets of the lines (int64), and only sends the name
+of the block. The current process reads the strings from the block without
+copying the bytes (see SharedStrings.view and SharedStrings.lines), and the
+block is removed when closed. Requires Python 3.8 or later.
+
+    for shared in imap_shared_strings(executor, function, chunks):
+        with shared:
+            output_file.write(shared.lines())
+"""
+
+import logging
+from array import array
+from functools import partial
+from itertools import accumulate
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import (
+    Any,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+    Union,
+    overload,
+)
+
+from attr import define
+
+from .executors import BatchExecutor, SerialExecutor
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+T = TypeVar("T")
+
+_OFFSET_TYPECODE = "q"
+_OFFSET_BYTES = array(_OFFSET_TYPECODE).itemsize
+
+
+@define(frozen=True)
+class SharedStringsHandle:
+    """
+    Reference to strings in a shared memory block, sent between processes.
+
+    Attributes:
+        name: name of the shared memory block.
+        count: number of strings.
+    """
+
+    name: str
+    count: int
+
+
+def share_strings(strings: Sequence[str]) -> SharedStringsHandle:
+    """
+    Write strings to a new shared memory block.
+
+    The block must be removed by the receiver, with ``SharedStrings.close``.
+
+    Raises:
+        ValueError: if a string contains a line break, which would make it
+            several strings in ``SharedStrings.lines`` and ``to_list``.
+    """
+    encoded = [string.encode("utf-8") for string in strings]
+    data = b"\n".join(encoded)
+    if data.count(b"\n") != max(len(encoded) - 1, 0):
+        raise ValueError("Strings with line breaks cannot be shared.")
+    # Start of every line, and end of the last one
+    offsets = array(_OFFSET_TYPECODE, [0])
+    offsets.extend(accumulate(len(line) + 1 for line in encoded))
+    header_size = len(offsets) * _OFFSET_BYTES
+    data_size = offsets[-1]
+
+    # Not of size zero, which is not allowed
+    block = SharedMemory(create=True, size=max(header_size + data_size, 1))
+    try:
+        buffer = block.buf
+        assert buffer is not None
+        buffer[:header_size] = offsets.tobytes()
+        if encoded:
+            buffer[header_size : header_size + len(data)] = data
+            buffer[header_size + data_size - 1] = ord("\n")
+        return SharedStringsHandle(name=block.name, count=len(encoded))
+    finally:
+        # The block stays registered in the resource tracker until the
+        # receiver removes it, so that it is removed at exit otherwise.
+        block.close()
+
+
+class SharedStrings(Sequence[str]):
+    """
+    Strings in a shared memory block, written by ``share_strings``.
+
+    Decoding a string copies it; ``view`` and ``lines`` give the UTF-8 bytes
+    without copying them. Must be closed (or used as a context manager) to
+    remove the block.
+    """
+
+    def __init__(self, handle: SharedStringsHandle):
+        self.handle = handle
+        self._block: Optional[SharedMemory] = SharedMemory(name=handle.name)
+        header_size = (handle.count + 1) * _OFFSET_BYTES
+        buffer = self._block.buf
+        assert buffer is not None
+        self._buffer = buffer
+        self._offsets = buffer[:header_size].cast("q")
+        self._data = self._buffer[header_size:]
+
+    def __len__(self) -> int:
+        return self.handle.count
+
+    @overload
+    def __getitem__(self, index: int) -> str: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[str]: ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[str, List[str]]:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return self.to_list()[index]
+            if start >= stop:
+                return []
+            return str(self.lines(start, stop), "utf-8").split("\n")[:-1]
+        return str(self.view(index), "utf-8")
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.to_list())
+
+    def to_list(self) -> List[str]:
+        """Decode all the strings at once (faster than one by one)."""
+        if not self.handle.count:
+            return []
+        return str(self.lines(), "utf-8").split("\n")[:-1]
+
+    def view(self, index: int) -> memoryview:
+        """UTF-8 bytes of a string, without copy."""
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return self._data[self._offsets[index] : self._offsets[index + 1] - 1]
+
+    def lines(self, start: int = 0, stop: Optional[int] = None) -> memoryview:
+        """UTF-8 bytes of the strings, each followed by a line break, without copy."""
+        if stop is None:
+            stop = len(self)
+        return self._data[self._offsets[start] : self._offsets[stop]]
+
+    def close(self) -> None:
+        """Remove the shared memory block. The views must not be used anymore."""
+        if self._block is None:
+            return
+        self._offsets.release()
+        self._data.release()
+        self._buffer.release()
+        self._block.close()
+        self._block.unlink()
+        self._block = None
+
+    def __enter__(self) -> "SharedStrings":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+
+def share_resource_tracker(executor: BatchExecutor) -> None:
+    """
+    Start the resource tracker of multiprocessing before the worker processes
+    of an executor, so that they share it with the current process: a block
+    written by a worker (see share_strings) is then registered until the
+    current process removes it.
+    """
+    if not isinstance(executor, SerialExecutor):
+        resource_tracker.ensure_running()
+
+
+def _share_results(
+    function: Callable[[Any, T], Sequence[str]], state: Any, task: T
+) -> SharedStringsHandle:
+    return share_strings(function(state, task))
+
+
+def imap_shared_strings(
+    executor: BatchExecutor,
+    function: Callable[[Any, T], Sequence[str]],
+    tasks: Iterable[T],
+    initializer: Optional[Callable[..., Any]] = None,
+    initargs: Tuple[Any, ...] = (),
+) -> Iterator[SharedStrings]:
+    """
+    Execute tasks returning strings, and get the results of every task through
+    shared memory, in the order of the tasks. See ``BatchExecutor.imap``.
+
+    The caller must close the returned objects. If the iteration is stopped
+    early, the blocks of the tasks in flight are removed at exit, by the
+    resource tracker of multiprocessing.
+    """
+    share_resource_tracker(executor)
+    for handle in executor.imap(
+        partial(_share_results, function), tasks, initializer, initargs
+    ):
+        yield SharedStrings(handle)
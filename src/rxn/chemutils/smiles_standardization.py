@@ -1,14 +1,35 @@
 import logging
-from typing import Optional
+from functools import lru_cache, partial
+from typing import (
+    Any,
+    Callable,
+    Counter,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+
+from attr import define, field
+from rxn.utilities.containers import chunker
+from rxn.utilities.files import PathLike, raise_if_paths_are_identical
 
 from .conversion import inchi_to_mol, mol_to_inchi, mol_to_smiles, smiles_to_mol
 from .exceptions import InvalidInchi, InvalidSmiles
+from .executors import SerialExecutor, create_executor
 
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.NullHandler())
 
 RXN_SMILES_SEPARATOR = ">>"
 
+# Names of the standardization stages that may fail, for the batch reports
+PARSING_STAGE = "parsing"
+INCHIFICATION_STAGE = "inchification"
+DEINCHIFICATION_STAGE = "deinchification"
+
 
 def standardize_smiles(
     smiles: str,
@@ -33,33 +54,68 @@ def standardize_smiles(
         a SMILES following the desired standard.
     """
     try:
-        molecule = smiles_to_mol(smiles, sanitize=sanitize, find_radicals=find_radicals)
+        standardized, failure = _standardize_smiles_with_failure(
+            smiles,
+            canonicalize=canonicalize,
+            sanitize=sanitize,
+            find_radicals=find_radicals,
+            inchify=inchify,
+        )
     except InvalidSmiles:
         logger.error(f"SMILES parsing failure: {smiles}.")
         raise
 
+    if failure is not None:
+        _, message = failure
+        logger.error(message)
+    return standardized
+
+
+def _standardize_smiles_with_failure(
+    smiles: str,
+    canonicalize: bool = True,
+    sanitize: bool = True,
+    find_radicals: bool = True,
+    inchify: bool = False,
+) -> Tuple[str, Optional[Tuple[str, str]]]:
+    """
+    Standardize a SMILES string, reporting the inchification failures instead
+    of logging them.
+
+    Raises:
+        InvalidSmiles: for SMILES that cannot be parsed.
+
+    Returns:
+        Tuple: standardized SMILES, and (stage, message) for the recoverable
+        failure, if any. The SMILES falls back to its canonical version in
+        such cases.
+    """
+    molecule = smiles_to_mol(smiles, sanitize=sanitize, find_radicals=find_radicals)
+
     if inchify:
         try:
             inchi_string = mol_to_inchi(molecule)
         except InvalidInchi:
-            logger.error(
-                f"Inchification failure for SMILES: {smiles}. Returning its canonical version."
+            message = f"Inchification failure for SMILES: {smiles}. Returning its canonical version."
+            return mol_to_smiles(molecule, isomericSmiles=True), (
+                INCHIFICATION_STAGE,
+                message,
             )
-            return mol_to_smiles(molecule, isomericSmiles=True)
         else:
             # canonical set to True because we can't guarantee no canonicalization
             try:
                 molecule_from_inchi = inchi_to_mol(inchi_string)
             except InvalidInchi:
-                logger.error(
-                    f"De-inchification failure for InChi: {inchi_string}. Returning its canonical version."
+                message = f"De-inchification failure for InChi: {inchi_string}. Returning its canonical version."
+                return mol_to_smiles(molecule, isomericSmiles=True), (
+                    DEINCHIFICATION_STAGE,
+                    message,
                 )
-                return mol_to_smiles(molecule, isomericSmiles=True)
-            return mol_to_smiles(molecule_from_inchi, canonical=True)
+            return mol_to_smiles(molecule_from_inchi, canonical=True), None
     if canonicalize:
-        return mol_to_smiles(molecule, isomericSmiles=True)
+        return mol_to_smiles(molecule, isomericSmiles=True), None
     else:
-        return smiles
+        return smiles, None
 
 
 def standardize_molecules(
@@ -144,3 +200,448 @@ def standardize_molecules(
     # add optional enzyme information
     standardized_molecules = "{}{}".format(standardized_molecules, enzyme)
     return standardized_molecules
+
+
+@define
+class StandardizationFailure:
+    """
+    Failure encountered during a batch standardization.
+
+    Attributes:
+        index: index of the molecules string in the batch.
+        molecules: molecules string, as given to the batch standardization.
+        smiles: SMILES of the compound for which the standardization failed.
+        stage: standardization stage that failed ("parsing", "inchification",
+            "deinchification"). Only parsing failures lead to the fallback value;
+            for the other ones, the canonical SMILES is used instead.
+        message: description of the failure.
+    """
+
+    index: int
+    molecules: str
+    smiles: str
+    stage: str
+    message: str
+
+
+@define
+class StandardizationReport:
+    """
+    Failures collected during a batch standardization.
+    """
+
+    failures: List[StandardizationFailure] = field(factory=list)
+
+    def __len__(self) -> int:
+        return len(self.failures)
+
+    def extend(self, other: "StandardizationReport") -> None:
+        self.failures.extend(other.failures)
+
+    def count_by_stage(self) -> Counter[str]:
+        """Number of failures for each standardization stage."""
+        return Counter(failure.stage for failure in self.failures)
+
+    def failed_indices(self) -> List[int]:
+        """Indices of the molecules strings replaced by the fallback value."""
+        return sorted(
+            {
+                failure.index
+                for failure in self.failures
+                if failure.stage == PARSING_STAGE
+            }
+        )
+
+
+class BatchStandardizer:
+    """
+    Standardize many molecules strings, with the same options as
+    ``standardize_molecules``.
+
+    The standardization of every distinct compound (and, in particular, its
+    InChI round trip) is cached, so that the recurring reagents and solvents
+    are processed only once. Failures are collected in a report instead of
+    being logged one by one.
+
+    Differently from ``standardize_molecules``, the compounds are always
+    standardized individually; when the order of the precursors is given by
+    RDKit, the result is canonicalized once more as a whole to get the same
+    ordering.
+    """
+
+    def __init__(
+        self,
+        canonicalize: bool = True,
+        sanitize: bool = True,
+        inchify: bool = False,
+        fragment_bond: str = "~",
+        ordered_precursors: bool = True,
+        molecule_token_delimiter: Optional[str] = None,
+        is_enzymatic: bool = False,
+        enzyme_separator: str = "|",
+        fallback_value: str = "",
+        cache_size: Optional[int] = 100000,
+    ):
+        """
+        Args:
+            canonicalize: canonicalize SMILES. Defaults to True.
+            sanitize: sanitize SMILES. Defaults to True.
+            inchify: inchify the SMILES. Defaults to False.
+            fragment_bond: fragment bond. Defaults to '~'.
+            ordered_precursors: order precursors. Defaults to True.
+            molecule_token_delimiter: delimiter for big molecule tokens. Defaults to None
+            is_enzymatic: the molecules are representing an enzymatic reaction. Defaults to False.
+            enzyme_separator: separator for molecules and the enzyme. Defaults to '|'.
+            fallback_value: what to return for molecules strings that cannot be
+                standardized. Defaults to an empty string.
+            cache_size: maximal number of compounds to keep in the cache. None
+                for an unbounded cache.
+        """
+        # Kept for instantiating the same standardizer in worker processes
+        self._init_kwargs: Dict[str, Any] = dict(
+            canonicalize=canonicalize,
+            sanitize=sanitize,
+            inchify=inchify,
+            fragment_bond=fragment_bond,
+            ordered_precursors=ordered_precursors,
+            molecule_token_delimiter=molecule_token_delimiter,
+            is_enzymatic=is_enzymatic,
+            enzyme_separator=enzyme_separator,
+            fallback_value=fallback_value,
+            cache_size=cache_size,
+        )
+        self.canonicalize = canonicalize
+        self.sanitize = sanitize
+        self.inchify = inchify
+        self.fragment_bond = fragment_bond
+        self.ordered_precursors = ordered_precursors
+        self.molecule_token_delimiter = molecule_token_delimiter
+        self.is_enzymatic = is_enzymatic
+        self.enzyme_separator = enzyme_separator
+        self.fallback_value = fallback_value
+
+        self._standardize_compound: Callable[
+            [str], Tuple[Optional[str], Optional[Tuple[str, str]]]
+        ] = lru_cache(maxsize=cache_size)(self._standardize_compound_uncached)
+
+    def standardize(
+        self,
+        molecules: str,
+        index: int = 0,
+        report: Optional[StandardizationReport] = None,
+    ) -> str:
+        """
+        Standardize one molecules string.
+
+        Args:
+            molecules: molecules SMILES, see ``standardize_molecules``.
+            index: index of the molecules string, for the failure report.
+            report: where to record the failures, if given.
+
+        Returns:
+            the standardized molecules, or the fallback value if a compound
+            cannot be parsed.
+        """
+        enzyme = ""
+        if self.is_enzymatic:
+            # Same splitting as standardize_molecules (text after a second
+            # separator is dropped)
+            splitted_molecules = molecules.split(self.enzyme_separator)
+            molecules = splitted_molecules[0]
+            if len(splitted_molecules) > 1:
+                enzyme = self.enzyme_separator + splitted_molecules[1]
+
+        standardized = self._standardize_small_molecules(molecules, index, report)
+        if standardized is None:
+            return self.fallback_value
+        return standardized + enzyme
+
+    def standardize_batch(
+        self,
+        molecules: Iterable[str],
+        n_jobs: int = 1,
+        chunk_size: int = 1000,
+        backend: str = "process",
+    ) -> Tuple[List[str], StandardizationReport]:
+        """
+        Standardize multiple molecules strings.
+
+        Args:
+            molecules: molecules strings to standardize.
+            n_jobs: number of workers to use. With 1, everything is done
+                in the current process.
+            chunk_size: number of molecules strings sent to a worker at once.
+                Irrelevant if n_jobs is 1.
+            backend: "process" or "thread", see the executors module.
+
+        Returns:
+            Tuple: the standardized molecules strings, in the original order,
+            and the report of the failures.
+        """
+        results: List[str] = []
+        report = StandardizationReport()
+        for chunk_results, chunk_report in self._iterate_chunk_results(
+            molecules, n_jobs=n_jobs, chunk_size=chunk_size, backend=backend
+        ):
+            results.extend(chunk_results)
+            report.extend(chunk_report)
+        return results, report
+
+    def standardize_file(
+        self, input_file: PathLike, output_file: PathLike, encoding: str = "utf-8"
+    ) -> StandardizationReport:
+        """
+        Standardize the molecules strings of a file, one per line, and write
+        them directly to another file.
+
+        The file is processed as bytes: for enzymatic reactions, the enzyme
+        part of every line (from the first enzyme separator until the second
+        one, if any, as in ``standardize``) is written back as a slice of the
+        line, without being decoded or copied; only the small molecules are
+        decoded and standardized.
+
+        Args:
+            input_file: file with the molecules strings to standardize.
+            output_file: where to write the standardized molecules strings.
+            encoding: encoding of both files.
+
+        Returns:
+            The report of the failures; the indices are the line numbers
+            (starting at zero).
+        """
+        raise_if_paths_are_identical(input_file, output_file)
+        logger.info(f'Standardizing "{input_file}" -> "{output_file}".')
+
+        report = StandardizationReport()
+        separator = self.enzyme_separator.encode(encoding)
+        fallback = self.fallback_value.encode(encoding)
+
+        with open(input_file, "rb") as f_in, open(output_file, "wb") as f_out:
+            for index, line in enumerate(f_in):
+                # Without the line ending, "\n" or "\r\n" as in text mode
+                end = len(line)
+                if line.endswith(b"\r\n"):
+                    end -= 2
+                elif line.endswith(b"\n"):
+                    end -= 1
+                split = line.find(separator, 0, end) if self.is_enzymatic else -1
+                if split == -1:
+                    split = end
+                else:
+                    # Same as standardize: the text after a second separator
+                    # is dropped
+                    second_split = line.find(separator, split + len(separator), end)
+                    if second_split != -1:
+                        end = second_split
+
+                line_view = memoryview(line)
+                molecules = str(line_view[:split], encoding)
+                standardized = self._standardize_small_molecules(
+                    molecules, index, report
+                )
+
+                if standardized is None:
+                    f_out.write(fallback)
+                else:
+                    f_out.write(standardized.encode(encoding))
+                    f_out.write(line_view[split:end])
+                f_out.write(b"\n")
+
+        return report
+
+    def cache_info(self) -> Any:
+        """Statistics about the cache of standardized compounds."""
+        return self._standardize_compound.cache_info()  # type: ignore[attr-defined]
+
+    def _iterate_chunk_results(
+        self, molecules: Iterable[str], n_jobs: int, chunk_size: int, backend: str
+    ) -> Iterator[Tuple[List[str], StandardizationReport]]:
+        chunks = _enumerate_chunks(molecules, chunk_size)
+
+        executor = create_executor(backend, n_jobs)
+        if isinstance(executor, SerialExecutor):
+            # With this standardizer, for its cache
+            yield from (self._standardize_chunk(chunk) for chunk in chunks)
+            return
+
+        yield from executor.imap(
+            BatchStandardizer._standardize_chunk,
+            chunks,
+            initializer=partial(BatchStandardizer, **self._init_kwargs),
+        )
+
+    def _standardize_chunk(
+        self, chunk: Tuple[int, List[str]]
+    ) -> Tuple[List[str], StandardizationReport]:
+        start_index, molecules_list = chunk
+        report = StandardizationReport()
+        results = [
+            self.standardize(molecules, index=index, report=report)
+            for index, molecules in enumerate(molecules_list, start_index)
+        ]
+        return results, report
+
+    def _standardize_small_molecules(
+        self,
+        molecules: str,
+        index: int,
+        report: Optional[StandardizationReport],
+    ) -> Optional[str]:
+        """Standardize the molecules string, without enzyme. Returns None when
+        one of the compounds cannot be parsed."""
+        original_molecules = molecules
+        if self.molecule_token_delimiter is not None:
+            molecules = molecules.replace(self.molecule_token_delimiter, "")
+
+        has_fragment_bond = self.fragment_bond in molecules
+
+        standardized_list: List[str] = []
+        for compound in molecules.split("."):
+            if has_fragment_bond:
+                # make sure we remove the fragment to have valid SMILES
+                compound = compound.replace(self.fragment_bond, ".")
+            standardized, failure = self._standardize_compound(compound)
+            if failure is not None and report is not None:
+                stage, message = failure
+                report.failures.append(
+                    StandardizationFailure(
+                        index=index,
+                        molecules=original_molecules,
+                        smiles=compound,
+                        stage=stage,
+                        message=message,
+                    )
+                )
+            if standardized is None:
+                return None
+            if has_fragment_bond:
+                standardized = standardized.replace(".", self.fragment_bond)
+            standardized_list.append(standardized)
+
+        if not self.ordered_precursors:
+            return ".".join(standardized_list)
+        if has_fragment_bond:
+            return ".".join(sorted(standardized_list))
+        if not (self.canonicalize or self.inchify):
+            # standardize_molecules keeps the original string in that case
+            return molecules
+
+        # RDKit orders the precursors: canonicalize the whole string once more
+        return mol_to_smiles(
+            smiles_to_mol(".".join(standardized_list), sanitize=self.sanitize),
+            isomericSmiles=True,
+        )
+
+    def _standardize_compound_uncached(
+        self, smiles: str
+    ) -> Tuple[Optional[str], Optional[Tuple[str, str]]]:
+        """Standardize one compound; the SMILES is None for parsing failures."""
+        try:
+            return _standardize_smiles_with_failure(
+                smiles,
+                canonicalize=self.canonicalize,
+                sanitize=self.sanitize,
+                inchify=self.inchify,
+            )
+        except InvalidSmiles as e:
+            return None, (PARSING_STAGE, str(e))
+
+
+def standardize_molecules_batch(
+    molecules: Iterable[str],
+    canonicalize: bool = True,
+    sanitize: bool = True,
+    inchify: bool = False,
+    fragment_bond: str = "~",
+    ordered_precursors: bool = True,
+    molecule_token_delimiter: Optional[str] = None,
+    is_enzymatic: bool = False,
+    enzyme_separator: str = "|",
+    fallback_value: str = "",
+    n_jobs: int = 1,
+    chunk_size: int = 1000,
+    backend: str = "process",
+) -> Tuple[List[str], StandardizationReport]:
+    """
+    Standardize many molecules strings at once.
+
+    See ``standardize_molecules`` and ``BatchStandardizer`` for the meaning of
+    the arguments.
+
+    Args:
+        n_jobs: number of workers to use.
+        chunk_size: number of molecules strings sent to a worker at once.
+        backend: "process" or "thread", see the executors module.
+
+    Returns:
+        Tuple: the standardized molecules strings, in the original order,
+        and the report of the failures.
+
+    Examples:
+        >>> results, report = standardize_molecules_batch(['CCO.CC', 'C(C)O', 'CFC'])
+        >>> results
+        ['CC.CCO', 'CCO', '']
+        >>> report.failed_indices()
+        [2]
+    """
+    standardizer = BatchStandardizer(
+        canonicalize=canonicalize,
+        sanitize=sanitize,
+        inchify=inchify,
+        fragment_bond=fragment_bond,
+        ordered_precursors=ordered_precursors,
+        molecule_token_delimiter=molecule_token_delimiter,
+        is_enzymatic=is_enzymatic,
+        enzyme_separator=enzyme_separator,
+        fallback_value=fallback_value,
+    )
+    return standardizer.standardize_batch(
+        molecules, n_jobs=n_jobs, chunk_size=chunk_size, backend=backend
+    )
+
+
+def standardize_enzymatic_file(
+    input_file: PathLike,
+    output_file: PathLike,
+    canonicalize: bool = True,
+    sanitize: bool = True,
+    inchify: bool = False,
+    fragment_bond: str = "~",
+    ordered_precursors: bool = True,
+    molecule_token_delimiter: Optional[str] = None,
+    enzyme_separator: str = "|",
+    fallback_value: str = "",
+) -> StandardizationReport:
+    """
+    Standardize a file of enzymatic reactions (or molecules strings), one per line.
+
+    The enzyme part of the lines is copied verbatim to the output file, and
+    the standardization of the small molecules is cached, see
+    ``BatchStandardizer.standardize_file``. The arguments have the same
+    meaning as for ``standardize_molecules``.
+
+    Returns:
+        The report of the failures.
+    """
+    standardizer = BatchStandardizer(
+        canonicalize=canonicalize,
+        sanitize=sanitize,
+        inchify=inchify,
+        fragment_bond=fragment_bond,
+        ordered_precursors=ordered_precursors,
+        molecule_token_delimiter=molecule_token_delimiter,
+        is_enzymatic=True,
+        enzyme_separator=enzyme_separator,
+        fallback_value=fallback_value,
+    )
+    return standardizer.standardize_file(input_file, output_file)
+
+
+def _enumerate_chunks(
+    molecules: Iterable[str], chunk_size: int
+) -> Iterator[Tuple[int, List[str]]]:
+    """Chunks of molecules strings, with the index of their first element."""
+    start_index = 0
+    for chunk in chunker(molecules, chunk_size=chunk_size):
+        yield start_index, chunk
+        start_index += len(chunk)
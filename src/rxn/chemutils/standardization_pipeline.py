@@ -0,0 +1,384 @@
+"""
+Declarative standardization of any kind of SMILES string.
+
+The standardization steps are given as a list; consecutive steps acting on
+individual compounds are compiled into one stage in which every compound is
+parsed to an RDKit Mol only once, and converted back to SMILES only once.
+"""
+
+import time
+from enum import auto
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Union
+
+from attr import define
+from rdkit import Chem
+from rdkit.Chem.rdchem import Mol
+from rxn.utilities.containers import remove_duplicates
+from rxn.utilities.types import RxnEnum
+
+from .conversion import (
+    inchi_to_mol,
+    mol_to_inchi,
+    mol_to_smiles,
+    remove_hydrogens,
+    sanitize_mol,
+    smiles_to_mol,
+)
+from .exceptions import InvalidInchi, InvalidSmiles, SanitizationError
+from .multicomponent_smiles import (
+    list_to_multicomponent_smiles,
+    multicomponent_smiles_to_list,
+)
+from .reaction_equation import (
+    ReactionEquation,
+    merge_reactants_and_agents,
+    remove_duplicate_compounds,
+    remove_precursors_from_products,
+    sort_compounds,
+)
+from .reaction_smiles import determine_format, parse_reaction_smiles, to_reaction_smiles
+from .utils import remove_atom_mapping
+
+StepLike = Union["StandardizationStep", str]
+
+
+class StandardizationStep(RxnEnum):
+    """
+    Steps available in a standardization pipeline.
+
+    Attributes:
+        REMOVE_ATOM_MAPPING: remove the atom map numbers of the compounds.
+        CLEANUP: minimal cleanup of the compounds, see ``cleanup_smiles``.
+        CANONICALIZE: canonicalize the compounds, see ``canonicalize_smiles``.
+        INCHIFY: round trip of the compounds through InChI, see ``standardize_smiles``.
+        MERGE_REACTANTS_AND_AGENTS: put the agents of a reaction together with
+            the reactants.
+        SORT: sort the compounds of each group alphabetically.
+        DEDUP: remove the duplicate compounds in each group.
+        REMOVE_PRECURSORS_FROM_PRODUCTS: remove products that are also
+            present in the precursors.
+    """
+
+    REMOVE_ATOM_MAPPING = auto()
+    CLEANUP = auto()
+    CANONICALIZE = auto()
+    INCHIFY = auto()
+    MERGE_REACTANTS_AND_AGENTS = auto()
+    SORT = auto()
+    DEDUP = auto()
+    REMOVE_PRECURSORS_FROM_PRODUCTS = auto()
+
+    @property
+    def acts_on_compounds(self) -> bool:
+        """Whether the step acts on the individual compounds (as opposed to
+        the groups of compounds)."""
+        return self in _COMPOUND_STEPS
+
+
+_COMPOUND_STEPS = {
+    StandardizationStep.REMOVE_ATOM_MAPPING,
+    StandardizationStep.CLEANUP,
+    StandardizationStep.CANONICALIZE,
+    StandardizationStep.INCHIFY,
+}
+
+# Steps after which the compounds must be written as canonical SMILES
+_CANONICAL_STEPS = {StandardizationStep.CANONICALIZE, StandardizationStep.INCHIFY}
+
+
+@define
+class StepTiming:
+    """
+    Timing information for one step of the pipeline.
+
+    Attributes:
+        calls: how many times the step was executed.
+        total_seconds: total time spent in the step.
+    """
+
+    calls: int = 0
+    total_seconds: float = 0.0
+
+    @property
+    def mean_seconds(self) -> float:
+        return self.total_seconds / self.calls if self.calls else 0.0
+
+
+class _Timer:
+    """Context manager adding the elapsed time to a StepTiming."""
+
+    def __init__(self, timing: StepTiming):
+        self.timing = timing
+        self.start = 0.0
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter()
+
+    def __exit__(self, *args: object) -> None:
+        self.timing.calls += 1
+        self.timing.total_seconds += time.perf_counter() - self.start
+
+
+class _CompoundStage:
+    """
+    Consecutive compound steps, executed on one shared RDKit Mol per compound.
+    """
+
+    def __init__(
+        self,
+        steps: List[StandardizationStep],
+        check_valence: bool,
+        timings: Dict[str, StepTiming],
+    ):
+        self.timings = timings
+        self.check_valence = check_valence
+
+        # Leading atom-mapping removal is done on the string, which is cheaper.
+        self.remove_mapping_from_string = False
+        while steps and steps[0] is StandardizationStep.REMOVE_ATOM_MAPPING:
+            self.remove_mapping_from_string = True
+            steps = steps[1:]
+        self.mol_steps = steps
+
+        # Radicals must be found at parsing time only if the cleanup comes first
+        self.find_radicals = bool(steps) and steps[0] is StandardizationStep.CLEANUP
+        self.canonical = any(step in _CANONICAL_STEPS for step in steps)
+
+        self.mol_functions: Dict[StandardizationStep, Callable[[Mol], Mol]] = {
+            StandardizationStep.REMOVE_ATOM_MAPPING: self._remove_atom_mapping,
+            StandardizationStep.CLEANUP: self._cleanup,
+            StandardizationStep.CANONICALIZE: self._canonicalize,
+            StandardizationStep.INCHIFY: self._inchify,
+        }
+
+    def __call__(self, smiles: str) -> str:
+        if self.remove_mapping_from_string:
+            with self._timer(StandardizationStep.REMOVE_ATOM_MAPPING.to_string()):
+                smiles = remove_atom_mapping(smiles)
+
+        if not self.mol_steps:
+            return smiles
+
+        with self._timer("parse"):
+            mol = smiles_to_mol(
+                smiles, sanitize=False, find_radicals=self.find_radicals
+            )
+
+        for step in self.mol_steps:
+            with self._timer(step.to_string()):
+                try:
+                    mol = self.mol_functions[step](mol)
+                except SanitizationError as e:
+                    raise InvalidSmiles(smiles) from e
+
+        with self._timer("serialize"):
+            return mol_to_smiles(mol, canonical=self.canonical)
+
+    def _timer(self, name: str) -> _Timer:
+        return _Timer(self.timings.setdefault(name, StepTiming()))
+
+    def _remove_atom_mapping(self, mol: Mol) -> Mol:
+        for atom in mol.GetAtoms():
+            # Same as remove_atom_mapping: the map numbers of "*" are kept
+            if atom.GetSymbol() != "*":
+                atom.SetAtomMapNum(0)
+        return mol
+
+    def _cleanup(self, mol: Mol) -> Mol:
+        sanitize_mol(mol, include_sanitizations=[Chem.SANITIZE_FINDRADICALS])
+        return mol
+
+    def _canonicalize(self, mol: Mol) -> Mol:
+        mol = remove_hydrogens(mol)
+        excluded_sanitizations: List[Union[Chem.SanitizeFlags, int]] = []
+        if not self.check_valence:
+            excluded_sanitizations.append(Chem.SANITIZE_PROPERTIES)
+        sanitize_mol(mol, exclude_sanitizations=excluded_sanitizations)
+        return mol
+
+    def _inchify(self, mol: Mol) -> Mol:
+        # InChI generation requires a sanitized molecule
+        sanitize_mol(mol)
+        try:
+            return inchi_to_mol(mol_to_inchi(mol))
+        except InvalidInchi:
+            # Same as standardize_smiles: keep the (canonical) molecule
+            return mol
+
+
+class StandardizationPipeline:
+    """
+    Standardize any SMILES string (molecule SMILES, multicomponent SMILES,
+    reaction SMILES) with a configurable sequence of steps.
+
+    Consecutive steps acting on compounds share one RDKit Mol per compound,
+    which avoids the repeated SMILES parsing and writing of chaining the
+    individual functions. The SMILES of such a stage is written canonically
+    if the stage contains a canonicalization or an inchification.
+
+    The time spent in every step is collected in ``timings``.
+
+    Examples:
+        >>> pipeline = StandardizationPipeline(["canonicalize", "sort"])
+        >>> pipeline("OCC.C(C)O>>C(=O)O")
+        'CCO.CCO>>O=CO'
+    """
+
+    def __init__(
+        self,
+        steps: Iterable[StepLike],
+        check_valence: bool = True,
+        fallback_value: Optional[str] = None,
+    ):
+        """
+        Args:
+            steps: standardization steps, as StandardizationStep instances or
+                strings, in the order they must be applied.
+            check_valence: if False, the canonicalization will not do any
+                valence check.
+            fallback_value: what value to return when the standardization is
+                unsuccessful. Default: no fallback, will propagate the exception.
+        """
+        self.steps = [StandardizationStep(step) for step in steps]
+        self.check_valence = check_valence
+        self.fallback_value = fallback_value
+        self.timings: Dict[str, StepTiming] = {}
+
+        self._stages = self._compile(self.steps)
+
+    def __call__(self, any_smiles: str) -> str:
+        return self.standardize(any_smiles)
+
+    def standardize(self, any_smiles: str) -> str:
+        """
+        Standardize any SMILES string; in the case of reaction SMILES, the
+        format is kept.
+
+        Raises:
+            Exception: different kinds of exception may be raised during
+                parsing or standardization, if no fallback value is given.
+        """
+        try:
+            return self._standardize(any_smiles)
+        except Exception:
+            if self.fallback_value is not None:
+                return self.fallback_value
+            raise
+
+    def standardize_iterable(self, smiles_iterable: Iterable[str]) -> List[str]:
+        """Standardize multiple SMILES strings."""
+        return [self.standardize(smiles) for smiles in smiles_iterable]
+
+    def reset_timings(self) -> None:
+        self.timings.clear()
+
+    def timing_summary(self) -> Dict[str, Dict[str, float]]:
+        """Summary of the timings, sorted by decreasing total time."""
+        sorted_timings = sorted(
+            self.timings.items(), key=lambda item: item[1].total_seconds, reverse=True
+        )
+        return {
+            name: {
+                "calls": timing.calls,
+                "total_seconds": timing.total_seconds,
+                "mean_seconds": timing.mean_seconds,
+            }
+            for name, timing in sorted_timings
+        }
+
+    def _compile(
+        self, steps: Sequence[StandardizationStep]
+    ) -> List[Union[_CompoundStage, StandardizationStep]]:
+        """Group the consecutive compound steps into one stage."""
+        stages: List[Union[_CompoundStage, StandardizationStep]] = []
+        compound_steps: List[StandardizationStep] = []
+        for step in steps:
+            if step.acts_on_compounds:
+                compound_steps.append(step)
+                continue
+            if compound_steps:
+                stages.append(self._compound_stage(compound_steps))
+                compound_steps = []
+            stages.append(step)
+        if compound_steps:
+            stages.append(self._compound_stage(compound_steps))
+        return stages
+
+    def _compound_stage(self, steps: List[StandardizationStep]) -> _CompoundStage:
+        return _CompoundStage(
+            steps, check_valence=self.check_valence, timings=self.timings
+        )
+
+    def _timer(self, name: str) -> _Timer:
+        return _Timer(self.timings.setdefault(name, StepTiming()))
+
+    def _standardize(self, any_smiles: str) -> str:
+        if ">" in any_smiles:
+            return self._standardize_reaction(any_smiles)
+        if "~" in any_smiles:
+            return self._standardize_multicomponent(any_smiles)
+        return self._standardize_single_component(any_smiles)
+
+    def _standardize_reaction(self, reaction_smiles: str) -> str:
+        with self._timer("parse_reaction"):
+            reaction_format = determine_format(reaction_smiles)
+            reaction = parse_reaction_smiles(reaction_smiles, reaction_format)
+
+        for stage in self._stages:
+            if isinstance(stage, _CompoundStage):
+                reaction = ReactionEquation(
+                    *([stage(compound) for compound in group] for group in reaction)
+                )
+                continue
+            with self._timer(stage.to_string()):
+                reaction = _REACTION_FUNCTIONS[stage](reaction)
+
+        with self._timer("serialize_reaction"):
+            return to_reaction_smiles(reaction, reaction_format)
+
+    def _standardize_multicomponent(self, multicomponent_smiles: str) -> str:
+        compounds = multicomponent_smiles_to_list(
+            multicomponent_smiles, fragment_bond="~"
+        )
+
+        for stage in self._stages:
+            if isinstance(stage, _CompoundStage):
+                compounds = [stage(compound) for compound in compounds]
+                continue
+            with self._timer(stage.to_string()):
+                compounds = _apply_to_compound_list(stage, compounds)
+
+        return list_to_multicomponent_smiles(compounds, fragment_bond="~")
+
+    def _standardize_single_component(self, smiles: str) -> str:
+        # As in sort_any, the group steps act on the dot-separated fragments.
+        for stage in self._stages:
+            if isinstance(stage, _CompoundStage):
+                smiles = stage(smiles)
+                continue
+            with self._timer(stage.to_string()):
+                smiles = ".".join(_apply_to_compound_list(stage, smiles.split(".")))
+        return smiles
+
+
+def _apply_to_compound_list(
+    step: StandardizationStep, compounds: List[str]
+) -> List[str]:
+    """Apply a group step to a list of compounds (in dot notation); the steps
+    specific to reactions have no effect."""
+    if step is StandardizationStep.SORT:
+        # Sort as the tilde strings, for consistency with sort_any
+        return sorted(compounds, key=lambda compound: compound.replace(".", "~"))
+    if step is StandardizationStep.DEDUP:
+        return remove_duplicates(compounds)
+    return compounds
+
+
+_REACTION_FUNCTIONS: Dict[
+    StandardizationStep, Callable[[ReactionEquation], ReactionEquation]
+] = {
+    StandardizationStep.MERGE_REACTANTS_AND_AGENTS: merge_reactants_and_agents,
+    StandardizationStep.SORT: sort_compounds,
+    StandardizationStep.DEDUP: remove_duplicate_compounds,
+    StandardizationStep.REMOVE_PRECURSORS_FROM_PRODUCTS: remove_precursors_from_products,
+}
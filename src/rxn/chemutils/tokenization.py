@@ -1,7 +1,7 @@
 import logging
 import re
 import shutil
-from typing import List, Optional
+from typing import Any, List, Optional, Tuple
 
 from rxn.utilities.files import (
     PathLike,
@@ -11,6 +11,7 @@ from rxn.utilities.files import (
 )
 
 from .exceptions import UnclearWhetherTokenized
+from .profiling import profiled
 
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.NullHandler())
@@ -35,7 +36,11 @@ class TokenizationError(ValueError):
         self.title = title
         self.detail = detail
 
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return type(self), (self.title, self.detail)
 
+
+@profiled()
 def to_tokens(smiles: str) -> List[str]:
     """
     Tokenize a SMILES molecule or reaction into a list of tokens.
@@ -60,6 +65,7 @@ def to_tokens(smiles: str) -> List[str]:
     return tokens
 
 
+@profiled()
 def tokenize_smiles(smiles: str, fallback_value: Optional[str] = None) -> str:
     """
     Tokenize a SMILES molecule or reaction, and join the tokens with spaces.
@@ -82,6 +88,7 @@ def tokenize_smiles(smiles: str, fallback_value: Optional[str] = None) -> str:
         raise
 
 
+@profiled()
 def detokenize_smiles(tokenized_smiles: str) -> str:
     """
     Detokenize a tokenized SMILES string (that contains spaces between the characters).
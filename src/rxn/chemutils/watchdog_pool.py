@@ -0,0 +1,386 @@
+"""
+Pool of worker processes with a time budget per item, for inputs on which
+RDKit may run for minutes or crash (huge macrocycles, polymers, etc.).
+
+The items are sent to the workers in chunks, and the workers record in
+shared memory which item they are processing and since when. The main
+process watches these records: a worker exceeding the time budget is
+killed, as well as one that crashed. Its item is reported as aborted, a
+new worker is started, and the rest of the chunk is sent again.
+"""
+
+import logging
+import multiprocessing
+from collections import deque
+from functools import partial
+from multiprocessing.connection import Connection, wait
+from multiprocessing.sharedctypes import RawArray
+from time import monotonic
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+from attr import define
+from rxn.utilities.containers import chunker
+
+from .profiling import (
+    collect_worker_profile,
+    initialize_worker_profiling,
+    is_profiling_enabled,
+    merge_worker_profile,
+)
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+T = TypeVar("T")
+
+# Reasons for aborting an item
+ABORT_TIMEOUT = "Timeout"
+ABORT_CRASH = "WorkerCrash"
+
+# Index of the item being processed, and when its processing started; the
+# index is -1 when the worker is idle.
+_STATE_INDEX = 0
+_STATE_START = 1
+
+
+@define
+class AbortedItem:
+    """
+    Item whose processing was aborted.
+
+    Attributes:
+        item: the item.
+        reason: ABORT_TIMEOUT or ABORT_CRASH.
+    """
+
+    item: Any
+    reason: str
+
+
+@define
+class _Piece:
+    """Part of a chunk, sent to one worker."""
+
+    chunk_id: int
+    offset: int
+    items: List[Any]
+
+
+class _Worker:
+    """Worker process, with its connection and its shared state."""
+
+    def __init__(
+        self,
+        function: Callable[[Any], Any],
+        initializer: Optional[Callable[..., None]],
+        initargs: Tuple[Any, ...],
+    ):
+        self.connection, child_connection = multiprocessing.Pipe()
+        self.state = RawArray("d", [-1.0, 0.0])
+        self.piece: Optional[_Piece] = None
+        self.process = multiprocessing.Process(
+            target=_worker_main,
+            args=(
+                child_connection,
+                self.state,
+                function,
+                initializer,
+                initargs,
+                is_profiling_enabled(),
+            ),
+            daemon=True,
+        )
+        self.process.start()
+        child_connection.close()
+
+    def send(self, piece: _Piece) -> None:
+        self.piece = piece
+        # Considered busy from now on, in case it crashes before starting
+        self.state[_STATE_START] = monotonic()
+        self.state[_STATE_INDEX] = 0
+        self.connection.send(piece.items)
+
+    def current_item(self) -> Tuple[int, float]:
+        """Index of the item being processed, and since when."""
+        while True:
+            index = int(self.state[_STATE_INDEX])
+            start = self.state[_STATE_START]
+            if int(self.state[_STATE_INDEX]) == index:
+                return index, start
+
+    def stop(self) -> None:
+        try:
+            self.connection.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout=1)
+        self.kill()
+
+    def kill(self) -> None:
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.connection.close()
+
+
+def _worker_main(
+    connection: Connection,
+    state: Any,
+    function: Callable[[Any], Any],
+    initializer: Optional[Callable[..., None]],
+    initargs: Tuple[Any, ...],
+    profile: bool,
+) -> None:
+    initialize_worker_profiling(profile)
+    if initializer is not None:
+        initializer(*initargs)
+    while True:
+        items = connection.recv()
+        if items is None:
+            return
+        results = []
+        for index, item in enumerate(items):
+            state[_STATE_START] = monotonic()
+            state[_STATE_INDEX] = index
+            results.append(function(item))
+        state[_STATE_INDEX] = -1
+        connection.send((results, collect_worker_profile()))
+
+
+class WatchdogPool:
+    """
+    Apply a function to items on worker processes, with a time budget per
+    item. Workers exceeding it, or crashing, are restarted.
+
+    The function is given to the worker processes when they are created,
+    and the results are returned in the original order, with AbortedItem
+    instead of the result for the aborted items. Exceptions in the function
+    are not caught: the function is expected to handle them.
+    """
+
+    def __init__(
+        self,
+        function: Callable[[Any], Any],
+        timeout: float,
+        n_jobs: int = 1,
+        initializer: Optional[Callable[..., None]] = None,
+        initargs: Tuple[Any, ...] = (),
+        poll_interval: Optional[float] = None,
+    ):
+        """
+        Args:
+            function: function to apply to every item.
+            timeout: maximal number of seconds for one item.
+            n_jobs: number of worker processes.
+            initializer: function called when a worker process starts.
+            initargs: arguments for the initializer.
+            poll_interval: number of seconds between checks of the workers.
+                Defaults to a tenth of the timeout (at most one second).
+        """
+        self.function = function
+        self.timeout = timeout
+        self.n_jobs = n_jobs
+        self.initializer = initializer
+        self.initargs = initargs
+        self.poll_interval = (
+            min(timeout / 10, 1.0) if poll_interval is None else poll_interval
+        )
+
+        self.aborted_count = 0
+        self.restart_count = 0
+        self._workers: List[_Worker] = []
+
+    def imap_chunks(self, chunks: Iterable[Sequence[Any]]) -> Iterator[List[Any]]:
+        """
+        Process chunks of items, and get the results of every chunk, in the
+        original order.
+        """
+        chunk_iterator = iter(chunks)
+        exhausted = False
+        # Results of the chunks not returned yet, with the number of missing ones
+        results: Dict[int, List[Any]] = {}
+        missing: Dict[int, int] = {}
+        queue: Deque[_Piece] = deque()
+        next_chunk_id = 0
+        next_to_return = 0
+        max_chunks = 2 * self.n_jobs
+
+        self._workers = [self._start_worker() for _ in range(self.n_jobs)]
+        try:
+            while True:
+                # Read more chunks, up to a limit, to bound the memory
+                while not exhausted and len(results) < max_chunks:
+                    try:
+                        items = list(next(chunk_iterator))
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    results[next_chunk_id] = [None] * len(items)
+                    missing[next_chunk_id] = len(items)
+                    queue.append(_Piece(next_chunk_id, 0, items))
+                    next_chunk_id += 1
+
+                while next_to_return in results and missing[next_to_return] == 0:
+                    del missing[next_to_return]
+                    yield results.pop(next_to_return)
+                    next_to_return += 1
+
+                if exhausted and not results:
+                    return
+
+                for worker in self._workers:
+                    if worker.piece is None and queue:
+                        piece = queue.popleft()
+                        if piece.items:
+                            worker.send(piece)
+                        else:
+                            self._fill(results, missing, piece, [])
+
+                self._wait_and_collect(results, missing, queue)
+        finally:
+            for worker in self._workers:
+                worker.stop()
+            self._workers = []
+
+    def imap(self, items: Iterable[Any], chunk_size: int = 1000) -> Iterator[Any]:
+        """Process items, and get the results in the original order."""
+        for chunk_results in self.imap_chunks(chunker(items, chunk_size=chunk_size)):
+            yield from chunk_results
+
+    def _wait_and_collect(
+        self,
+        results: Dict[int, List[Any]],
+        missing: Dict[int, int],
+        queue: Deque[_Piece],
+    ) -> None:
+        busy = [worker for worker in self._workers if worker.piece is not None]
+        if not busy:
+            return
+        handles: List[Any] = [worker.connection for worker in busy]
+        handles += [worker.process.sentinel for worker in busy]
+        ready = set(wait(handles, timeout=self.poll_interval))
+
+        now = monotonic()
+        for worker in busy:
+            piece = worker.piece
+            assert piece is not None
+            if worker.connection in ready:
+                try:
+                    piece_results, profile = worker.connection.recv()
+                except (EOFError, OSError):
+                    # Crashed while sending the results
+                    self._abort(worker, results, missing, queue, ABORT_CRASH)
+                    continue
+                merge_worker_profile(profile)
+                worker.piece = None
+                self._fill(results, missing, piece, piece_results)
+            elif worker.process.sentinel in ready:
+                self._abort(worker, results, missing, queue, ABORT_CRASH)
+            else:
+                index, start = worker.current_item()
+                if index >= 0 and now - start > self.timeout:
+                    self._abort(worker, results, missing, queue, ABORT_TIMEOUT)
+
+    def _abort(
+        self,
+        worker: _Worker,
+        results: Dict[int, List[Any]],
+        missing: Dict[int, int],
+        queue: Deque[_Piece],
+        reason: str,
+    ) -> None:
+        piece = worker.piece
+        assert piece is not None
+        index, _ = worker.current_item()
+        index = max(index, 0)
+        item = piece.items[index]
+        logger.warning(
+            f"{reason} for item {piece.offset + index} of chunk {piece.chunk_id}, "
+            f"restarting the worker process: {item!r}"
+        )
+        worker.kill()
+        self._workers[self._workers.index(worker)] = self._start_worker()
+        self.aborted_count += 1
+        self.restart_count += 1
+
+        # The results before the aborted item are lost with the worker
+        self._fill(
+            results,
+            missing,
+            _Piece(piece.chunk_id, piece.offset + index, [item]),
+            [AbortedItem(item=item, reason=reason)],
+        )
+        before = _Piece(piece.chunk_id, piece.offset, piece.items[:index])
+        after = _Piece(
+            piece.chunk_id, piece.offset + index + 1, piece.items[index + 1 :]
+        )
+        queue.extendleft(p for p in (after, before) if p.items)
+
+    def _fill(
+        self,
+        results: Dict[int, List[Any]],
+        missing: Dict[int, int],
+        piece: _Piece,
+        piece_results: List[Any],
+    ) -> None:
+        chunk_results = results[piece.chunk_id]
+        chunk_results[piece.offset : piece.offset + len(piece_results)] = piece_results
+        missing[piece.chunk_id] -= len(piece_results)
+
+    def _start_worker(self) -> _Worker:
+        return _Worker(self.function, self.initializer, self.initargs)
+
+
+def _with_fallback(function: Callable[[Any], T], fallback_value: T, item: Any) -> T:
+    try:
+        return function(item)
+    except Exception as e:
+        logger.debug(f"Error for {item!r}: {e}")
+        return fallback_value
+
+
+def map_with_timeout(
+    function: Callable[[Any], T],
+    items: Iterable[Any],
+    timeout: float,
+    fallback_value: T,
+    n_jobs: int = 1,
+    chunk_size: int = 100,
+) -> Iterator[T]:
+    """
+    Apply a function to items on worker processes, with a time budget per
+    item, f.i. for augmenting SMILES strings:
+
+        augment = partial(augmenter.augment, number_augmentations=10)
+        for augmented in map_with_timeout(augment, smiles, 10.0, []):
+            ...
+
+    Args:
+        function: function to apply to every item.
+        items: items to process.
+        timeout: maximal number of seconds for one item.
+        fallback_value: result for the items that raise an exception, that
+            exceed the time budget, or that crash the worker process.
+        n_jobs: number of worker processes.
+        chunk_size: number of items sent to a worker process at once.
+
+    Returns:
+        The results, in the original order.
+    """
+    pool = WatchdogPool(
+        partial(_with_fallback, function, fallback_value), timeout, n_jobs=n_jobs
+    )
+    for result in pool.imap(items, chunk_size=chunk_size):
+        yield fallback_value if isinstance(result, AbortedItem) else result
@@ -0,0 +1,53 @@
+from rxn.utilities.files import named_temporary_path
+
+from rxn.chemutils.benchmarking.generators import (
+    generate_compounds,
+    generate_extended_reaction_smiles,
+    generate_rdf_file,
+    generate_reaction_smiles,
+)
+from rxn.chemutils.miscellaneous import canonicalize_any
+from rxn.chemutils.rdf import RdfParser, ReactionSmilesExtractor
+from rxn.chemutils.reaction_smiles import ReactionFormat, determine_format
+
+
+def test_generated_compounds_are_valid() -> None:
+    compounds = generate_compounds(500, seed=1)
+    assert len(set(compounds)) > 100
+    for compound in compounds:
+        _ = canonicalize_any(compound)
+
+
+def test_generation_is_reproducible() -> None:
+    assert generate_reaction_smiles(20, seed=3) == generate_reaction_smiles(20, seed=3)
+    assert generate_reaction_smiles(20, seed=3) != generate_reaction_smiles(20, seed=4)
+
+
+def test_generated_reaction_smiles() -> None:
+    reactions = generate_reaction_smiles(200)
+    for reaction in reactions:
+        _ = canonicalize_any(reaction)
+    # Some of them contain salts with fragment bonds
+    assert any("~" in reaction for reaction in reactions)
+
+
+def test_generated_extended_reaction_smiles() -> None:
+    reactions = generate_extended_reaction_smiles(200)
+    formats = {determine_format(reaction) for reaction in reactions}
+    assert formats == {ReactionFormat.STANDARD, ReactionFormat.EXTENDED}
+    for reaction in reactions:
+        _ = canonicalize_any(reaction)
+
+
+def test_generated_rdf_file() -> None:
+    with named_temporary_path() as path:
+        generate_rdf_file(path, n_reactions=20, seed=2, first_rireg=10)
+        reactions = list(RdfParser(path))
+
+    assert len(reactions) == 20
+    assert reactions[0].reaction_index == 10
+    assert all(r.meta["RXN:ID"].startswith("RX") for r in reactions)
+
+    extractor = ReactionSmilesExtractor(fragment_bond="~")
+    for reaction in reactions:
+        _ = extractor.to_reaction_smiles(reaction)
@@ -0,0 +1,65 @@
+import pytest
+from rxn.utilities.files import named_temporary_directory, named_temporary_path
+
+from rxn.chemutils.benchmarking import BenchmarkResult
+from rxn.chemutils.benchmarking.regression import (
+    ENTRY_POINTS,
+    build_regression_workload,
+    check_same_workload,
+    compare_to_baseline,
+    load_baseline,
+    measure_entry_points,
+    save_baseline,
+)
+
+
+def _result(name: str, throughput: float) -> BenchmarkResult:
+    return BenchmarkResult(
+        name=name,
+        n_items=10,
+        total_seconds=10 / throughput,
+        throughput=throughput,
+        latencies={},
+    )
+
+
+def test_measure_entry_points() -> None:
+    with named_temporary_directory() as directory:
+        workload = build_regression_workload(directory, size=20, seed=1)
+        results = measure_entry_points(workload, repeats=2)
+
+        # The RDF conversion must succeed for all the generated reactions
+        n_converted = len(workload.output_file("rdf_to_smiles").read_text().split())
+
+    assert [result.name for result in results] == list(ENTRY_POINTS)
+    assert all(result.n_items == 20 for result in results)
+    assert all(len(result.metadata["throughputs"]) == 2 for result in results)
+    assert all(
+        result.throughput == max(result.metadata["throughputs"]) for result in results
+    )
+    assert n_converted == 20
+
+
+def test_compare_to_baseline() -> None:
+    baseline = [_result("a", 100.0), _result("b", 100.0)]
+    current = [_result("a", 95.0), _result("b", 80.0), _result("c", 1.0)]
+
+    checks = compare_to_baseline(current, baseline, tolerance=0.1)
+
+    assert [check.name for check in checks] == ["a", "b"]
+    assert [check.passed for check in checks] == [True, False]
+    assert checks[1].relative_change == pytest.approx(-0.2)
+
+
+def test_baseline_roundtrip_and_workload_check() -> None:
+    with named_temporary_directory() as directory, named_temporary_path() as path:
+        workload = build_regression_workload(directory, size=5, seed=3)
+        save_baseline([_result("a", 10.0)], workload, path)
+        results, baseline_workload = load_baseline(path)
+
+        assert results == [_result("a", 10.0)]
+        check_same_workload(baseline_workload, workload)
+
+        other_workload = build_regression_workload(directory, size=6, seed=3)
+        with pytest.raises(ValueError):
+            check_same_workload(baseline_workload, other_workload)
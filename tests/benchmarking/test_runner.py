@@ -0,0 +1,53 @@
+import time
+
+from rxn.utilities.files import named_temporary_directory, named_temporary_path
+
+from rxn.chemutils.benchmarking import (
+    BENCHMARKS,
+    build_corpus,
+    load_results,
+    run_benchmark,
+    run_iterator_benchmark,
+    run_suite,
+    save_results,
+)
+from rxn.chemutils.benchmarking.runner import percentile
+
+
+def test_percentile() -> None:
+    values = [float(i) for i in range(101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([], 50) == 0.0
+
+
+def test_run_benchmark() -> None:
+    result = run_benchmark("sleep", lambda x: time.sleep(x), [0.001] * 10)
+
+    assert result.name == "sleep"
+    assert result.n_items == 10
+    assert result.latencies["p50"] >= 0.001
+    assert result.latencies["max"] >= result.latencies["p99"]
+    assert 0 < result.throughput <= 1000
+    assert result.peak_memory_bytes is not None
+
+
+def test_run_iterator_benchmark() -> None:
+    result = run_iterator_benchmark(
+        "range", lambda: (str(i) * 100 for i in range(100)), measure_memory=False
+    )
+    assert result.n_items == 100
+    assert result.peak_memory_bytes is None
+
+
+def test_suite_and_serialization() -> None:
+    with named_temporary_directory() as directory:
+        corpus = build_corpus(directory, size=10, rdf_size=5)
+        results = run_suite(corpus)
+
+    assert [result.name for result in results] == list(BENCHMARKS)
+    assert [result.n_items for result in results if result.name == "rdf_parser"] == [5]
+
+    with named_temporary_path() as path:
+        save_results(results, path)
+        assert load_results(path) == results
@@ -0,0 +1,73 @@
+import bz2
+import gzip
+import lzma
+from pathlib import Path
+from typing import Callable
+
+import pytest
+from rxn.utilities.files import load_list_from_file, named_temporary_directory
+
+from rxn.chemutils.benchmarking.generators import generate_rdf_file
+from rxn.chemutils.rdf import RdfParser, build_rdf_index, convert_rdf_to_smiles
+from rxn.chemutils.rdf.compression import RandomAccessReader, write_seekable_gzip
+
+sample_rdf = Path(__file__).parent / "sample.rdf"
+
+
+@pytest.mark.parametrize(
+    "suffix, compress",
+    [(".gz", gzip.compress), (".bz2", bz2.compress), (".xz", lzma.compress)],
+)
+@pytest.mark.parametrize("use_mmap", [False, True])
+def test_compressed_files(
+    suffix: str, compress: Callable[[bytes], bytes], use_mmap: bool
+) -> None:
+    expected = list(RdfParser(sample_rdf))
+    with named_temporary_directory() as directory:
+        compressed = directory / f"sample.rdf{suffix}"
+        compressed.write_bytes(compress(sample_rdf.read_bytes()))
+
+        parser = RdfParser(compressed, use_mmap=use_mmap)
+        assert list(parser) == expected
+
+        # Random access, with offsets in the decompressed content
+        plain_index = build_rdf_index(sample_rdf)
+        assert parser.index.offsets == plain_index.offsets
+        assert parser.index.lengths == plain_index.lengths
+        assert parser.get(6) == expected[2]
+        assert parser.get(1) == expected[0]
+        assert list(parser.iter_range(1)) == expected[1:]
+
+
+def test_seekable_gzip() -> None:
+    with named_temporary_directory() as directory:
+        rdf_file = directory / "generated.rdf"
+        generate_rdf_file(rdf_file, n_reactions=100, seed=2)
+        gzip_file = directory / "generated.rdf.gz"
+        n_members = write_seekable_gzip(rdf_file, gzip_file, member_size=10000)
+
+        # Still a valid gzip file
+        assert gzip.decompress(gzip_file.read_bytes()) == rdf_file.read_bytes()
+
+        index = build_rdf_index(gzip_file)
+        assert len(index.checkpoints) == n_members > 1
+        assert index.offsets == build_rdf_index(rdf_file).offsets
+
+        # Reading from the checkpoints, in any order
+        content = rdf_file.read_bytes()
+        with RandomAccessReader(gzip_file, index.checkpoints) as reader:
+            for position in [50, 3, 99, 0, 51, 52]:
+                _, offset, length = index.entry(position)
+                assert reader.read(offset, length) == content[offset : offset + length]
+
+        # The checkpoints are saved in the index file
+        parser = RdfParser(gzip_file)
+        assert parser.index.checkpoints == index.checkpoints
+        assert list(parser.iter_range(40, 60)) == list(RdfParser(rdf_file))[40:60]
+
+        # Parallel conversion
+        convert_rdf_to_smiles(rdf_file, directory / "serial.smi")
+        convert_rdf_to_smiles(gzip_file, directory / "parallel.smi", n_jobs=2)
+        assert load_list_from_file(directory / "parallel.smi") == load_list_from_file(
+            directory / "serial.smi"
+        )
@@ -0,0 +1,113 @@
+import gzip
+from pathlib import Path
+from typing import List
+
+import pytest
+from rxn.utilities.files import named_temporary_directory
+
+from rxn.chemutils.benchmarking.generators import generate_rdf_file
+from rxn.chemutils.rdf import RdfParser, RdfPreFilter, iterate_reactions_from_file
+from rxn.chemutils.rdf.rdf_index import split_rdf_file
+
+sample_rdf = Path(__file__).parent / "sample.rdf"
+
+solvent_molstructure = list(RdfParser(sample_rdf))[2].meta[
+    "RXN:SOLVENT(1):MOL(1):MOLSTRUCTURE"
+]
+
+
+def filtered_indices(
+    pre_filter: RdfPreFilter, rdf_file: Path = sample_rdf
+) -> List[int]:
+    return [
+        reaction.reaction_index
+        for reaction in iterate_reactions_from_file(rdf_file, pre_filter=pre_filter)
+    ]
+
+
+def test_no_conditions() -> None:
+    assert list(RdfParser(sample_rdf, pre_filter=RdfPreFilter())) == list(
+        RdfParser(sample_rdf)
+    )
+
+
+def test_reaction_indices() -> None:
+    assert filtered_indices(RdfPreFilter(reaction_indices=[2, 6, 7])) == [2, 6]
+    assert filtered_indices(RdfPreFilter(reaction_indices=set())) == []
+
+
+def test_counts() -> None:
+    assert filtered_indices(RdfPreFilter(n_reactants=2)) == [1]
+    assert filtered_indices(RdfPreFilter(n_products=1)) == [1, 2, 6]
+    assert filtered_indices(RdfPreFilter(n_reactants=1, n_products=1)) == [2, 6]
+    assert filtered_indices(RdfPreFilter(n_products=2)) == []
+
+
+def test_dtypes() -> None:
+    assert filtered_indices(RdfPreFilter(dtypes=["RXN:DUMMY_PRODUCT_YIELD_%"])) == [2]
+    assert filtered_indices(RdfPreFilter(dtypes=["RXN:ID1", "RXN:ID2"])) == [1, 2, 6]
+    # Prefixes of existing DTYPEs do not match
+    assert filtered_indices(RdfPreFilter(dtypes=["RXN:ID"])) == []
+
+
+def test_dtype_values() -> None:
+    pre_filter = RdfPreFilter(dtype_values={"RXN:ID2": "RX0000100002000004"})
+    assert filtered_indices(pre_filter) == [2]
+
+    # Multi-line values, without the $MFMT line
+    key = "RXN:SOLVENT(1):MOL(1):MOLSTRUCTURE"
+    pre_filter = RdfPreFilter(dtype_values={key: solvent_molstructure})
+    assert filtered_indices(pre_filter) == [6]
+    pre_filter = RdfPreFilter(dtype_values={key: solvent_molstructure[:-1]})
+    assert filtered_indices(pre_filter) == []
+
+
+def test_same_reactions_as_post_filtering() -> None:
+    pre_filter = RdfPreFilter(n_products=1, dtypes=["RXN:DUMMY_RXN_YIELD_%"])
+    assert list(RdfParser(sample_rdf, pre_filter=pre_filter)) == [
+        reaction
+        for reaction in RdfParser(sample_rdf)
+        if len(reaction.products) == 1 and "RXN:DUMMY_RXN_YIELD_%" in reaction.meta
+    ]
+
+
+@pytest.mark.parametrize("line_break", [b"\n", b"\r\n"])
+@pytest.mark.parametrize("suffix", ["", ".gz"])
+def test_file_formats(line_break: bytes, suffix: str) -> None:
+    pre_filter = RdfPreFilter(
+        reaction_indices=[1, 6], dtypes=["RXN:SOLVENT(1):MOL(1):SYMBOL(1):SYMBOL"]
+    )
+    expected = list(RdfParser(sample_rdf, pre_filter=pre_filter))
+    assert [reaction.reaction_index for reaction in expected] == [6]
+
+    content = sample_rdf.read_bytes().replace(b"\n", line_break)
+    with named_temporary_directory() as directory:
+        rdf_file = directory / f"sample.rdf{suffix}"
+        rdf_file.write_bytes(gzip.compress(content) if suffix else content)
+
+        parser = RdfParser(rdf_file, pre_filter=pre_filter)
+        assert list(parser) == expected
+        assert list(parser.iter_range(0)) == expected
+        assert parser.get(6) == expected[0]
+        with pytest.raises(KeyError):
+            parser.get(2)
+
+
+def test_byte_ranges() -> None:
+    pre_filter = RdfPreFilter(n_reactants=2, dtypes=["RXN:ID"])
+    with named_temporary_directory() as directory:
+        rdf_file = directory / "reactions.rdf"
+        generate_rdf_file(rdf_file, n_reactions=50, seed=3)
+        parser = RdfParser(rdf_file, pre_filter=pre_filter)
+        expected = [
+            reaction for reaction in RdfParser(rdf_file) if len(reaction.reactants) == 2
+        ]
+        assert 0 < len(expected) < 50
+        assert list(parser) == expected
+
+        reactions = [
+            reaction
+            for start, end in split_rdf_file(rdf_file, 4)
+            for reaction in parser.iter_byte_range(start, end)
+        ]
+        assert reactions == expected
@@ -1,7 +1,13 @@
+import pytest
+
+from rxn.chemutils.benchmarking.generators import generate_reaction_metadata
 from rxn.chemutils.rdf.property_parser import (
     PropertyParser,
+    TriePropertyParser,
     parse_properties,
+    parse_properties_trie,
     serialize_properties,
+    tokenize_property_key,
 )
 
 
@@ -127,3 +133,36 @@ def test_roundtrip() -> None:
         "F:G:H": "5",
     }
     assert serialize_properties(parse_properties(properties)) == properties
+
+
+def test_tokenize_property_key() -> None:
+    assert tokenize_property_key("PROP") == ((), "PROP")
+    assert tokenize_property_key("A(12):B:C(1)") == ((("A", 12), ("B", None)), "C(1)")
+
+    for key in ["", "A:", "A(1):"]:
+        with pytest.raises(ValueError):
+            tokenize_property_key(key)
+
+
+def test_trie_parser_incorrect_order() -> None:
+    parser = TriePropertyParser()
+    parser.parse_property("A(3):B", "3")
+    parser.parse_property("A(1):B", "1")
+    parser.parse_property("C:D", "4")
+    assert parser.result == {"A": [{"B": "1"}, {}, {"B": "3"}], "C": {"D": "4"}}
+
+
+def test_trie_parser_identical_to_property_parser() -> None:
+    properties = {
+        "A(1):B": "1",
+        "A(1):C": "2",
+        "A(3):B": "3",
+        "A(6):C": "4",
+        "F:G:H": "5",
+        "F:I(2):H(1)": "6",
+        "F::J": "7",
+    }
+    assert parse_properties_trie(properties) == parse_properties(properties)
+
+    for meta in generate_reaction_metadata(20, seed=3):
+        assert parse_properties_trie(meta) == parse_properties(meta)
@@ -0,0 +1,190 @@
+import csv
+import json
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+from rxn.utilities.files import load_list_from_file, named_temporary_directory
+
+from rxn.chemutils.benchmarking.generators import generate_rdf_file
+from rxn.chemutils.rdf import (
+    RdfParser,
+    convert_rdf_to_smiles,
+    rdf_export,
+    reaction_smiles_extractor,
+)
+from rxn.chemutils.rdf.rdf_export import (
+    MANIFEST_NAME,
+    ExportField,
+    RdfExporter,
+    _values_at_path,
+    export_rdf_file,
+)
+from rxn.chemutils.rdf.reaction_properties import ReactionProperties
+
+sample_rdf = Path(__file__).parent / "sample.rdf"
+
+
+def load_jsonl_shards(shard_files: List[Path]) -> List[Dict[str, Any]]:
+    return [
+        json.loads(line) for path in shard_files for line in load_list_from_file(path)
+    ]
+
+
+def test_export_sample() -> None:
+    fields = [
+        "reaction_index",
+        "smiles",
+        "solvents",
+        "ids=ID2",
+        "DUMMY_RXN_YIELD_%",
+        "solvent_structures=SOLVENT:MOLSTRUCTURE",
+    ]
+    with named_temporary_directory() as directory:
+        exporter = RdfExporter(fields=fields)
+        shard_files = exporter.export_file(sample_rdf, directory)
+        rows = load_jsonl_shards(shard_files)
+
+    assert [path.name for path in shard_files] == ["part-00000-0000.jsonl"]
+    assert exporter.columns == [
+        "reaction_index",
+        "smiles",
+        "solvents",
+        "ids",
+        "DUMMY_RXN_YIELD_%",
+        "solvent_structures",
+    ]
+    assert [row["reaction_index"] for row in rows] == [1, 2, 6]
+    assert rows[2]["smiles"] == (
+        "O=C1C=CC(=O)O1>CCOC(C)=O>O=C1OC(=O)C2C1C1C(=O)OC(=O)C21"
+    )
+    assert [row["solvents"] for row in rows] == [[], [], ["EtOAc"]]
+    assert [row["ids"] for row in rows] == [
+        ["RX0000100002000003"],
+        ["RX0000100002000004"],
+        ["RX0000100002000005"],
+    ]
+    assert rows[2]["DUMMY_RXN_YIELD_%"] == ["31"]
+    reaction = list(RdfParser(sample_rdf))[2]
+    assert rows[2]["solvent_structures"] == [
+        reaction.meta["RXN:SOLVENT(1):MOL(1):MOLSTRUCTURE"]
+    ]
+
+
+def test_property_paths() -> None:
+    properties = {
+        "VARIATION": [
+            {"PRODUCT": [{"YIELD": "50"}, {"YIELD": "20"}]},
+            {"PRODUCT": [{"YIELD": "60"}]},
+        ],
+        "STEP": {"TEMP": "25"},
+    }
+
+    def values(spec: str) -> List[str]:
+        path = ExportField.from_spec(spec).path
+        assert path is not None
+        return _values_at_path(properties, path)
+
+    assert values("VARIATION:PRODUCT:YIELD") == ["50", "20", "60"]
+    assert values("VARIATION:PRODUCT(1):YIELD") == ["50", "60"]
+    assert values("VARIATION(2):PRODUCT(1):YIELD") == ["60"]
+    assert values("VARIATION(3):PRODUCT:YIELD") == []
+    assert values("STEP:TEMP") == ["25"]
+    assert values("STEP(1):TEMP") == []
+
+    with pytest.raises(ValueError):
+        ExportField.from_spec("name=")
+
+
+@pytest.mark.parametrize("output_format", ["jsonl", "csv"])
+def test_parallel_export_matches_serial_one(output_format: str) -> None:
+    with named_temporary_directory() as directory:
+        rdf_file = directory / "generated.rdf"
+        generate_rdf_file(rdf_file, n_reactions=200, seed=3)
+        # Make some of the conversions fail
+        rdf_file.write_text(rdf_file.read_text().replace("V2000", "V9999", 20))
+
+        serial = export_rdf_file(
+            rdf_file,
+            directory / "serial",
+            output_format=output_format,
+            max_shard_bytes=4000,
+        )
+        parallel = export_rdf_file(
+            rdf_file,
+            directory / "parallel",
+            output_format=output_format,
+            max_shard_bytes=4000,
+            n_jobs=2,
+        )
+        assert parallel.total_reactions == serial.total_reactions == 200
+        assert parallel.successful_reactions == serial.successful_reactions < 200
+
+        def load_rows(shard_directory: Path) -> List[List[str]]:
+            rows: List[List[str]] = []
+            for path in sorted(shard_directory.glob("part-*")):
+                assert path.stat().st_size <= 4000
+                with open(path) as f:
+                    if output_format == "csv":
+                        rows.extend(list(csv.reader(f))[1:])
+                    else:
+                        rows.extend([line] for line in f)
+            return rows
+
+        serial_rows = load_rows(directory / "serial")
+        assert len(list((directory / "serial").glob("part-*"))) > 1
+        assert load_rows(directory / "parallel") == serial_rows
+
+        # Same SMILES as rxn-rdf-to-smiles
+        convert_rdf_to_smiles(rdf_file, directory / "reactions.smi")
+        if output_format == "jsonl":
+            smiles = [json.loads(row[0])["smiles"] for row in serial_rows]
+        else:
+            smiles = [row[1] for row in serial_rows]
+        assert smiles == load_list_from_file(directory / "reactions.smi")
+
+
+def test_properties_are_parsed_once_per_reaction(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    parsed = []
+
+    class CountingReactionProperties(ReactionProperties):
+        def __init__(self, *args: Any, **kwargs: Any):
+            parsed.append(1)
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(rdf_export, "ReactionProperties", CountingReactionProperties)
+    monkeypatch.setattr(
+        reaction_smiles_extractor, "ReactionProperties", CountingReactionProperties
+    )
+    with named_temporary_directory() as directory:
+        RdfExporter().export_file(sample_rdf, directory)
+
+    assert len(parsed) == 3
+
+
+def test_export_removes_shards_of_previous_export() -> None:
+    with named_temporary_directory() as directory:
+        rdf_file = directory / "generated.rdf"
+        generate_rdf_file(rdf_file, n_reactions=50, seed=3)
+        output_dir = directory / "export"
+        output_dir.mkdir()
+        # Not written by the exporter
+        (output_dir / "part-of-something-else.jsonl").write_text("keep me\n")
+
+        parallel_shards = RdfExporter(max_shard_bytes=1000).export_file(
+            rdf_file, output_dir, n_jobs=2
+        )
+        assert len(parallel_shards) > 1
+        assert load_list_from_file(output_dir / MANIFEST_NAME) == [
+            path.name for path in parallel_shards
+        ]
+
+        serial_shards = RdfExporter().export_file(rdf_file, output_dir)
+
+        assert sorted(output_dir.glob("part-0*")) == serial_shards
+        assert load_list_from_file(output_dir / MANIFEST_NAME) == [
+            path.name for path in serial_shards
+        ]
+        assert (output_dir / "part-of-something-else.jsonl").exists()
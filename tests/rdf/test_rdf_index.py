@@ -0,0 +1,99 @@
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+from rxn.utilities.files import named_temporary_directory
+
+from rxn.chemutils.rdf import RdfIndex, RdfParser, build_rdf_index
+from rxn.chemutils.rdf.rdf_index import default_index_path, split_rdf_file
+
+sample_rdf = Path(__file__).parent / "sample.rdf"
+
+
+def test_build_rdf_index() -> None:
+    index = build_rdf_index(sample_rdf)
+    content = sample_rdf.read_bytes()
+
+    assert len(index) == 3
+    assert list(index.reaction_indices) == [1, 2, 6]
+    for position in range(3):
+        _, offset, length = index.entry(position)
+        assert content[offset:].startswith(b"$RFMT")
+    # The reactions cover the file until its end
+    assert index.offsets[-1] + index.lengths[-1] == len(content)
+    assert index.position(6) == 2
+    with pytest.raises(KeyError):
+        index.position(3)
+
+
+def test_index_save_and_load() -> None:
+    index = build_rdf_index(sample_rdf)
+    with named_temporary_directory() as directory:
+        index.save(directory / "sample.idx")
+        loaded = RdfIndex.load(directory / "sample.idx")
+
+    assert loaded.reaction_indices == index.reaction_indices
+    assert loaded.offsets == index.offsets
+    assert loaded.lengths == index.lengths
+    assert loaded.file_size == index.file_size
+    assert loaded.file_mtime_ns == index.file_mtime_ns
+
+
+def test_random_access_matches_sequential_parsing() -> None:
+    with named_temporary_directory() as directory:
+        rdf_file = directory / "sample.rdf"
+        shutil.copy(sample_rdf, rdf_file)
+        parser = RdfParser(rdf_file)
+        reactions = list(parser)
+
+        assert parser.get(2) == reactions[1]
+        assert parser.get(6) == reactions[2]
+        assert list(parser.iter_range(1)) == reactions[1:]
+        assert list(parser.iter_range(0, 2)) == reactions[:2]
+
+        # The index was saved next to the RDF file and is reused
+        assert default_index_path(rdf_file).exists()
+        assert RdfParser(rdf_file).get(1) == reactions[0]
+
+
+def test_index_is_rebuilt_after_edit_keeping_the_file_size() -> None:
+    with named_temporary_directory() as directory:
+        rdf_file = directory / "sample.rdf"
+        shutil.copy(sample_rdf, rdf_file)
+        assert RdfParser(rdf_file).get(2).reaction_index == 2
+
+        content = rdf_file.read_bytes()
+        rdf_file.write_bytes(content.replace(b"$RIREG 2", b"$RIREG 7"))
+        # Make sure that the modification time differs, whatever its resolution
+        stat = rdf_file.stat()
+        os.utime(rdf_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        assert rdf_file.stat().st_size == len(content)
+
+        parser = RdfParser(rdf_file)
+        assert parser.get(7).reaction_index == 7
+        with pytest.raises(KeyError):
+            parser.get(2)
+
+
+def test_split_rdf_file() -> None:
+    index = build_rdf_index(sample_rdf)
+    file_size = sample_rdf.stat().st_size
+
+    # Ranges start at reaction boundaries and cover all the reactions
+    for n_ranges in [1, 2, 3, 10]:
+        byte_ranges = split_rdf_file(sample_rdf, n_ranges)
+        assert 1 <= len(byte_ranges) <= min(n_ranges, 3)
+        assert byte_ranges[0][0] == index.offsets[0]
+        assert byte_ranges[-1][1] == file_size
+        for (_, end), (start, _) in zip(byte_ranges, byte_ranges[1:]):
+            assert end == start
+            assert start in index.offsets
+
+    parser = RdfParser(sample_rdf)
+    reactions = [
+        reaction
+        for byte_range in split_rdf_file(sample_rdf, 10)
+        for reaction in parser.iter_byte_range(*byte_range)
+    ]
+    assert reactions == list(parser)
@@ -1,6 +1,10 @@
 from pathlib import Path
 
+import pytest
+from rxn.utilities.files import named_temporary_path
+
 from rxn.chemutils.rdf import RdfParser, ReactionSmilesExtractor
+from rxn.chemutils.rdf.rdf_reaction import LazyMeta
 
 sample_rdf = Path(__file__).parent / "sample.rdf"
 
@@ -62,3 +66,51 @@ def test_rdf_parser_extracted_smiles() -> None:
         "C=CCCCN1C(=O)C(C)=C(C)C1=O>>CC1=C(C)C(=O)N2CCCC2CC1=O",
         "O=C1C=CC(=O)O1>CCOC(C)=O>O=C1OC(=O)C2C1C1C(=O)OC(=O)C21",
     ]
+
+
+def test_mmap_scanner_is_equivalent() -> None:
+    text_parser = RdfParser(sample_rdf)
+    mmap_parser = RdfParser(sample_rdf, use_mmap=True)
+
+    text_blocks = list(text_parser.iter_blocks())
+    mmap_blocks = list(mmap_parser.iter_blocks())
+    assert [list(block) for block in mmap_blocks] == text_blocks
+
+    assert list(mmap_parser) == list(text_parser)
+
+
+def test_mmap_scanner_with_windows_line_endings() -> None:
+    with named_temporary_path() as path:
+        path.write_bytes(sample_rdf.read_bytes().replace(b"\n", b"\r\n"))
+        assert list(RdfParser(path, use_mmap=True)) == list(RdfParser(sample_rdf))
+
+
+@pytest.mark.parametrize("use_mmap", [False, True])
+def test_lazy_meta(use_mmap: bool) -> None:
+    reactions = list(RdfParser(sample_rdf))
+    lazy_reactions = list(RdfParser(sample_rdf, use_mmap=use_mmap, lazy_meta=True))
+
+    meta = lazy_reactions[2].meta
+    assert isinstance(meta, LazyMeta)
+    assert meta["RXN:SOLVENT(1):MOL(1):MOLSTRUCTURE"] == solvent_molstructure
+    assert list(meta) == list(reactions[2].meta)
+
+    assert lazy_reactions == reactions
+
+
+@pytest.mark.parametrize("lazy_meta", [False, True])
+def test_meta_keys(lazy_meta: bool) -> None:
+    parser = RdfParser(
+        sample_rdf,
+        lazy_meta=lazy_meta,
+        meta_keys=["RXN:ID2", "RXN:*:MOLSTRUCTURE"],
+    )
+    reactions = list(parser)
+
+    assert dict(reactions[2].meta) == {
+        "RXN:ID2": "RX0000100002000005",
+        "RXN:SOLVENT(1):MOL(1):MOLSTRUCTURE": solvent_molstructure,
+    }
+    assert [reaction.reactants for reaction in reactions] == [
+        reaction.reactants for reaction in RdfParser(sample_rdf)
+    ]
@@ -1,4 +1,9 @@
+import json
+import pickle
+from typing import List
+
 from rxn.chemutils.rdf import RdfReaction, ReactionSmilesExtractor
+from rxn.chemutils.rdf.rdf_reaction import LazyMeta
 
 dummy_molstructure = """
   SOMEINFO          2D 1   1.00000     0.00000     0
@@ -35,3 +40,32 @@ def test_to_reaction_smiles() -> None:
     assert rse.to_reaction_smiles(reaction) == "CCOC(C)=O>CCOC(C)=O>CCOC(C)=O"
     # call it again
     assert rse.to_reaction_smiles(reaction) == "CCOC(C)=O>CCOC(C)=O>CCOC(C)=O"
+
+
+def test_lazy_meta_is_a_dict() -> None:
+    materialized: List[str] = []
+
+    def materialize(raw: str) -> str:
+        materialized.append(raw)
+        return raw.upper()
+
+    meta = LazyMeta({"a": "x", "b": "y", "c": "z"}, materialize)
+    assert isinstance(meta, dict)
+    assert len(meta) == 3 and "b" in meta and list(meta) == ["a", "b", "c"]
+    assert materialized == []
+
+    assert meta["b"] == "Y"
+    assert meta.get("d") is None
+    assert materialized == ["y"]
+
+    assert {**meta} == dict(meta) == {"a": "X", "b": "Y", "c": "Z"}
+    assert json.dumps(meta) == '{"a": "X", "b": "Y", "c": "Z"}'
+    assert pickle.loads(pickle.dumps(meta)) == meta
+    assert sorted(materialized) == ["x", "y", "z"]
+
+    other = LazyMeta({"a": "x"}, str.upper)
+    other["a"] = "changed"
+    other["new"] = "value"
+    assert other == {"a": "changed", "new": "value"}
+    del other["a"]
+    assert list(other.items()) == [("new", "value")]
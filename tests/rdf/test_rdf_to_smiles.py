@@ -0,0 +1,169 @@
+import json
+from pathlib import Path
+from typing import Any
+
+import pytest
+from rxn.utilities.files import load_list_from_file, named_temporary_directory
+
+from rxn.chemutils.benchmarking.generators import generate_rdf_file
+from rxn.chemutils.rdf import RdfToSmilesConverter, convert_rdf_to_smiles
+from rxn.chemutils.rdf.rdf_to_smiles import (
+    STAGE_MOLBLOCKS,
+    ConversionCheckpoint,
+    default_checkpoint_path,
+)
+
+sample_rdf = Path(__file__).parent / "sample.rdf"
+sample_rdf_with_unknown_structure = (
+    Path(__file__).parent / "sample_with_unknown_structure.rdf"
+)
+
+
+@pytest.mark.parametrize(
+    "rdf_file", [sample_rdf, sample_rdf_with_unknown_structure, None]
+)
+def test_parallel_conversion_matches_serial_one(rdf_file: Path) -> None:
+    with named_temporary_directory() as directory:
+        if rdf_file is None:
+            rdf_file = directory / "generated.rdf"
+            generate_rdf_file(rdf_file, n_reactions=200, seed=3)
+            # Make some of the conversions fail
+            content = rdf_file.read_text().replace("V2000", "V9999", 20)
+            rdf_file.write_text(content)
+
+        serial = convert_rdf_to_smiles(rdf_file, directory / "serial.smi")
+        parallel = convert_rdf_to_smiles(rdf_file, directory / "parallel.smi", n_jobs=2)
+
+        assert load_list_from_file(directory / "parallel.smi") == load_list_from_file(
+            directory / "serial.smi"
+        )
+    assert parallel.total_reactions == serial.total_reactions
+    assert parallel.successful_reactions == serial.successful_reactions
+
+
+def generate_rdf_with_failures(rdf_file: Path) -> None:
+    generate_rdf_file(rdf_file, n_reactions=200, seed=3)
+    content = rdf_file.read_text().replace("V2000", "V9999", 20)
+    rdf_file.write_text(content)
+
+
+def test_failures_file() -> None:
+    with named_temporary_directory() as directory:
+        rdf_file = directory / "generated.rdf"
+        generate_rdf_with_failures(rdf_file)
+
+        converter = convert_rdf_to_smiles(rdf_file, directory / "reactions.smi")
+        failures = [
+            json.loads(line)
+            for line in load_list_from_file(directory / "reactions.smi.failures.jsonl")
+        ]
+
+    n_failures = converter.total_reactions - converter.successful_reactions
+    assert 0 < n_failures == len(failures)
+    assert sum(converter.failure_counts.values()) == n_failures
+    assert set(failures[0]) == {"reaction_index", "error_type", "message", "stage"}
+    assert {failure["stage"] for failure in failures} == {STAGE_MOLBLOCKS}
+
+
+@pytest.mark.parametrize("n_jobs", [1, 2])
+def test_resume_interrupted_conversion(
+    n_jobs: int, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    with named_temporary_directory() as directory:
+        rdf_file = directory / "generated.rdf"
+        generate_rdf_with_failures(rdf_file)
+        convert_rdf_to_smiles(rdf_file, directory / "expected.smi")
+
+        # Interrupt the conversion after 120 reactions
+        smiles_file = directory / "reactions.smi"
+        converter = RdfToSmilesConverter()
+        to_string = converter.extractor.to_string
+        n_calls = 0
+
+        def interrupted_to_string(*args: Any) -> str:
+            nonlocal n_calls
+            n_calls += 1
+            if n_calls > 120:
+                raise KeyboardInterrupt()
+            return to_string(*args)
+
+        monkeypatch.setattr(converter.extractor, "to_string", interrupted_to_string)
+        with pytest.raises(KeyboardInterrupt):
+            converter.convert_file(rdf_file, smiles_file, checkpoint_interval=50)
+        checkpoint = ConversionCheckpoint.load(default_checkpoint_path(smiles_file))
+        assert not checkpoint.finished
+        assert 0 < checkpoint.total_reactions < 200
+
+        resumed = RdfToSmilesConverter()
+        resumed.convert_file(rdf_file, smiles_file, n_jobs=n_jobs, resume=True)
+
+        assert load_list_from_file(smiles_file) == load_list_from_file(
+            directory / "expected.smi"
+        )
+        assert (directory / "reactions.smi.failures.jsonl").read_bytes() == (
+            directory / "expected.smi.failures.jsonl"
+        ).read_bytes()
+        assert resumed.total_reactions == 200
+        assert ConversionCheckpoint.load(default_checkpoint_path(smiles_file)).finished
+
+        # Resuming a finished conversion does nothing
+        again = convert_rdf_to_smiles(rdf_file, smiles_file, resume=True)
+        assert again.successful_reactions == resumed.successful_reactions
+        assert load_list_from_file(smiles_file) == load_list_from_file(
+            directory / "expected.smi"
+        )
+
+
+def test_resume_modified_file() -> None:
+    with named_temporary_directory() as directory:
+        rdf_file = directory / "generated.rdf"
+        generate_rdf_file(rdf_file, n_reactions=20, seed=3)
+        smiles_file = directory / "reactions.smi"
+        convert_rdf_to_smiles(rdf_file, smiles_file)
+
+        checkpoint_file = default_checkpoint_path(smiles_file)
+        checkpoint = ConversionCheckpoint.load(checkpoint_file)
+        checkpoint.finished = False
+        checkpoint.rdf_size += 1
+        checkpoint.save(checkpoint_file)
+        with pytest.raises(ValueError):
+            convert_rdf_to_smiles(rdf_file, smiles_file, resume=True)
+
+
+def test_profile() -> None:
+    with named_temporary_directory() as directory:
+        rdf_file = directory / "generated.rdf"
+        generate_rdf_with_failures(rdf_file)
+
+        serial = convert_rdf_to_smiles(rdf_file, directory / "serial.smi", profile=True)
+        parallel = convert_rdf_to_smiles(
+            rdf_file, directory / "parallel.smi", n_jobs=2, profile=True
+        )
+        saved = json.loads((directory / "serial.smi.profile.json").read_text())
+
+        assert load_list_from_file(directory / "parallel.smi") == load_list_from_file(
+            directory / "serial.smi"
+        )
+
+    assert serial.profiler is not None and parallel.profiler is not None
+    assert saved == serial.profiler.to_dict()
+    serial_stats = serial.profiler.stats
+    for stage in [
+        "rdf.blocks",
+        "rdf.handle_rfmt",
+        "rdf.handle_mol",
+        "rdf.handle_datum",
+        "extractor.properties",
+        "extractor.molblocks",
+        "extractor.mdl_to_mol",
+        "extractor.mol_to_smiles",
+        "extractor.to_string",
+        "rdf_to_smiles.total",
+    ]:
+        assert serial_stats[stage].calls > 0
+    assert serial_stats["rdf.handle_rfmt"].calls == 200
+    for stage in ["rdf.handle_rfmt", "rdf.handle_mol", "extractor.properties"]:
+        assert parallel.profiler.stats[stage].calls == serial_stats[stage].calls
+
+    # Disabled by default
+    assert RdfToSmilesConverter().profiler is None
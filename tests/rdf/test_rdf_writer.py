@@ -0,0 +1,96 @@
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from rxn.utilities.files import named_temporary_directory
+
+from rxn.chemutils.benchmarking.generators import generate_rdf_file
+from rxn.chemutils.rdf import RdfParser, RdfWriter
+from rxn.chemutils.rdf.property_parser import parse_properties
+
+sample_rdf = Path(__file__).parent / "sample.rdf"
+
+
+@pytest.mark.parametrize("suffix", ["", ".gz"])
+def test_roundtrip(suffix: str) -> None:
+    reactions = list(RdfParser(sample_rdf))
+    with named_temporary_directory() as directory:
+        rdf_file = directory / f"out.rdf{suffix}"
+        with RdfWriter(rdf_file, date=datetime(2024, 1, 2, 3, 4, 5)) as writer:
+            for reaction in reactions:
+                writer.write(reaction)
+        assert writer.n_reactions == 3
+
+        assert list(RdfParser(rdf_file)) == reactions
+        if not suffix:
+            lines = rdf_file.read_text().splitlines()
+            assert lines[:2] == ["$RDFILE 1", "$DATM 02-JAN-2024 03:04:05"]
+            assert "$DATUM $MFMT" in lines
+
+
+def test_write_edited_properties() -> None:
+    reaction = list(RdfParser(sample_rdf))[2]
+    properties = parse_properties(dict(reaction.meta))
+    properties["RXN"]["SOLVENT"][0]["MOL"][0]["SYMBOL"][0]["SYMBOL"] = "EtOAc"
+
+    with named_temporary_directory() as directory:
+        rdf_file = directory / "out.rdf"
+        with RdfWriter(rdf_file) as writer:
+            writer.write(reaction, properties=properties)
+        written = list(RdfParser(rdf_file))[0]
+
+    key = "RXN:SOLVENT(1):MOL(1):SYMBOL(1):SYMBOL"
+    assert written.meta[key] == "EtOAc"
+    assert {k: v for k, v in written.meta.items() if k != key} == {
+        k: v for k, v in reaction.meta.items() if k != key
+    }
+
+
+def test_reagents_are_not_supported() -> None:
+    reaction = list(RdfParser(sample_rdf))[0]
+    reaction.reagents = reaction.reactants[:1]
+    with named_temporary_directory() as directory:
+        with RdfWriter(directory / "out.rdf") as writer:
+            with pytest.raises(ValueError):
+                writer.write(reaction)
+
+
+def test_copy_reactions() -> None:
+    with named_temporary_directory() as directory:
+        rdf_file = directory / "reactions.rdf"
+        generate_rdf_file(rdf_file, n_reactions=20, seed=3)
+        parser = RdfParser(rdf_file)
+        reactions = list(parser)
+        positions = [0, 1, 2, 7, 19, 10]
+
+        output_file = directory / "copy.rdf"
+        with RdfWriter(output_file) as writer:
+            writer.copy_reactions(parser, positions[:3])
+            writer.write(reactions[5])
+            writer.copy_reactions(parser, positions[3:])
+        assert writer.n_reactions == 7
+
+        copied = list(RdfParser(output_file))
+        assert copied == [reactions[i] for i in [0, 1, 2, 5, 7, 19, 10]]
+
+        # Raw bytes, in chunks smaller than the reactions
+        chunks = list(parser.iter_raw_bytes([3, 4], chunk_size=100))
+        assert max(len(chunk) for chunk in chunks) == 100
+        _, offset, _ = parser.index.entry(3)
+        _, _, length = parser.index.entry(4)
+        end = parser.index.offsets[4] + length
+        assert b"".join(chunks) == rdf_file.read_bytes()[offset:end]
+
+
+def test_copy_last_reaction_without_line_break() -> None:
+    with named_temporary_directory() as directory:
+        rdf_file = directory / "sample.rdf"
+        rdf_file.write_bytes(sample_rdf.read_bytes().rstrip(b"\n"))
+        parser = RdfParser(rdf_file)
+
+        output_file = directory / "copy.rdf"
+        with RdfWriter(output_file) as writer:
+            writer.copy_reactions(parser, [2, 0])
+        assert list(RdfParser(output_file)) == [
+            list(RdfParser(sample_rdf))[i] for i in [2, 0]
+        ]
@@ -2,7 +2,9 @@ from pathlib import Path
 
 import pytest
 
+from rxn.chemutils.exceptions import InvalidMdl
 from rxn.chemutils.rdf import RdfParser, RdfReaction, ReactionSmilesExtractor
+from rxn.chemutils.rdf.reaction_smiles_extractor import molblock_cache_key
 
 sample_rdf = Path(__file__).parent / "sample_with_unknown_structure.rdf"
 
@@ -20,3 +22,41 @@ def test_smiles_extraction_simple(reaction: RdfReaction) -> None:
         extractor.to_reaction_smiles(reaction)
         == "O=C1C=CC(=O)O1>CCOC(C)=O.*>O=C1OC(=O)C2C1C1C(=O)OC(=O)C21"
     )
+
+
+def test_molblock_cache(reaction: RdfReaction) -> None:
+    extractor = ReactionSmilesExtractor()
+    uncached_extractor = ReactionSmilesExtractor(cache_size=0)
+
+    for _ in range(3):
+        assert extractor.to_reaction_smiles(
+            reaction
+        ) == uncached_extractor.to_reaction_smiles(reaction)
+
+    cache_info = extractor.cache_info()
+    assert cache_info.misses == 4
+    assert cache_info.hits == 8
+    assert cache_info.currsize == 4
+    assert uncached_extractor.cache_info().currsize == 0
+
+
+def test_molblock_cache_key_ignores_header_except_dimension() -> None:
+    mol_block = list(RdfParser(sample_rdf))[0].reactants[0]
+    name, header, comment, rest = mol_block.split("\n", 3)
+    other_header = header[:10] + "9999999999" + header[20:]
+    other_mol_block = "\n".join(["name", other_header, "comment", rest])
+    three_d_header = header[:20] + "3D" + header[22:]
+    three_d_mol_block = "\n".join([name, three_d_header, comment, rest])
+
+    key = molblock_cache_key(mol_block)
+    assert molblock_cache_key(other_mol_block) == key
+    assert molblock_cache_key(three_d_mol_block) != key
+
+
+def test_molblock_cache_with_failures() -> None:
+    extractor = ReactionSmilesExtractor(cache_size=1)
+    for _ in range(2):
+        with pytest.raises(InvalidMdl):
+            extractor._to_smiles("\n  invalid\n\n  1  0\n")
+    assert extractor.cache_info().hits == 1
+    assert extractor.cache_info().misses == 1
@@ -0,0 +1,196 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import BrokenExecutor
+from typing import Any, List
+
+import pytest
+
+from rxn.chemutils import async_api
+from rxn.chemutils.async_api import (
+    AsyncBatcher,
+    canonicalize_any_async,
+    parse_any_reaction_smiles_async,
+    tokenize_smiles_async,
+)
+from rxn.chemutils.exceptions import InvalidReactionSmiles, InvalidSmiles
+from rxn.chemutils.executors import ThreadExecutor
+from rxn.chemutils.miscellaneous import canonicalize_any
+from rxn.chemutils.reaction_equation import ReactionEquation
+from rxn.chemutils.tokenization import TokenizationError, tokenize_smiles
+
+SMILES = ["OCC", "C(C)O.[Na+].[Cl-]", "CC(C)>>C(C)C", "c1ccccc1N"] * 25
+
+
+def test_concurrent_calls_are_batched() -> None:
+    async def run() -> List[str]:
+        async with AsyncBatcher(n_jobs=2, max_batch_size=30) as batcher:
+            results = await asyncio.gather(
+                *(batcher.canonicalize_any(s) for s in SMILES)
+            )
+            assert batcher.submitted_calls == 100
+            assert batcher.submitted_batches == 4
+            return results
+
+    assert asyncio.run(run()) == [canonicalize_any(s) for s in SMILES]
+
+
+def test_options_are_not_mixed() -> None:
+    async def run() -> List[str]:
+        async with AsyncBatcher("thread", n_jobs=1) as batcher:
+            results = await asyncio.gather(
+                batcher.canonicalize_any("CFC", check_valence=False),
+                batcher.canonicalize_any("CFC", fallback_value="X"),
+                batcher.canonicalize_any("O.CC>>N", sort_molecules=True),
+                batcher.canonicalize_any("O.CC>>N"),
+            )
+            assert batcher.submitted_batches == 4
+        return list(results)
+
+    assert asyncio.run(run()) == ["CFC", "X", "CC.O>>N", "O.CC>>N"]
+
+
+@pytest.mark.parametrize("backend", ["thread", "process"])
+def test_original_exceptions_are_raised(backend: str) -> None:
+    async def run() -> None:
+        async with AsyncBatcher(backend, n_jobs=1) as batcher:
+            results = await asyncio.gather(
+                batcher.canonicalize_any("CCO"),
+                batcher.canonicalize_any("invalid"),
+                batcher.tokenize_smiles("C_C"),
+                batcher.parse_any_reaction_smiles("CC>O"),
+                return_exceptions=True,
+            )
+        assert results[0] == "CCO"
+        assert isinstance(results[1], InvalidSmiles)
+        assert isinstance(results[2], TokenizationError)
+        assert isinstance(results[3], InvalidReactionSmiles)
+
+    asyncio.run(run())
+
+
+def test_failed_calls_are_not_executed_again(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls: List[str] = []
+
+    def tokenize(smiles: str, **kwargs: Any) -> str:
+        calls.append(smiles)
+        return tokenize_smiles(smiles, **kwargs)
+
+    monkeypatch.setitem(async_api._OPERATIONS, "tokenize_smiles", tokenize)
+
+    async def run() -> None:
+        async with AsyncBatcher("thread", n_jobs=1) as batcher:
+            with pytest.raises(TokenizationError):
+                await batcher.tokenize_smiles("C_C")
+
+    asyncio.run(run())
+    assert calls == ["C_C"]
+
+
+@pytest.mark.skipif(
+    multiprocessing.get_start_method() != "fork",
+    reason="the patched operation must be inherited by the worker processes",
+)
+def test_pool_is_replaced_after_a_worker_dies(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    def tokenize(smiles: str, **kwargs: Any) -> str:
+        if smiles == "crash":
+            os._exit(1)
+        return tokenize_smiles(smiles, **kwargs)
+
+    # The worker processes are forked after the patch
+    monkeypatch.setitem(async_api._OPERATIONS, "tokenize_smiles", tokenize)
+
+    async def run() -> None:
+        async with AsyncBatcher("process", n_jobs=1) as batcher:
+            with pytest.raises(BrokenExecutor):
+                await batcher.tokenize_smiles("crash")
+            assert await batcher.tokenize_smiles("CCO") == "C C O"
+
+    asyncio.run(run())
+
+
+def test_invalid_backend() -> None:
+    with pytest.raises(ValueError):
+        AsyncBatcher("serial")
+
+
+def test_backpressure(monkeypatch: pytest.MonkeyPatch) -> None:
+    batch_sizes: List[int] = []
+    batches_in_flight: List[int] = []
+    outstanding = 0
+    submit = ThreadExecutor.submit
+
+    def counting_submit(
+        self: ThreadExecutor, pool: Any, function: Any, task: Any
+    ) -> Any:
+        nonlocal outstanding
+        outstanding += 1
+        batch_sizes.append(len(task[2]))
+        batches_in_flight.append(outstanding)
+        future = submit(self, pool, function, task)
+        future.add_done_callback(lambda _: decrement())
+        return future
+
+    def decrement() -> None:
+        nonlocal outstanding
+        outstanding -= 1
+
+    monkeypatch.setattr(ThreadExecutor, "submit", counting_submit)
+
+    async def run() -> List[str]:
+        async with AsyncBatcher(
+            "thread", n_jobs=1, max_batch_size=4, max_pending=8
+        ) as batcher:
+            return list(
+                await asyncio.gather(*(batcher.tokenize_smiles(s) for s in SMILES))
+            )
+
+    results = asyncio.run(run())
+    assert results[:2] == ["O C C", "C ( C ) O . [Na+] . [Cl-]"]
+    assert len(results) == 100
+    assert batch_sizes == [4] * 25
+    # Never more than 8 calls (2 batches) in flight
+    assert max(batches_in_flight) <= 2
+
+
+def test_loop_is_not_blocked() -> None:
+    async def run() -> int:
+        ticks = 0
+        done = False
+
+        async def ticker() -> None:
+            nonlocal ticks
+            while not done:
+                ticks += 1
+                await asyncio.sleep(0)
+
+        async with AsyncBatcher("thread", n_jobs=1, max_batch_size=10) as batcher:
+            ticker_task = asyncio.ensure_future(ticker())
+            await asyncio.gather(*(batcher.canonicalize_any(s) for s in SMILES))
+            done = True
+            await ticker_task
+        return ticks
+
+    assert asyncio.run(run()) > 1
+
+
+@pytest.mark.parametrize("n_runs", [2])
+def test_module_level_functions(n_runs: int) -> None:
+    async def run() -> List[Any]:
+        return list(
+            await asyncio.gather(
+                canonicalize_any_async("C(C)O"),
+                tokenize_smiles_async("CC(C)O"),
+                parse_any_reaction_smiles_async("CC>>O"),
+            )
+        )
+
+    # Successive event loops share the same batcher
+    for _ in range(n_runs):
+        assert asyncio.run(run()) == [
+            "CCO",
+            "C C ( C ) O",
+            ReactionEquation(["CC"], [], ["O"]),
+        ]
@@ -0,0 +1,164 @@
+import io
+import json
+from typing import List, Optional
+
+import pytest
+from click.testing import CliRunner
+from rxn.utilities.files import named_temporary_directory
+
+from rxn.chemutils import shared_memory_transport
+from rxn.chemutils.batch_canonicalization import (
+    BatchCanonicalizer,
+    CanonicalizationFailure,
+)
+from rxn.chemutils.exceptions import InvalidSmiles
+from rxn.chemutils.scripts.canonicalize import main as canonicalize_main
+
+LINES = ["OCC", "C(C)O.[Na+].[Cl-]", "CFC", "CC(C)>>C(C)C", "invalid", ""] * 7
+
+
+@pytest.mark.parametrize(
+    "n_jobs, backend", [(1, "process"), (2, "process"), (2, "thread")]
+)
+def test_canonicalize_lines(n_jobs: int, backend: str) -> None:
+    failures: List[CanonicalizationFailure] = []
+    canonicalizer = BatchCanonicalizer(
+        invalid_placeholder="X", n_jobs=n_jobs, chunk_size=4, backend=backend
+    )
+    canonicalizer.failure_sink = failures.append
+
+    results = list(canonicalizer.canonicalize_lines(LINES))
+
+    assert results[:6] == ["CCO", "CCO.[Cl-].[Na+]", "X", "CCC>>CCC", "X", "X"]
+    assert results == results[:6] * 7
+    assert canonicalizer.total_lines == 42
+    assert canonicalizer.failed_lines == len(failures) == 21
+    assert failures[0] == CanonicalizationFailure(
+        line_number=3,
+        input="CFC",
+        error_type="InvalidSmiles",
+        message='"CFC" is not a valid SMILES string',
+    )
+    assert [f.line_number for f in failures[:3]] == [3, 5, 6]
+
+
+@pytest.mark.parametrize(
+    "n_jobs, backend", [(1, "process"), (2, "process"), (2, "thread")]
+)
+def test_first_failure_is_raised(n_jobs: int, backend: str) -> None:
+    canonicalizer = BatchCanonicalizer(n_jobs=n_jobs, chunk_size=2, backend=backend)
+    results: List[str] = []
+    with pytest.raises(InvalidSmiles, match="CFC"):
+        for result in canonicalizer.canonicalize_lines(LINES):
+            results.append(result)
+    assert results == ["CCO", "CCO.[Cl-].[Na+]"]
+    assert canonicalizer.total_lines == 3
+
+
+@pytest.mark.parametrize("invalid_placeholder", ["X", None])
+def test_results_through_shared_memory(
+    invalid_placeholder: Optional[str], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    received: List[int] = []
+
+    class RecordingSharedStrings(shared_memory_transport.SharedStrings):
+        def __init__(self, handle: shared_memory_transport.SharedStringsHandle):
+            super().__init__(handle)
+            received.append(len(self))
+
+    monkeypatch.setattr(
+        shared_memory_transport, "SharedStrings", RecordingSharedStrings
+    )
+    canonicalizer = BatchCanonicalizer(
+        invalid_placeholder=invalid_placeholder,
+        n_jobs=2,
+        chunk_size=4,
+        shared_memory=True,
+    )
+
+    results: List[str] = []
+    if invalid_placeholder is None:
+        with pytest.raises(InvalidSmiles, match="CFC"):
+            results.extend(canonicalizer.canonicalize_lines(LINES))
+        assert results == ["CCO", "CCO.[Cl-].[Na+]"]
+    else:
+        results.extend(canonicalizer.canonicalize_lines(LINES))
+        assert results == list(
+            BatchCanonicalizer(invalid_placeholder="X").canonicalize_lines(LINES)
+        )
+        assert canonicalizer.failed_lines == 21
+        assert sum(received) == 42
+    assert received
+
+
+def test_stream_through_shared_memory(monkeypatch: pytest.MonkeyPatch) -> None:
+    def to_list(self: shared_memory_transport.SharedStrings) -> List[str]:
+        raise AssertionError("The results should not be decoded.")
+
+    canonicalizer = BatchCanonicalizer(
+        invalid_placeholder="X", n_jobs=2, chunk_size=4, shared_memory=True
+    )
+    expected = "".join(
+        f"{result}\n"
+        for result in BatchCanonicalizer(invalid_placeholder="X").canonicalize_lines(
+            LINES
+        )
+    )
+
+    with named_temporary_directory() as directory:
+        input_file = directory / "input.txt"
+        input_file.write_text("".join(f"{line}\n" for line in LINES))
+        output_file = directory / "output.txt"
+        with monkeypatch.context() as m:
+            m.setattr(shared_memory_transport.SharedStrings, "to_list", to_list)
+            with open(input_file, "rt") as f_in, open(
+                output_file, "wt", encoding="utf-8"
+            ) as f_out:
+                f_out.write("first line\n")
+                canonicalizer.process_stream(f_in, f_out)
+        assert output_file.read_text() == "first line\n" + expected
+
+    # Text stream without binary buffer
+    output = io.StringIO()
+    canonicalizer.process_stream(
+        io.StringIO("".join(f"{line}\n" for line in LINES)), output
+    )
+    assert output.getvalue() == expected
+
+
+@pytest.mark.parametrize("jobs", ["1", "3"])
+def test_script(jobs: str) -> None:
+    runner = CliRunner()
+    with named_temporary_directory() as directory:
+        input_file = directory / "input.txt"
+        input_file.write_text("".join(f"{line}\n" for line in LINES))
+        output_file = directory / "output.txt"
+        errors_file = directory / "errors.jsonl"
+
+        result = runner.invoke(
+            canonicalize_main,
+            [
+                str(input_file),
+                str(output_file),
+                "--invalid_placeholder",
+                "",
+                "--jobs",
+                jobs,
+                "--chunk_size",
+                "5",
+                "--errors_file",
+                str(errors_file),
+            ],
+        )
+        output = output_file.read_text()
+        errors = [json.loads(line) for line in errors_file.read_text().splitlines()]
+
+    assert result.exit_code == 0
+    assert output == "CCO\nCCO.[Cl-].[Na+]\n\nCCC>>CCC\n\n\n" * 7
+    assert len(errors) == 21
+    assert errors[1] == {
+        "line_number": 5,
+        "input": "invalid",
+        "error_type": "InvalidSmiles",
+        "message": '"invalid" is not a valid SMILES string',
+    }
@@ -0,0 +1,146 @@
+import socket
+import subprocess
+import sys
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+from rxn.utilities.files import named_temporary_directory
+
+from rxn.chemutils.canonicalization_daemon import (
+    CanonicalizationClient,
+    CanonicalizationDaemon,
+    ProtocolError,
+    canonicalize_batch,
+    receive_frame,
+    send_frame,
+)
+from rxn.chemutils.exceptions import InvalidSmiles
+from rxn.chemutils.miscellaneous import canonicalize_any
+
+SMILES = ["OCC", "C(C)O.[Na+].[Cl-]", "CC(C)>>C(C)C", "invalid", "CFC"]
+
+
+@pytest.fixture
+def socket_path() -> Iterator[Path]:
+    with named_temporary_directory() as directory:
+        yield directory / "daemon.sock"
+
+
+def test_frame_roundtrip() -> None:
+    left, right = socket.socketpair()
+    with left, right:
+        send_frame(left, {"op": "canonicalize", "smiles": ["CCO", "é"]})
+        send_frame(left, [1, 2])
+        assert receive_frame(right) == {"op": "canonicalize", "smiles": ["CCO", "é"]}
+        assert receive_frame(right) == [1, 2]
+
+        left.sendall(b"\x00\x00\x00\x05[1,")
+        left.close()
+        with pytest.raises(ProtocolError):
+            receive_frame(right)
+
+
+def test_end_of_connection() -> None:
+    left, right = socket.socketpair()
+    with right:
+        left.close()
+        assert receive_frame(right) is None
+
+
+def test_canonicalization_with_daemon(socket_path: Path) -> None:
+    with CanonicalizationDaemon(socket_path), CanonicalizationClient(
+        socket_path
+    ) as client:
+        assert client.daemon_is_available()
+
+        results = client.canonicalize_batch(SMILES, fallback_value="X")
+        expected = [canonicalize_any(s) for s in SMILES[:3]] + ["X", "X"]
+        assert results == expected
+
+        # Second time from the cache, with the same results
+        assert client.canonicalize_batch(SMILES, fallback_value="X") == expected
+        stats = client.stats()
+        assert stats is not None
+        assert stats["misses"] == 5
+        assert stats["hits"] == 5
+
+        # Different options are not confused in the cache
+        assert client.canonicalize_batch(["CFC"], check_valence=False) == ["CFC"]
+        assert client.canonicalize_batch(
+            ["C.O"], sort_molecules=True
+        ) == canonicalize_batch(["C.O"], sort_molecules=True, socket_path=socket_path)
+
+    # The socket is removed on shutdown
+    assert not socket_path.exists()
+
+
+def test_original_exception_is_raised(socket_path: Path) -> None:
+    with CanonicalizationDaemon(socket_path), CanonicalizationClient(
+        socket_path
+    ) as client:
+        with pytest.raises(InvalidSmiles):
+            client.canonicalize_batch(["CCO", "invalid"])
+
+
+def test_fallback_without_daemon(socket_path: Path) -> None:
+    with CanonicalizationClient(socket_path) as client:
+        assert not client.daemon_is_available()
+        assert client.stats() is None
+
+        results = client.canonicalize_batch(SMILES, fallback_value="X")
+        assert results == [canonicalize_any(s) for s in SMILES[:3]] + ["X", "X"]
+
+        with pytest.raises(InvalidSmiles):
+            client.canonicalize_batch(["invalid"])
+
+
+def test_stale_socket_is_replaced(socket_path: Path) -> None:
+    # Socket file without any process listening on it
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(str(socket_path))
+    stale.close()
+    assert socket_path.exists()
+
+    with CanonicalizationDaemon(socket_path):
+        assert canonicalize_batch(["OCC"], socket_path=socket_path) == ["CCO"]
+
+        # But not a socket of a running daemon
+        with pytest.raises(RuntimeError):
+            CanonicalizationDaemon(socket_path).start()
+
+
+def test_shutdown_request(socket_path: Path) -> None:
+    daemon = CanonicalizationDaemon(socket_path)
+    daemon.start()
+    assert daemon._thread is not None
+
+    with CanonicalizationClient(socket_path) as client:
+        client.shutdown_daemon()
+    daemon._thread.join(timeout=10)
+
+    assert not daemon._thread.is_alive()
+    assert not CanonicalizationClient(socket_path).daemon_is_available()
+
+
+def test_invalid_request(socket_path: Path) -> None:
+    with CanonicalizationDaemon(socket_path) as daemon:
+        assert "error" in daemon.handle_request({"op": "unknown"})
+        assert "error" in daemon.handle_request({"op": "canonicalize", "smiles": 1})
+        assert "error" in daemon.handle_request([])
+
+        with CanonicalizationClient(socket_path) as client:
+            with pytest.raises(RuntimeError):
+                client._request({"op": "unknown"})
+
+
+def test_client_does_not_import_rdkit(socket_path: Path) -> None:
+    code = (
+        "import sys\n"
+        "from rxn.chemutils.canonicalization_daemon import canonicalize_batch\n"
+        f"results = canonicalize_batch(['OCC'], socket_path={str(socket_path)!r})\n"
+        "assert results == ['CCO'], results\n"
+        "assert 'rdkit' not in sys.modules\n"
+    )
+    with CanonicalizationDaemon(socket_path):
+        subprocess.run([sys.executable, "-c", code], check=True)
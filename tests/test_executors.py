@@ -0,0 +1,141 @@
+import os
+import pickle
+import threading
+from typing import Any, List, Tuple
+
+import pytest
+from rdkit import Chem
+
+from rxn.chemutils.exceptions import (
+    InvalidInchi,
+    InvalidMdl,
+    InvalidReactionSmiles,
+    InvalidSmiles,
+    SanitizationError,
+    UnclearWhetherTokenized,
+)
+from rxn.chemutils.executors import (
+    ProcessExecutor,
+    SerialExecutor,
+    ThreadExecutor,
+    create_executor,
+)
+from rxn.chemutils.miscellaneous import canonicalize_any
+from rxn.chemutils.profiling import get_profiler, profiling
+from rxn.chemutils.tokenization import TokenizationError, tokenize_smiles
+
+BACKENDS = ["serial", "thread", "process"]
+
+
+class _Worker:
+    """State of the workers."""
+
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+        self.worker_id = (os.getpid(), threading.get_ident())
+
+
+def _describe(worker: _Worker, task: int) -> Tuple[str, Any]:
+    return f"{worker.prefix}{task}", worker.worker_id
+
+
+def _canonicalize(state: None, smiles: str) -> str:
+    return canonicalize_any(smiles)
+
+
+def _tokenize(state: None, smiles: str) -> str:
+    return tokenize_smiles(smiles)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_imap(backend: str) -> None:
+    executor = create_executor(backend, n_jobs=2)
+
+    results = list(
+        executor.imap(_describe, range(50), initializer=_Worker, initargs=("t",))
+    )
+
+    assert [result for result, _ in results] == [f"t{i}" for i in range(50)]
+    n_workers = len({worker_id for _, worker_id in results})
+    assert 1 <= n_workers <= (1 if backend == "serial" else 2)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_map(backend: str) -> None:
+    smiles = ["OCC", "C(C)O.[Na+].[Cl-]", "CC(C)>>C(C)C"] * 20
+    executor = create_executor(backend, n_jobs=2)
+
+    results = list(executor.map(_canonicalize, smiles, chunk_size=7))
+
+    assert results == [canonicalize_any(s) for s in smiles]
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_exceptions_are_propagated(backend: str) -> None:
+    smiles = ["CCO", "C(C)O", "invalid", "CC"]
+    executor = create_executor(backend, n_jobs=2)
+    results: List[str] = []
+
+    with pytest.raises(InvalidSmiles) as exc_info:
+        for result in executor.map(_canonicalize, smiles, chunk_size=3):
+            results.append(result)
+
+    # Same exception as without executor, after the previous results
+    assert str(exc_info.value) == '"invalid" is not a valid SMILES string'
+    assert results == ["CCO", "CCO"]
+
+    with pytest.raises(TokenizationError):
+        list(executor.map(_tokenize, ["CC", "C_C"], chunk_size=1))
+
+
+def test_create_executor() -> None:
+    assert isinstance(create_executor("process", n_jobs=1), SerialExecutor)
+    assert isinstance(create_executor("serial", n_jobs=4), SerialExecutor)
+    assert isinstance(create_executor("thread", n_jobs=4), ThreadExecutor)
+    assert isinstance(create_executor("process", n_jobs=4), ProcessExecutor)
+    with pytest.raises(ValueError):
+        create_executor("gpu", n_jobs=4)
+
+
+def test_profiles_of_worker_processes_are_merged() -> None:
+    executor = ProcessExecutor(n_jobs=2)
+    with profiling():
+        list(executor.map(_canonicalize, ["CCO"] * 10, chunk_size=3))
+        profiler = get_profiler()
+        assert profiler is not None
+        stats = profiler.stats
+
+    assert stats["miscellaneous.canonicalize_any"].calls == 10
+
+
+@pytest.mark.parametrize(
+    "exception",
+    [
+        InvalidSmiles("C1"),
+        InvalidSmiles("C1", "custom message"),
+        InvalidReactionSmiles("CC>O"),
+        InvalidInchi("InChI=1S/x"),
+        InvalidMdl("mdl"),
+        SanitizationError(Chem.MolFromSmiles("CCO")),
+        UnclearWhetherTokenized("C C"),
+        TokenizationError("title", "detail"),
+    ],
+)
+def test_exceptions_can_be_pickled(exception: Exception) -> None:
+    unpickled = pickle.loads(pickle.dumps(exception))
+
+    assert type(unpickled) is type(exception)
+    assert str(unpickled) == str(exception)
+    assert unpickled.__dict__ == exception.__dict__
+
+
+@pytest.mark.parametrize("executor_class", [ThreadExecutor, ProcessExecutor])
+def test_submit(executor_class: Any) -> None:
+    executor = executor_class(2)
+    with executor.create_pool(initializer=_Worker, initargs=("t",)) as pool:
+        futures = [executor.submit(pool, _describe, i) for i in range(5)]
+        failing = executor.submit(pool, _tokenize, "C_C")
+
+        assert [future.result()[0] for future in futures] == [f"t{i}" for i in range(5)]
+        with pytest.raises(TokenizationError):
+            failing.result()
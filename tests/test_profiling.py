@@ -0,0 +1,99 @@
+import json
+import pstats
+
+from rxn.utilities.files import named_temporary_directory
+
+from rxn.chemutils.conversion import canonicalize_smiles
+from rxn.chemutils.miscellaneous import canonicalize_any
+from rxn.chemutils.profiling import (
+    StageProfiler,
+    get_profiler,
+    profiled,
+    profiling,
+    timed,
+)
+from rxn.chemutils.smiles_standardization import standardize_molecules_batch
+
+
+def test_stage_profiler() -> None:
+    profiler = StageProfiler()
+    with profiler.timer("a"):
+        pass
+    with profiler.timer("a"):
+        pass
+    assert list(profiler.time_iterator("b", [1, 2, 3])) == [1, 2, 3]
+    profiler.add("c", 1.5)
+
+    assert profiler.stats["a"].calls == 2
+    assert profiler.stats["b"].calls == 3
+    assert profiler.stats["c"].seconds == 1.5
+    assert profiler.summary_table().splitlines()[2].startswith("c ")
+
+    other = StageProfiler.from_dict(profiler.to_dict())
+    other.merge(profiler)
+    assert other.stats["a"].calls == 4
+    assert other.stats["c"].seconds == 3.0
+    assert other.stats["c"].mean_seconds == 1.5
+
+    with named_temporary_directory() as directory:
+        profiler.save_json(directory / "profile.json")
+        assert json.loads((directory / "profile.json").read_text()) == (
+            profiler.to_dict()
+        )
+
+    profiler.reset()
+    assert profiler.stats == {}
+
+
+def test_profiling_is_disabled_by_default() -> None:
+    assert get_profiler() is None
+    with timed("anything"):
+        pass
+    assert canonicalize_any("OCC>>C(C)O") == "CCO>>CCO"
+    assert canonicalize_smiles.__name__ == "canonicalize_smiles"
+
+
+def test_process_wide_profiling() -> None:
+    @profiled("custom")
+    def double(value: int) -> int:
+        return 2 * value
+
+    with profiling() as profiler:
+        assert get_profiler() is profiler
+        assert canonicalize_any("OCC.C~O>>C(C)O") == "CCO.C~O>>CCO"
+        assert double(3) == 6
+        with timed("block"):
+            pass
+    assert get_profiler() is None
+
+    stats = profiler.stats
+    assert stats["miscellaneous.canonicalize_any"].calls == 1
+    assert stats["reaction_smiles.determine_format"].calls == 1
+    assert stats["reaction_smiles.parse_reaction_smiles"].calls == 1
+    assert stats["reaction_smiles.to_reaction_smiles"].calls == 1
+    for stage in [
+        "conversion.canonicalize_smiles",
+        "conversion.smiles_to_mol",
+        "conversion.remove_hydrogens",
+        "conversion.mol_to_smiles",
+    ]:
+        assert stats[stage].calls == 3
+    # Once for the radicals, once for the full sanitization
+    assert stats["conversion.sanitize_mol"].calls == 6
+    assert stats["custom"].calls == stats["block"].calls == 1
+
+    with named_temporary_directory() as directory:
+        profiler.save(directory / "profile.prof")
+        loaded = pstats.Stats(str(directory / "profile.prof"))
+    assert loaded.total_calls == sum(s.calls for s in stats.values())  # type: ignore[attr-defined]
+
+
+def test_profiling_aggregates_worker_processes() -> None:
+    molecules = ["C(O)C.CCO", "CNC(=O)C"] * 10
+    with profiling() as profiler:
+        # Something recorded before starting the workers, not to count twice
+        canonicalize_smiles("CCO")
+        standardize_molecules_batch(molecules, n_jobs=2, chunk_size=4)
+    # Only in the worker processes
+    assert profiler.stats["conversion.smiles_to_mol"].calls > 1
+    assert profiler.stats["conversion.canonicalize_smiles"].calls == 1
@@ -0,0 +1,135 @@
+import json
+import subprocess
+import sys
+from typing import List
+
+import pytest
+from click.testing import CliRunner
+from rxn.utilities.files import named_temporary_directory
+
+from rxn.chemutils.miscellaneous import canonicalize_any
+from rxn.chemutils.record_pipeline import BatchPipeline, RecordPipeline, parse_stages
+from rxn.chemutils.scripts.cli import main as cli_main
+from rxn.chemutils.tokenization import tokenize_smiles
+
+LINES = ["OCC.C(C)O>>C(=O)O", "C(C)O.[Na+].[Cl-]", "CFC", "CC.O.CC>O>C"] * 5
+
+
+def test_parse_stages() -> None:
+    assert parse_stages("canonicalize | sort|DEDUP | tokenize") == [
+        "canonicalize",
+        "sort",
+        "dedup",
+        "tokenize",
+    ]
+    assert parse_stages(["detokenize", "canonicalize"]) == [
+        "detokenize",
+        "canonicalize",
+    ]
+    with pytest.raises(ValueError):
+        parse_stages("canonicalize | shuffle")
+    with pytest.raises(ValueError):
+        parse_stages(" | ")
+
+
+def test_record_pipeline() -> None:
+    pipeline = RecordPipeline("canonicalize | sort | dedup | tokenize")
+    assert pipeline("OCC.C(C)O>>C(=O)O") == "C C O >> O = C O"
+    assert pipeline("CC.O.CC>O>C") == "C C . O > O > C"
+
+    # Same as the individual functions
+    pipeline = RecordPipeline("detokenize | canonicalize | tokenize")
+    for line in LINES[:2]:
+        assert pipeline(tokenize_smiles(line)) == tokenize_smiles(
+            canonicalize_any(line)
+        )
+
+
+@pytest.mark.parametrize("n_jobs", [1, 2])
+def test_batch_pipeline(n_jobs: int) -> None:
+    batch_pipeline = BatchPipeline(
+        "canonicalize | sort | dedup | tokenize",
+        invalid_placeholder="",
+        n_jobs=n_jobs,
+        chunk_size=3,
+    )
+    results = list(batch_pipeline.process_lines(LINES))
+
+    pipeline = RecordPipeline("canonicalize | sort | dedup | tokenize")
+    assert results[:4] == [
+        pipeline(LINES[0]),
+        pipeline(LINES[1]),
+        "",
+        pipeline(LINES[3]),
+    ]
+    assert results == results[:4] * 5
+    assert batch_pipeline.failed_lines == 5
+
+
+def test_cli_pipeline() -> None:
+    runner = CliRunner()
+    with named_temporary_directory() as directory:
+        input_file = directory / "input.txt"
+        input_file.write_text("".join(f"{line}\n" for line in LINES))
+        output_file = directory / "output.txt"
+        errors_file = directory / "errors.jsonl"
+
+        result = runner.invoke(
+            cli_main,
+            [
+                "pipeline",
+                str(input_file),
+                str(output_file),
+                "--stages",
+                "canonicalize | sort | dedup | tokenize",
+                "--invalid_placeholder",
+                "",
+                "--jobs",
+                "2",
+                "--errors_file",
+                str(errors_file),
+            ],
+        )
+        output: List[str] = output_file.read_text().splitlines()
+        errors = [json.loads(line) for line in errors_file.read_text().splitlines()]
+
+    assert result.exit_code == 0
+    assert output[:4] == [
+        "C C O >> O = C O",
+        "C C O . [Cl-] . [Na+]",
+        "",
+        "C C . O > O > C",
+    ]
+    assert len(output) == 20
+    assert [error["line_number"] for error in errors] == [3, 7, 11, 15, 19]
+
+    result = runner.invoke(cli_main, ["pipeline", "--stages", "unknown"])
+    assert result.exit_code != 0
+    assert "Invalid stage" in result.output
+
+
+def test_cli_aliases() -> None:
+    from rxn.chemutils.scripts import canonicalize
+
+    assert cli_main.get_command(None, "canonicalize") is canonicalize.main  # type: ignore[arg-type]
+    assert "rdf-to-smiles" in cli_main.list_commands(None)  # type: ignore[arg-type]
+
+
+def test_cli_stages_match_available_stages() -> None:
+    from rxn.chemutils.record_pipeline import available_stages
+    from rxn.chemutils.scripts.cli import _STAGES
+
+    assert _STAGES == available_stages()
+
+
+def test_cli_does_not_import_rdkit() -> None:
+    code = (
+        "import sys\n"
+        "from click.testing import CliRunner\n"
+        "from rxn.chemutils.scripts.cli import main\n"
+        "assert 'rdkit' not in sys.modules\n"
+        "result = CliRunner().invoke(main, ['pipeline', '--help'])\n"
+        "assert result.exit_code == 0, result.output\n"
+        "assert 'rdkit' not in sys.modules\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
@@ -0,0 +1,71 @@
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, List
+
+import pytest
+
+from rxn.chemutils.executors import ProcessExecutor, SerialExecutor
+from rxn.chemutils.miscellaneous import canonicalize_any
+from rxn.chemutils.shared_memory_transport import (
+    SharedStrings,
+    imap_shared_strings,
+    share_strings,
+)
+
+
+def _canonicalize_chunk(state: Any, chunk: List[str]) -> List[str]:
+    return [canonicalize_any(smiles, fallback_value="") for smiles in chunk]
+
+
+def test_roundtrip() -> None:
+    strings = ["CCO", "", "[Na+].[Cl-]", "C→C ünicode", "CC>>O"]
+
+    handle = share_strings(strings)
+    with SharedStrings(handle) as shared:
+        assert len(shared) == 5
+        assert list(shared) == strings
+        assert shared.to_list() == strings
+        assert shared[3] == "C→C ünicode"
+        assert shared[-1] == "CC>>O"
+        assert shared[1:4] == strings[1:4]
+        assert shared[::2] == strings[::2]
+        assert shared[4:2] == []
+        assert bytes(shared.view(0)) == b"CCO"
+        assert bytes(shared.lines(3)) == "C→C ünicode\nCC>>O\n".encode("utf-8")
+        with pytest.raises(IndexError):
+            shared.view(5)
+
+    # The block was removed
+    with pytest.raises(FileNotFoundError):
+        SharedMemory(name=handle.name)
+
+
+def test_no_strings() -> None:
+    with SharedStrings(share_strings([])) as shared:
+        assert len(shared) == 0
+        assert list(shared) == []
+        assert bytes(shared.lines()) == b""
+
+
+@pytest.mark.parametrize("strings", [["a\nb", "c"], ["a", "b\n"], ["\n"]])
+def test_strings_with_line_breaks_are_refused(strings: List[str]) -> None:
+    with pytest.raises(ValueError):
+        share_strings(strings)
+
+
+@pytest.mark.parametrize("executor", [SerialExecutor(), ProcessExecutor(n_jobs=2)])
+def test_imap_shared_strings(executor: Any) -> None:
+    smiles = ["OCC", "C(C)O.[Na+].[Cl-]", "CC(C)>>C(C)C", "invalid"] * 10
+    chunks = [smiles[i : i + 7] for i in range(0, len(smiles), 7)]
+
+    results: List[str] = []
+    names: List[str] = []
+    for shared in imap_shared_strings(executor, _canonicalize_chunk, chunks):
+        with shared:
+            results.extend(shared)
+            names.append(shared.handle.name)
+
+    assert results == [canonicalize_any(s, fallback_value="") for s in smiles]
+    assert len(names) == 6
+    for name in names:
+        with pytest.raises(FileNotFoundError):
+            SharedMemory(name=name)
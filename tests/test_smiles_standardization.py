@@ -1,8 +1,19 @@
+from typing import Any, Dict
+
 import pytest
+from rxn.utilities.files import (
+    dump_list_to_file,
+    load_list_from_file,
+    named_temporary_path,
+)
 
 from rxn.chemutils.exceptions import InvalidSmiles
 from rxn.chemutils.smiles_standardization import (
+    PARSING_STAGE,
+    BatchStandardizer,
+    standardize_enzymatic_file,
     standardize_molecules,
+    standardize_molecules_batch,
     standardize_smiles,
 )
 
@@ -82,3 +93,147 @@ def test_standardize_molecules() -> None:
     molecules = "C(O)C.CCO.CC~C._C_"
     with pytest.raises(InvalidSmiles):
         standardize_molecules(molecules)
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {},
+        {"inchify": True},
+        {"canonicalize": False},
+        {"ordered_precursors": False},
+        {"ordered_precursors": False, "inchify": True},
+        {"molecule_token_delimiter": "_"},
+        {"is_enzymatic": True},
+    ],
+)
+def test_standardize_molecules_batch_matches_single_calls(
+    kwargs: Dict[str, Any],
+) -> None:
+    molecules = [
+        "C(O)C.CCO.CC~C",
+        "O.CC(=O)[O-].[Na+]",
+        "CNC(=O)C.C(O)C",
+        "C(O)C.CC~C._C_",
+        "CCO.c1ccccc1|MKVLAAGIVG",
+        "C(O)C.O|MKVL|AAGIVG",
+        "c1ccccc1.O",
+    ]
+
+    def standardize_or_fallback(m: str) -> str:
+        try:
+            return standardize_molecules(m, **kwargs)
+        except InvalidSmiles:
+            return "ERR"
+
+    expected = [standardize_or_fallback(m) for m in molecules]
+
+    results, report = standardize_molecules_batch(
+        molecules, fallback_value="ERR", **kwargs
+    )
+
+    assert results == expected
+    assert len(report.failed_indices()) == expected.count("ERR")
+
+
+def test_standardize_molecules_batch_with_two_enzyme_separators() -> None:
+    molecules = "C(O)C.O|MKVL|AAGIVG"
+
+    results, _ = standardize_molecules_batch([molecules], is_enzymatic=True)
+
+    assert results == [standardize_molecules(molecules, is_enzymatic=True)]
+    assert results == ["CCO.O|MKVL"]
+
+
+def test_standardize_molecules_batch_report() -> None:
+    molecules = ["CCO", "C(O)C.CFC", "CC.O", "CFC"]
+
+    results, report = standardize_molecules_batch(molecules, fallback_value="ERR")
+
+    assert results == ["CCO", "ERR", "CC.O", "ERR"]
+    assert report.failed_indices() == [1, 3]
+    assert report.count_by_stage() == {PARSING_STAGE: 2}
+    assert [failure.smiles for failure in report.failures] == ["CFC", "CFC"]
+    assert report.failures[0].molecules == "C(O)C.CFC"
+
+
+def test_batch_standardizer_caches_compounds() -> None:
+    standardizer = BatchStandardizer(inchify=True, ordered_precursors=False)
+
+    results, _ = standardizer.standardize_batch(["CCO.O", "O.OCC", "CCO.O"])
+
+    assert results == ["CCO.O", "O.CCO", "CCO.O"]
+    # "CCO" and "O" were computed only once, "OCC" once
+    assert standardizer.cache_info().misses == 3
+    assert standardizer.cache_info().hits == 3
+
+
+def test_standardize_molecules_batch_with_multiple_processes() -> None:
+    molecules = ["C(O)C.CCO", "CFC", "CNC(=O)C"] * 10
+
+    serial_results, serial_report = standardize_molecules_batch(molecules, inchify=True)
+    results, report = standardize_molecules_batch(
+        molecules, inchify=True, n_jobs=2, chunk_size=4
+    )
+
+    assert results == serial_results
+    assert report == serial_report
+    assert report.failed_indices() == list(range(1, 30, 3))
+
+
+def test_standardize_enzymatic_file() -> None:
+    lines = [
+        "C(O)C.CC~C|MKVLAAGIVGLLLA",
+        "OCC.O",
+        "C(O)C.CCO|MKVLAAGIVG|LLLA",
+        "CFC|MKVL",
+        "C(O)C._C_|",
+    ]
+
+    with named_temporary_path() as input_path, named_temporary_path() as output_path:
+        dump_list_to_file(lines, input_path)
+
+        report = standardize_enzymatic_file(
+            input_path,
+            output_path,
+            molecule_token_delimiter="_",
+            fallback_value="ERR",
+        )
+
+        assert load_list_from_file(output_path) == [
+            "CCO.C~CC|MKVLAAGIVGLLLA",
+            "CCO.O",
+            # Up to the second separator, as for standardize_molecules
+            "CCO.CCO|MKVLAAGIVG",
+            "ERR",
+            "C.CCO|",
+        ]
+        assert report.failed_indices() == [3]
+
+
+def test_standardize_enzymatic_file_with_crlf_line_endings() -> None:
+    with named_temporary_path() as input_path, named_temporary_path() as output_path:
+        input_path.write_bytes(b"C(O)C.O|MKVL\r\nOCC\r\nCC.O")
+
+        report = standardize_enzymatic_file(input_path, output_path)
+
+        assert output_path.read_bytes() == b"CCO.O|MKVL\nCCO\nCC.O\n"
+        assert report.failed_indices() == []
+
+
+def test_standardize_file_matches_standardize_with_two_enzyme_separators() -> None:
+    lines = ["C(O)C.O|MKVL|AAGIVG", "OCC|MKVL||", "CC||MKVL"]
+    standardizer = BatchStandardizer(is_enzymatic=True)
+
+    with named_temporary_path() as input_path, named_temporary_path() as output_path:
+        dump_list_to_file(lines, input_path)
+        standardizer.standardize_file(input_path, output_path)
+
+        assert load_list_from_file(output_path) == [
+            standardizer.standardize(line) for line in lines
+        ]
+        assert load_list_from_file(output_path) == [
+            "CCO.O|MKVL",
+            "CCO|MKVL",
+            "CC|",
+        ]
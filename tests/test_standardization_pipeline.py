@@ -0,0 +1,126 @@
+from typing import List
+
+import pytest
+
+from rxn.chemutils.conversion import cleanup_smiles
+from rxn.chemutils.exceptions import InvalidSmiles
+from rxn.chemutils.miscellaneous import canonicalize_any
+from rxn.chemutils.reaction_equation import ReactionEquation, rxn_standardization
+from rxn.chemutils.smiles_standardization import standardize_smiles
+from rxn.chemutils.standardization_pipeline import (
+    StandardizationPipeline,
+    StandardizationStep,
+)
+from rxn.chemutils.utils import remove_atom_mapping
+
+any_smiles_examples = [
+    "C(C)O",
+    "OCC.O.C(C)O",
+    "[Na+]~[Cl-].OCC.O",
+    "CC(C)O.O>[Pd]>C(C)(=O)C",
+    "CC(C)O.[Na+].O.[Cl-]>>C(C)(=O)C |f:1.3|",
+    "CCO.O~O>O.CC>CCO",
+    "[CH3:1][OH:2]>>[CH2:1]=[O:2]",
+]
+
+
+@pytest.mark.parametrize("any_smiles", any_smiles_examples)
+def test_canonicalization_is_same_as_canonicalize_any(any_smiles: str) -> None:
+    pipeline = StandardizationPipeline(["canonicalize"])
+    assert pipeline(any_smiles) == canonicalize_any(any_smiles)
+
+
+@pytest.mark.parametrize("any_smiles", any_smiles_examples)
+def test_canonicalization_and_sorting_is_same_as_canonicalize_any(
+    any_smiles: str,
+) -> None:
+    pipeline = StandardizationPipeline(
+        [StandardizationStep.CANONICALIZE, StandardizationStep.SORT]
+    )
+    assert pipeline(any_smiles) == canonicalize_any(any_smiles, sort_molecules=True)
+
+
+def test_rxn_standardization_equivalent() -> None:
+    pipeline = StandardizationPipeline(
+        ["merge_reactants_and_agents", "canonicalize", "sort", "dedup"]
+    )
+    reaction = ReactionEquation(
+        reactants=["OCC", "O"], agents=["CCO", "[Na+].[Cl-]"], products=["CC=O", "O"]
+    )
+    expected = rxn_standardization(reaction).to_string("~")
+
+    assert pipeline(reaction.to_string("~")) == expected
+
+
+def test_remove_precursors_from_products() -> None:
+    pipeline = StandardizationPipeline(
+        ["canonicalize", "remove_precursors_from_products"]
+    )
+    assert pipeline("CCO.OC>O>C(C)O.C=O.O") == "CCO.CO>O>C=O"
+
+
+@pytest.mark.parametrize("smiles", ["CC(=O)NC", "CCCC[Li]", "C(O)C"])
+def test_inchification(smiles: str) -> None:
+    pipeline = StandardizationPipeline(["inchify"])
+    assert pipeline(smiles) == standardize_smiles(smiles, inchify=True)
+
+
+@pytest.mark.parametrize("smiles", ["C(C)O", "[C]", "CC(C)(C)(C)(C)C"])
+def test_cleanup(smiles: str) -> None:
+    pipeline = StandardizationPipeline(["cleanup"])
+    assert pipeline(smiles) == cleanup_smiles(smiles)
+
+
+def test_atom_mapping_removal() -> None:
+    reaction_smiles = "[CH3:1][OH:2].[*:3]>>[CH2:1]=[O:2]"
+
+    # on the string only
+    assert StandardizationPipeline(["remove_atom_mapping"])(
+        reaction_smiles
+    ) == remove_atom_mapping(reaction_smiles)
+
+    # on the string, before the canonicalization
+    assert StandardizationPipeline(["remove_atom_mapping", "canonicalize"])(
+        reaction_smiles
+    ) == canonicalize_any(remove_atom_mapping(reaction_smiles))
+
+    # on the RDKit Mol, after the canonicalization
+    assert (
+        StandardizationPipeline(["canonicalize", "remove_atom_mapping"])(
+            reaction_smiles
+        )
+        == "CO.[*:3]>>C=O"
+    )
+
+
+def test_invalid_smiles() -> None:
+    with pytest.raises(InvalidSmiles):
+        StandardizationPipeline(["canonicalize"])("CFC")
+
+    pipeline = StandardizationPipeline(["canonicalize"], check_valence=False)
+    assert pipeline("CFC") == "CFC"
+
+    pipeline = StandardizationPipeline(["canonicalize"], fallback_value="ERR")
+    assert pipeline("CFC.O") == "ERR"
+
+
+def test_invalid_step() -> None:
+    with pytest.raises(ValueError):
+        _ = StandardizationPipeline(["canonicalize", "invalid_step"])
+
+
+def test_timings() -> None:
+    pipeline = StandardizationPipeline(["canonicalize", "sort"])
+    smiles_list: List[str] = ["CCO.O>>CC=O", "C(C)O", "O.N"]
+    _ = pipeline.standardize_iterable(smiles_list)
+
+    summary = pipeline.timing_summary()
+    # 5 compounds ("O.N" is a single-component SMILES), parsed and serialized only once
+    assert summary["parse"]["calls"] == 5
+    assert summary["canonicalize"]["calls"] == 5
+    assert summary["serialize"]["calls"] == 5
+    assert summary["sort"]["calls"] == 3
+    assert summary["parse_reaction"]["calls"] == 1
+
+    pipeline.reset_timings()
+    assert pipeline.timing_summary() == {}
@@ -0,0 +1,106 @@
+import os
+import time
+from typing import List, Optional
+
+import pytest
+
+from rxn.chemutils.batch_processing import BatchProcessor, ProcessingFailure
+from rxn.chemutils.watchdog_pool import (
+    ABORT_CRASH,
+    ABORT_TIMEOUT,
+    AbortedItem,
+    WatchdogPool,
+    map_with_timeout,
+)
+
+
+def slow_or_crashing(item: str) -> str:
+    if item == "slow":
+        time.sleep(60)
+    if item == "crash":
+        os._exit(1)
+    if item == "error":
+        raise ValueError(item)
+    return item.upper()
+
+
+class _SlowOrCrashingProcessor(BatchProcessor):
+    def __init__(self, invalid_placeholder: Optional[str], timeout: float, n_jobs: int):
+        super().__init__(
+            init_kwargs=dict(timeout=timeout, n_jobs=n_jobs),
+            invalid_placeholder=invalid_placeholder,
+            n_jobs=n_jobs,
+            chunk_size=3,
+            timeout=timeout,
+        )
+
+    def process(self, record: str) -> str:
+        return slow_or_crashing(record)
+
+
+ITEMS = ["a", "slow", "b", "c", "crash", "d", "e", "f", "g"]
+
+
+@pytest.mark.parametrize("n_jobs", [1, 2])
+def test_watchdog_pool(n_jobs: int) -> None:
+    pool = WatchdogPool(slow_or_crashing, timeout=0.5, n_jobs=n_jobs)
+
+    results = list(pool.imap(ITEMS, chunk_size=4))
+
+    assert results == [
+        "A",
+        AbortedItem("slow", ABORT_TIMEOUT),
+        "B",
+        "C",
+        AbortedItem("crash", ABORT_CRASH),
+        "D",
+        "E",
+        "F",
+        "G",
+    ]
+    assert pool.aborted_count == 2
+    assert pool.restart_count == 2
+
+
+def test_watchdog_pool_without_problems() -> None:
+    pool = WatchdogPool(str.upper, timeout=10, n_jobs=2)
+    items = [str(i) for i in range(1000)]
+
+    assert list(pool.imap(items, chunk_size=7)) == items
+    assert pool.restart_count == 0
+
+
+def test_map_with_timeout() -> None:
+    items = ["a", "slow", "error", "crash", "b"]
+
+    results = list(map_with_timeout(slow_or_crashing, items, 0.5, "X", chunk_size=2))
+
+    assert results == ["A", "X", "X", "X", "B"]
+
+
+@pytest.mark.parametrize("n_jobs", [1, 2])
+def test_batch_processor_with_timeout(n_jobs: int) -> None:
+    failures: List[ProcessingFailure] = []
+    processor = _SlowOrCrashingProcessor("X", timeout=0.5, n_jobs=n_jobs)
+    processor.failure_sink = failures.append
+
+    results = list(processor.process_lines(ITEMS + ["error"]))
+
+    assert results == ["A", "X", "B", "C", "X", "D", "E", "F", "G", "X"]
+    assert [(f.line_number, f.error_type) for f in failures] == [
+        (2, ABORT_TIMEOUT),
+        (5, ABORT_CRASH),
+        (10, "ValueError"),
+    ]
+    assert processor.failed_lines == 3
+
+
+def test_batch_processor_with_timeout_and_no_placeholder() -> None:
+    processor = _SlowOrCrashingProcessor(None, timeout=0.5, n_jobs=1)
+    results: List[str] = []
+
+    with pytest.raises(RuntimeError, match="more than 0.5 seconds"):
+        for result in processor.process_lines(ITEMS):
+            results.append(result)
+
+    assert results == ["A"]